@@ -1,8 +1,21 @@
 import os
+import copy
+import tempfile
+import threading
+from contextlib import contextmanager
 import streamlit as st
 import json
 from typing import Dict, Optional
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Parsed config per file path: {path: ((mtime_ns, size, inode), config)}
+_config_cache = {}
+_config_lock = threading.RLock()
+
 class APIConfigManager:
     """Manages API keys and configuration for search engines"""
 
@@ -31,13 +44,50 @@ class APIConfigManager:
             }
         }
 
+    def _file_signature(self):
+        """(mtime, size, inode) of the config file, or None if it does not exist"""
+        try:
+            stat = os.stat(self.config_file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    @contextmanager
+    def _write_lock(self):
+        """Serialize writers across threads and, where supported, processes"""
+        with _config_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.config_file + ".lock", 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _cached_config(self) -> Dict:
+        """Return the parsed config, re-reading the file only when it changed
+
+        The returned dict is shared; use load_config() for a mutable copy.
+        """
+        path = os.path.abspath(self.config_file)
+        signature = self._file_signature()
+        if signature is None:
+            return {}
+        with _config_lock:
+            cached = _config_cache.get(path)
+            if cached and cached[0] == signature:
+                return cached[1]
+            with open(self.config_file, 'r') as f:
+                config = json.load(f)
+            _config_cache[path] = (signature, config)
+            return config
+
     def load_config(self) -> Dict:
         """Load API configuration from file"""
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    return json.load(f)
-            return {}
+            return copy.deepcopy(self._cached_config())
         except Exception as e:
             st.error(f"Erro ao carregar configuração: {e}")
             return {}
@@ -45,13 +95,29 @@ class APIConfigManager:
     def save_config(self, config: Dict) -> bool:
         """Save API configuration to file"""
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(config, f, indent=2)
+            with self._write_lock():
+                self._write_atomic(config)
             return True
         except Exception as e:
             st.error(f"Erro ao salvar configuração: {e}")
             return False
 
+    def _write_atomic(self, config: Dict):
+        """Write to a temp file in the same directory and rename it over the config"""
+        directory = os.path.dirname(os.path.abspath(self.config_file))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".api_config.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(config, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.config_file)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        _config_cache[os.path.abspath(self.config_file)] = (self._file_signature(), copy.deepcopy(config))
+
     def get_api_key(self, engine: str, key_name: str) -> Optional[str]:
         """Get API key for specific engine"""
         # First check environment variables
@@ -59,26 +125,46 @@ class APIConfigManager:
         if env_key:
             return env_key
         # Then check saved configuration
-        config = self.load_config()
+        try:
+            config = self._cached_config()
+        except Exception as e:
+            st.error(f"Erro ao carregar configuração: {e}")
+            return None
         return config.get(engine, {}).get(key_name)
 
+    def _update_config(self, update) -> bool:
+        """Read, modify and replace the config under one cross-process write lock
+
+        update(config) edits the dict in place and returns False when there is
+        nothing to save. Holding the flock from the read through the rename
+        keeps concurrent saves from other workers from being lost.
+        """
+        try:
+            with self._write_lock():
+                config = copy.deepcopy(self._cached_config())
+                if update(config) is False:
+                    return False
+                self._write_atomic(config)
+            return True
+        except Exception as e:
+            st.error(f"Erro ao salvar configuração: {e}")
+            return False
+
     def set_api_key(self, engine: str, key_name: str, key_value: str) -> bool:
         """Set API key for specific engine"""
-        config = self.load_config()
-        if engine not in config:
-            config[engine] = {}
-        config[engine][key_name] = key_value
-        return self.save_config(config)
+        def update(config):
+            config.setdefault(engine, {})[key_name] = key_value
+        return self._update_config(update)
 
     def remove_api_key(self, engine: str, key_name: str) -> bool:
         """Remove API key for specific engine"""
-        config = self.load_config()
-        if engine in config and key_name in config[engine]:
+        def update(config):
+            if key_name not in config.get(engine, {}):
+                return False
             del config[engine][key_name]
             if not config[engine]:  # Remove empty engine config
                 del config[engine]
-            return self.save_config(config)
-        return False
+        return self._update_config(update)
 
     def get_api_keys_env_or_file(self) -> Dict[str, str]:
         """Get all API keys from environment variables or config file."""
@@ -115,8 +201,8 @@ class APIConfigManager:
             'keys_status': keys_status
         }
 
-    def render_config_ui(self):
-        """Render the API configuration UI"""
+    def render_config_ui(self, quota=None):
+        """Render the API configuration UI (with remaining quota when a QuotaScheduler is given)"""
         st.header("🔑 Configuração de APIs dos Motores de Busca")
         st.markdown("""
         - **Google:** Insira `GOOGLE_API_KEY` e `GOOGLE_CSE_ID` como variáveis de ambiente ou salve abaixo.
@@ -198,6 +284,9 @@ class APIConfigManager:
                 else:
                     st.error(f"❌ {engine} - Não configurado")
 
+                if quota:
+                    st.caption(f"📊 Cota: {quota.describe(engine)}")
+
                 # Show detailed status
                 if 'keys_status' in status and status['keys_status']:
                     for key, key_status in status['keys_status'].items():
@@ -229,4 +318,12 @@ class APIConfigManager:
                     elif engine == 'Yahoo!':
                         st.write("**Passos:**")
                         st.write("1. Registre seu app na área de desenvolvedores do Yahoo!")
-                        st.write("2. Salve App
+                        st.write("2. Salve App ID, Client ID e Client Secret")
+                        st.write("3. Configure as três chaves acima ou como variáveis de ambiente")
+
+                    elif engine == 'Bravo Search':
+                        st.write("**Passos:**")
+                        st.write("1. Crie uma conta na Brave Search API")
+                        st.write("2. Escolha um plano e gere uma chave de assinatura")
+                        st.write("3. Configure `BRAVO_API_KEY` acima ou como variável de ambiente")
+
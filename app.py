@@ -3,11 +3,22 @@ import pandas as pd
 from datetime import datetime, timedelta
 import json
 import hashlib
+import tempfile
 from search_engines import SearchEngineManager
 from mock_data import MockDataGenerator
-from filters import FilterManager
+from filters import FilterManager, DeadlineIndex, DEADLINE_WINDOWS, DEADLINE_FILTERS
+from facets import FacetEngine
 from styles import get_custom_css
-from database import DatabaseManager
+from database import DatabaseManager, opportunity_fingerprint
+from async_database import get_async_db
+from retention import start_retention_worker
+from trending import start_trending_worker
+from reminders import start_reminder_worker
+from warmup import start_cache_warmer
+from quota import get_quota_scheduler
+from exporters import EXPORT_FORMATS, EXPORT_MAX_BYTES, write_export
+from results_table import results_to_dataframe, table_column_config
+from result_store import get_result_store, page_bounds
 from api_config import APIConfigManager
 
 # Configure page
@@ -27,35 +38,114 @@ if 'user_session' not in st.session_state:
     session_data = str(datetime.now()) + str(hash(id(st.session_state)))
     st.session_state.user_session = hashlib.md5(session_data.encode()).hexdigest()
 
-if 'search_results' not in st.session_state:
-    st.session_state.search_results = []
+# Sessions keep only the fingerprints of their results (and which of them
+# were new to the user); payloads live once per process in the result store
+if 'search_result_ids' not in st.session_state:
+    st.session_state.search_result_ids = ()
+if 'search_new_ids' not in st.session_state:
+    st.session_state.search_new_ids = frozenset()
+
+# Facet counts are computed once per result set and kept alongside it:
+# raw_facets covers everything the engines returned (for the sidebar options),
+# result_facets covers the filtered results (for the stats panel)
+if 'raw_facets' not in st.session_state:
+    st.session_state.raw_facets = FacetEngine()
+if 'result_facets' not in st.session_state:
+    st.session_state.result_facets = FacetEngine()
 
 # Initialize managers
 search_manager = SearchEngineManager()
 mock_data = MockDataGenerator()
 filter_manager = FilterManager()
 db_manager = DatabaseManager()
+async_db = get_async_db()
+start_retention_worker(db_manager)
+search_manager.quota = get_quota_scheduler(db_manager)
+start_trending_worker(db_manager)
+start_reminder_worker(db_manager)
+pending_writes = []
+
+def db_write(method, *args, **kwargs):
+    """Run a DB write on the async layer so it overlaps with engine I/O (sync fallback)"""
+    if async_db:
+        pending_writes.append(async_db.call(method, *args, **kwargs))
+        return True
+    return getattr(db_manager, method)(*args, **kwargs)
+
+result_store = get_result_store()
+
+def mark_catalog_result(result):
+    """The catalog only keeps real results; cite it as the source"""
+    result['is_real_data'] = True
+    result['is_mock_data'] = False
+    result['citation'] = f"Catálogo local - verificar informações no site oficial: {result.get('url')}"
+    return result
+
+def load_evicted_results(fingerprints):
+    """Results evicted from the store come back from the catalog (real results only)"""
+    restored = db_manager.get_opportunities_by_fingerprint(fingerprints)
+    for result in restored.values():
+        mark_catalog_result(result)
+    return restored
+
+def materialize_results(ids):
+    """Full result dicts for the given ids, with this session's annotations"""
+    results = result_store.materialize(ids, load_evicted_results)
+    for result in results:
+        result['is_new'] = result['fingerprint'] in st.session_state.search_new_ids
+    return results
+
+def wait_pending_writes():
+    """Block until background writes finish (before reading what they wrote)"""
+    while pending_writes:
+        pending_writes.pop().result()
 api_config = APIConfigManager()
 
+DEFAULT_KEYWORDS = [
+    "concurso literário", "prêmio literatura", "antologia", "contos",
+    "poesia", "edital cultural", "chamada pública", "festival literário"
+]
+DEFAULT_SEARCH_ENGINES = ["Google", "DuckDuckGo"]
+
 # Load user preferences from database
 user_prefs = db_manager.get_user_preferences(st.session_state.user_session)
 if user_prefs:
-    default_keywords = user_prefs.get('custom_keywords', [
-        "concurso literário", "prêmio literatura", "antologia", "contos",
-        "poesia", "edital cultural", "chamada pública", "festival literário"
-    ])
+    default_keywords = user_prefs.get('custom_keywords', list(DEFAULT_KEYWORDS))
     default_engines = user_prefs.get('preferred_engines', ["Google", "You", "Perplexity", "Bing"])
 else:
-    default_keywords = [
-        "concurso literário", "prêmio literatura", "antologia", "contos",
-        "poesia", "edital cultural", "chamada pública", "festival literário"
-    ]
+    default_keywords = list(DEFAULT_KEYWORDS)
     # Atualize a lista de buscadores disponíveis na sidebar:
 default_engines = ["Google", "DuckDuckGo", "Yandex", "Yahoo!", "Bravo Search"]
 
+# Pre-run the default and most frequent searches in the background
+start_cache_warmer(db_manager, DEFAULT_KEYWORDS, DEFAULT_SEARCH_ENGINES)
+
 if 'custom_keywords' not in st.session_state:
     st.session_state.custom_keywords = default_keywords
 
+def deadline_option_label(option, facets):
+    """Label a deadline filter option with how many raw results it would keep"""
+    if not facets.total or option in ("Todos", "Intervalo personalizado"):
+        return option
+    counts = facets.get('deadline')
+    if option == "Ainda abertos":
+        count = sum(c for label, c in counts.items() if label not in ("Expirados", "Sem prazo"))
+    else:
+        count = sum(counts.get(label, 0) for label, days in DEADLINE_WINDOWS.items()
+                    if days <= DEADLINE_WINDOWS[option])
+    return f"{option} ({count})"
+
+def render_facet_counts(container, facets):
+    """Render the live facet counts panel"""
+    with container.container():
+        if not facets.total:
+            return
+        st.caption(f"**{facets.total} resultados brutos**")
+        for name, title in [('search_engine', "Por motor"), ('source', "Por fonte")]:
+            values = ", ".join(f"{value}: {count}" for value, count in
+                               sorted(facets.get(name).items(), key=lambda item: -item[1]))
+            st.caption(f"{title}: {values}")
+
 def get_eligibility_tag(eligible):
     """Generate eligibility tag HTML"""
     if eligible:
@@ -78,13 +168,23 @@ with st.sidebar:
     st.header("🔍 Configurações de Busca")
     st.markdown('</div>', unsafe_allow_html=True)
     
+    raw_facets = st.session_state.raw_facets
+    facet_panel = st.empty()
+    render_facet_counts(facet_panel, raw_facets)
+    
     # Search engines selection
     st.subheader("Plataformas de Busca")
     available_engines = ["Google", "You", "Perplexity", "Bing", "DuckDuckGo"]
     search_engines = st.multiselect(
         "Selecione as plataformas:",
         available_engines,
-        default=default_engines if all(engine in available_engines for engine in default_engines) else ["Google", "DuckDuckGo"]
+        format_func=lambda engine: raw_facets.format_option('search_engine', engine) if raw_facets.total else engine,
+        default=default_engines if all(engine in available_engines for engine in default_engines) else DEFAULT_SEARCH_ENGINES
+    )
+    auto_engines = st.checkbox(
+        "🤖 Seleção automática",
+        value=False,
+        help="Usa apenas as plataformas selecionadas com melhor rendimento (resultados elegíveis por milissegundo) nas buscas anteriores."
     )
     
     # Real data option
@@ -94,9 +194,24 @@ with st.sidebar:
         help="Ativa busca em sites reais. Ainda em desenvolvimento e pode ter resultados limitados."
     )
     
+    only_new = st.checkbox(
+        "🆕 Apenas novidades desde a última busca",
+        value=False,
+        help="Mostra só as oportunidades que você ainda não viu em buscas anteriores."
+    )
+    
+    use_catalog = st.checkbox(
+        "📚 Incluir catálogo local",
+        value=True,
+        help="Responde primeiro com oportunidades já coletadas; os motores de busca trazem as novidades."
+    )
+    
     # Regional filtering
     st.subheader("Filtros Regionais")
-    include_tocantins = st.checkbox("Incluir oportunidades para Tocantins", value=True)
+    eligible_label = "Incluir oportunidades para Tocantins"
+    if raw_facets.total:
+        eligible_label += f" ({raw_facets.eligibility_summary()['eligible']})"
+    include_tocantins = st.checkbox(eligible_label, value=True)
     exclude_other_states = st.checkbox("Excluir oportunidades restritas a outros estados", value=False)
     national_only = st.checkbox("Apenas oportunidades nacionais", value=False)
     
@@ -105,6 +220,7 @@ with st.sidebar:
     opportunity_types = st.multiselect(
         "Selecione os tipos:",
         ["Concursos Literários", "Editais Culturais", "Antologias", "Festivais", "Prêmios", "Chamadas Públicas"],
+        format_func=lambda opp_type: raw_facets.format_option('type', opp_type) if raw_facets.total else opp_type,
         default=["Concursos Literários", "Editais Culturais", "Antologias"]
     )
     
@@ -112,8 +228,19 @@ with st.sidebar:
     st.subheader("Prazos")
     deadline_filter = st.selectbox(
         "Filtrar por prazo:",
-        ["Todos", "Próximos 7 dias", "Próximos 30 dias", "Próximos 90 dias"]
+        DEADLINE_FILTERS,
+        format_func=lambda option: deadline_option_label(option, raw_facets)
     )
+    deadline_range = None
+    if deadline_filter == "Intervalo personalizado":
+        selected_range = st.date_input(
+            "Prazo entre:",
+            value=(datetime.now().date(), (datetime.now() + timedelta(days=30)).date()),
+            format="DD/MM/YYYY"
+        )
+        # While the user is still picking, date_input returns a single date
+        if isinstance(selected_range, (list, tuple)) and len(selected_range) == 2:
+            deadline_range = tuple(selected_range)
     
     # Keywords management
     st.subheader("Palavras-chave")
@@ -149,7 +276,7 @@ with st.sidebar:
     # API Configuration Section
     st.markdown("---")
     with st.expander("⚙️ Configuração de APIs"):
-        api_config.render_config_ui()
+        api_config.render_config_ui(quota=search_manager.quota)
 
 # Main content area
 col1, col2 = st.columns([2, 1])
@@ -168,36 +295,96 @@ with col1:
             with st.spinner("Buscando oportunidades..."):
                 # Update search manager with real data option
                 search_manager.use_real_data = use_real_search
+                engines_to_search = search_manager.select_engines(search_engines) if auto_engines else search_engines
+                if auto_engines:
+                    st.caption(f"🤖 Plataformas escolhidas: {', '.join(engines_to_search)}")
+                
+                # Search across selected engines, updating the facet counts
+                # as each engine's batch arrives
+                results = []
+                raw_facets = FacetEngine()
+                seen_fingerprints = set()
+                
+                def add_batch(batch):
+                    new_results = []
+                    for result in batch:
+                        fingerprint = result.get('fingerprint') or opportunity_fingerprint(result)
+                        result['fingerprint'] = fingerprint
+                        if fingerprint not in seen_fingerprints:
+                            seen_fingerprints.add(fingerprint)
+                            new_results.append(result)
+                    results.extend(new_results)
+                    raw_facets.add_batch(new_results)
+                    render_facet_counts(facet_panel, raw_facets)
                 
-                # Search across selected engines
-                results = search_manager.search_all_engines(
-                    search_engines, 
+                # Opportunities already in the catalog come back first
+                if use_catalog:
+                    catalog_hits = db_manager.search_catalog(
+                        search_query,
+                        {'types': opportunity_types or None},
+                        limit=50
+                    )['results']
+                    add_batch([mark_catalog_result(hit) for hit in catalog_hits])
+                
+                for engine, batch in search_manager.iter_engine_batches(
+                    engines_to_search, 
                     search_query, 
                     st.session_state.custom_keywords
-                )
+                ):
+                    add_batch(batch)
+                    # Keep real results so later searches can be answered locally
+                    db_write('upsert_opportunities', [r for r in batch if r.get('is_real_data')])
+                st.session_state.raw_facets = raw_facets
+                if search_manager.skipped_engines:
+                    st.info(f"Cota de API preservada, busca não enviada para: {', '.join(search_manager.skipped_engines)}")
+                for engine, dropped in search_manager.dropped_keywords.items():
+                    st.info(f"Limite de consultas por busca: {engine} não pesquisou {', '.join(dropped)}")
+                
+                # Mark what this user has seen before; in "only new" mode the
+                # filters only have to look at the delta
+                seen_before = db_manager.get_seen_fingerprints(st.session_state.user_session, seen_fingerprints)
+                for result in results:
+                    result['is_new'] = result['fingerprint'] not in seen_before
+                new_results = [result for result in results if result['is_new']]
+                if only_new:
+                    st.caption(f"🆕 {len(new_results)} novas de {len(results)} oportunidades encontradas")
                 
                 # Apply filters
                 filtered_results = filter_manager.apply_filters(
-                    results,
+                    new_results if only_new else results,
                     include_tocantins=include_tocantins,
                     exclude_other_states=exclude_other_states,
                     national_only=national_only,
                     opportunity_types=opportunity_types,
-                    deadline_filter=deadline_filter
+                    deadline_filter=deadline_filter,
+                    deadline_range=deadline_range
                 )
                 
-                st.session_state.search_results = filtered_results
+                st.session_state.search_result_ids = tuple(result_store.put_many(filtered_results))
+                st.session_state.search_new_ids = frozenset(
+                    result['fingerprint'] for result in filtered_results if result.get('is_new')
+                )
+                st.session_state.results_page = 1
+                st.session_state.result_facets = FacetEngine(filtered_results)
+                db_write(
+                    'mark_results_seen',
+                    st.session_state.user_session,
+                    [result['fingerprint'] for result in filtered_results]
+                )
                 
                 # Save to database
-                db_manager.save_search_history(
+                db_write(
+                    'save_search_history',
                     search_query or "Busca geral",
-                    search_engines,
+                    engines_to_search,
                     len(filtered_results),
-                    st.session_state.user_session
+                    st.session_state.user_session,
+                    keywords=st.session_state.custom_keywords
                 )
                 
                 # Save engine preferences
-                db_manager.save_user_preferences(
+                db_write(
+                    'save_user_preferences',
                     st.session_state.user_session,
                     preferred_engines=search_engines
                 )
@@ -206,19 +393,16 @@ with col1:
 
 with col2:
     # Quick stats
-    if st.session_state.search_results:
+    if st.session_state.search_result_ids:
         st.markdown('<div class="stats-container">', unsafe_allow_html=True)
-        st.metric("Total de Oportunidades", len(st.session_state.search_results))
+        result_facets = st.session_state.result_facets
+        st.metric("Total de Oportunidades", result_facets.total)
         
         # Count by eligibility
-        eligible_count = len([r for r in st.session_state.search_results if r.get('tocantins_eligible', False)])
-        st.metric("Elegíveis para Tocantins", eligible_count)
+        st.metric("Elegíveis para Tocantins", result_facets.eligibility_summary()['eligible'])
         
         # Count by type
-        type_counts = {}
-        for result in st.session_state.search_results:
-            opp_type = result.get('type', 'Outros')
-            type_counts[opp_type] = type_counts.get(opp_type, 0) + 1
+        type_counts = result_facets.get('type')
         
         if type_counts:
             st.write("**Por tipo:**")
@@ -226,9 +410,25 @@ with col2:
                 st.write(f"• {opp_type}: {count}")
         
         st.markdown('</div>', unsafe_allow_html=True)
+    else:
+        # "Em alta" reads the precomputed trending table, not raw activity
+        trending_opportunities = db_manager.get_trending_opportunities(limit=5)
+        trending_queries = db_manager.get_trending_queries(limit=5)
+        if trending_opportunities or trending_queries:
+            st.markdown('<div class="stats-container">', unsafe_allow_html=True)
+            st.subheader("🔥 Em alta")
+            for opportunity in trending_opportunities:
+                deadline = opportunity.get('deadline')
+                deadline_str = f" · prazo {deadline.strftime('%d/%m/%Y')}" if deadline else ""
+                st.write(f"• **{opportunity['title']}** ({opportunity['type']}){deadline_str}")
+            if trending_queries:
+                st.write("**Buscas em alta:**")
+                st.write(", ".join(entry['query'] for entry in trending_queries))
+            st.markdown('</div>', unsafe_allow_html=True)
 
 # Results display
-if st.session_state.search_results:
+result_ids = st.session_state.search_result_ids
+if result_ids:
     st.markdown("---")
     st.header("📋 Resultados da Busca")
     
@@ -242,74 +442,105 @@ if st.session_state.search_results:
     with sort_col2:
         sort_order = st.selectbox("Ordem:", ["Crescente", "Decrescente"])
     
+    view_mode = st.radio(
+        "Visualização:",
+        ["Cartões", "Tabela"],
+        horizontal=True,
+        help="A tabela mostra todos os resultados em uma única grade, com ordenação e filtros por coluna.",
+        key="results_view_mode"
+    )
+    
     # Display results
-    for i, result in enumerate(st.session_state.search_results):
-        with st.container():
-            st.markdown('<div class="result-card">', unsafe_allow_html=True)
+    if view_mode == "Tabela":
+        st.dataframe(
+            results_to_dataframe(materialize_results(result_ids)),
+            column_config=table_column_config(st),
+            hide_index=True,
+            use_container_width=True
+        )
+    else:
+        # Only the visible page is materialized
+        start, end, pages = page_bounds(len(result_ids), st.session_state.get('results_page', 1))
+        if pages > 1:
+            page = st.number_input(
+                f"Página (de {pages}):",
+                min_value=1,
+                max_value=pages,
+                step=1,
+                key="results_page"
+            )
+            start, end, _ = page_bounds(len(result_ids), page)
+        st.caption(f"Mostrando {start + 1}–{end} de {len(result_ids)} oportunidades")
+        for i, result in enumerate(materialize_results(result_ids[start:end]), start=start):
+            with st.container():
+                st.markdown('<div class="result-card">', unsafe_allow_html=True)
             
-            # Header with title and eligibility tag
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                st.markdown(f"### {result['title']}")
-            with col2:
-                eligibility_tag = get_eligibility_tag(result.get('tocantins_eligible', False))
-                st.markdown(eligibility_tag, unsafe_allow_html=True)
+                # Header with title and eligibility tag
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    new_badge = "🆕 " if result.get('is_new') else ""
+                    st.markdown(f"### {new_badge}{result['title']}")
+                with col2:
+                    eligibility_tag = get_eligibility_tag(result.get('tocantins_eligible', False))
+                    st.markdown(eligibility_tag, unsafe_allow_html=True)
             
-            # Content with proper citations and disclaimers
-            st.markdown(f"**Fonte:** {result['source']} | **Motor:** {result['search_engine']}")
-            st.markdown(f"**Tipo:** {result['type']}")
-            st.markdown(f"**Descrição:** {result['description']}")
+                # Content with proper citations and disclaimers
+                st.markdown(f"**Fonte:** {result['source']} | **Motor:** {result['search_engine']}")
+                st.markdown(f"**Tipo:** {result['type']}")
+                st.markdown(f"**Descrição:** {result['description']}")
             
-            # Add disclaimer and citation information
-            if result.get('is_mock_data', True):
-                st.markdown("**⚠️ AVISO:** *Dados simulados para demonstração. Para informações reais, é necessário integrar com APIs de busca oficiais.*", 
-                           help="Esta aplicação atualmente utiliza dados simulados para demonstrar funcionalidades. Dados reais requerem integração com APIs de motores de busca.")
-            else:
-                if result.get('citation'):
-                    st.markdown(f"**📖 Fonte:** {result['citation']}")
-                st.markdown("**ℹ️ Nota:** *Dados obtidos via busca web - sempre verifique informações diretamente na fonte oficial.*")
+                # Add disclaimer and citation information
+                if result.get('is_mock_data', True):
+                    st.markdown("**⚠️ AVISO:** *Dados simulados para demonstração. Para informações reais, é necessário integrar com APIs de busca oficiais.*", 
+                               help="Esta aplicação atualmente utiliza dados simulados para demonstrar funcionalidades. Dados reais requerem integração com APIs de motores de busca.")
+                else:
+                    if result.get('citation'):
+                        st.markdown(f"**📖 Fonte:** {result['citation']}")
+                    st.markdown("**ℹ️ Nota:** *Dados obtidos via busca web - sempre verifique informações diretamente na fonte oficial.*")
             
-            # Deadline and location info
-            col1, col2 = st.columns([1, 1])
-            with col1:
-                if result.get('deadline'):
-                    deadline_str = result['deadline'].strftime("%d/%m/%Y")
-                    days_left = (result['deadline'] - datetime.now()).days
-                    if days_left > 0:
-                        st.markdown(f"**Prazo:** {deadline_str} ({days_left} dias)")
-                    else:
-                        st.markdown(f"**Prazo:** {deadline_str} (Expirado)")
-            with col2:
-                if result.get('location'):
-                    st.markdown(f"**Localização:** {result['location']}")
+                # Deadline and location info
+                col1, col2 = st.columns([1, 1])
+                with col1:
+                    if result.get('deadline'):
+                        deadline_str = result['deadline'].strftime("%d/%m/%Y")
+                        days_left = (result['deadline'] - datetime.now()).days
+                        if days_left > 0:
+                            st.markdown(f"**Prazo:** {deadline_str} ({days_left} dias)")
+                        else:
+                            st.markdown(f"**Prazo:** {deadline_str} (Expirado)")
+                with col2:
+                    if result.get('location'):
+                        st.markdown(f"**Localização:** {result['location']}")
             
-            # Action buttons
-            btn_col1, btn_col2, btn_col3 = st.columns([1, 1, 1])
-            with btn_col1:
-                if st.button("🔗 Ver Detalhes", key=f"details_{i}"):
-                    url = result.get('url', 'URL não disponível')
-                    if url.startswith('https://example.com'):
-                        st.error("⚠️ AVISO: Esta é uma URL de exemplo (dados simulados). Para obter links reais, é necessário integrar com APIs de busca reais.")
-                    else:
-                        st.info(f"Redirecionando para: {url}")
-            with btn_col2:
-                if st.button("💾 Salvar", key=f"save_{i}"):
-                    if db_manager.save_opportunity(result, st.session_state.user_session):
-                        st.success("Oportunidade salva!")
-                    else:
-                        st.info("Oportunidade já foi salva anteriormente.")
-            with btn_col3:
-                if st.button("📤 Compartilhar", key=f"share_{i}"):
-                    st.info("Link copiado para a área de transferência!")
+                # Action buttons
+                btn_col1, btn_col2, btn_col3 = st.columns([1, 1, 1])
+                with btn_col1:
+                    if st.button("🔗 Ver Detalhes", key=f"details_{i}"):
+                        url = result.get('url', 'URL não disponível')
+                        if url.startswith('https://example.com'):
+                            st.error("⚠️ AVISO: Esta é uma URL de exemplo (dados simulados). Para obter links reais, é necessário integrar com APIs de busca reais.")
+                        else:
+                            st.info(f"Redirecionando para: {url}")
+                with btn_col2:
+                    if st.button("💾 Salvar", key=f"save_{i}"):
+                        if db_manager.save_opportunity(result, st.session_state.user_session):
+                            st.success("Oportunidade salva!")
+                        else:
+                            st.info("Oportunidade já foi salva anteriormente.")
+                with btn_col3:
+                    if st.button("📤 Compartilhar", key=f"share_{i}"):
+                        st.info("Link copiado para a área de transferência!")
             
-            st.markdown('</div>', unsafe_allow_html=True)
-            st.markdown("---")
+                st.markdown('</div>', unsafe_allow_html=True)
+                st.markdown("---")
 
 # Search history and saved searches
 st.markdown("---")
 
 tab1, tab2, tab3 = st.tabs(["📚 Histórico de Buscas", "💾 Buscas Salvas", "📊 Estatísticas"])
 
+wait_pending_writes()
+
 with tab1:
     st.subheader("Histórico de Buscas")
     search_history = db_manager.get_search_history(st.session_state.user_session)
@@ -330,9 +561,75 @@ with tab1:
 
 with tab2:
     st.subheader("Oportunidades Salvas")
+    
+    # Deadline reminders fired by the background scheduler (reminders.py)
+    reminders = db_manager.get_pending_reminders(st.session_state.user_session)
+    if reminders:
+        for reminder in reminders:
+            days_left = max((reminder['deadline'] - datetime.utcnow()).days, 0)
+            st.warning(
+                f"⏰ **{reminder['title']}** encerra em {reminder['deadline'].strftime('%d/%m/%Y')} "
+                f"({'hoje' if days_left == 0 else f'faltam {days_left} dia(s)'})"
+            )
+        if st.button("✔️ Marcar lembretes como lidos", key="dismiss_reminders"):
+            db_manager.mark_reminders_delivered([reminder['id'] for reminder in reminders])
+            st.rerun()
+    
     saved_opportunities = db_manager.get_saved_opportunities(st.session_state.user_session)
     
     if saved_opportunities:
+        saved_index = DeadlineIndex(saved_opportunities)
+        saved_view = st.radio(
+            "Mostrar:",
+            ["Todas", "Ainda abertas", "Encerram esta semana"],
+            horizontal=True,
+            key="saved_deadline_view"
+        )
+        if saved_view == "Ainda abertas":
+            saved_opportunities = saved_index.still_open()
+        elif saved_view == "Encerram esta semana":
+            saved_opportunities = saved_index.closing_this_week()
+
+        # Export streams rows from the database into a temp file on disk and
+        # stops at EXPORT_MAX_BYTES, since the download itself is served from memory
+        export_col1, export_col2 = st.columns([2, 1])
+        with export_col1:
+            export_format = st.selectbox(
+                "Exportar como:",
+                list(EXPORT_FORMATS.keys()),
+                format_func=lambda fmt: EXPORT_FORMATS[fmt]['label'],
+                key="saved_export_format"
+            )
+        with export_col2:
+            st.write("")
+            prepare_export = st.button("📤 Preparar exportação", key="saved_export_prepare")
+        if prepare_export:
+            export_data = None
+            with tempfile.TemporaryFile() as export_file:
+                try:
+                    write_export(
+                        export_format,
+                        db_manager.iter_saved_opportunities(st.session_state.user_session),
+                        export_file,
+                        max_bytes=EXPORT_MAX_BYTES
+                    )
+                    export_file.seek(0)
+                    export_data = export_file.read()
+                except ValueError:
+                    st.warning(f"A exportação passou de {EXPORT_MAX_BYTES // (1024 * 1024)} MB. "
+                               "Remova algumas oportunidades salvas ou exporte apenas os prazos (iCalendar).")
+            if export_data is not None:
+                st.download_button(
+                    "⬇️ Baixar arquivo",
+                    data=export_data,
+                    file_name=f"oportunidades_salvas.{EXPORT_FORMATS[export_format]['extension']}",
+                    mime=EXPORT_FORMATS[export_format]['mime'],
+                    key="saved_export_download"
+                )
+
+        if not saved_opportunities:
+            st.info("Nenhuma oportunidade salva neste período.")
+        
         for saved in saved_opportunities:
             with st.expander(f"{saved['title']} - {saved['type']}"):
                 st.write(f"**Descrição:** {saved['description']}")
@@ -377,6 +674,34 @@ with tab3:
                 st.write(f"• {search.query} - {search.timestamp.strftime('%d/%m/%Y %H:%M')}")
     else:
         st.info("Estatísticas não disponíveis no momento.")
+    
+    engine_summaries = search_manager.engine_stats().summaries()
+    if engine_summaries:
+        st.subheader("Desempenho das Plataformas")
+        st.caption("Janela móvel das últimas chamadas nesta instância" +
+                   (" (busca real)" if search_manager.use_real_data else " (dados simulados)"))
+        st.dataframe(
+            pd.DataFrame([{
+                "Plataforma": engine,
+                "Chamadas": summary['calls'],
+                "p50 (ms)": summary['p50_ms'],
+                "p95 (ms)": summary['p95_ms'],
+                "Taxa de erro": summary['error_rate'],
+                "Elegíveis/chamada": summary['eligible_per_call'],
+                "Sobreposição": summary['overlap_rate'],
+                "Rendimento/ms": summary['yield_per_ms']
+            } for engine, summary in engine_summaries.items()]),
+            column_config={
+                "p50 (ms)": st.column_config.NumberColumn(format="%.0f"),
+                "p95 (ms)": st.column_config.NumberColumn(format="%.0f"),
+                "Taxa de erro": st.column_config.NumberColumn(format="%.2f"),
+                "Elegíveis/chamada": st.column_config.NumberColumn(format="%.1f"),
+                "Sobreposição": st.column_config.NumberColumn(format="%.2f"),
+                "Rendimento/ms": st.column_config.NumberColumn(format="%.4f")
+            },
+            hide_index=True,
+            use_container_width=True
+        )
 
 
 
@@ -0,0 +1,696 @@
+import asyncio
+import threading
+from datetime import date, datetime
+
+from sqlalchemy import select, delete, func, update, text, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+
+try:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+except ImportError:  # SQLAlchemy without the asyncio extension
+    create_async_engine = async_sessionmaker = None
+
+from database import (
+    DATABASE_URL, Base, apply_sqlite_pragmas, is_sqlite_url, SearchHistory, SearchHistoryDaily, Opportunity,
+    SavedSearch, UserPreferences, SeenResult, ReminderOutbox, EngineUsage, TrendingScore, OPPORTUNITY_FIELDS,
+    opportunity_fingerprint, opportunity_to_dict, cache_user_preferences, preferences_to_dict, mark_seen_statement,
+    enqueue_reminders_statement, reminder_to_dict, claimable_reminders, upsert_opportunity_statement,
+    save_reference_statement
+)
+from catalog_search import CatalogSearchIndex
+
+# Sync driver -> asyncio driver
+ASYNC_DRIVERS = {
+    'postgres': 'postgresql+asyncpg',
+    'postgresql': 'postgresql+asyncpg',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite'
+}
+
+
+def to_async_url(url):
+    """Rewrite a sync database URL for the matching asyncio driver"""
+    url = make_url(url.replace('postgres://', 'postgresql://', 1) if url.startswith('postgres://') else url)
+    drivername = ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    query = dict(url.query)
+    if drivername == 'postgresql+asyncpg' and 'sslmode' in query:
+        # asyncpg spells libpq's sslmode as ssl
+        query['ssl'] = query.pop('sslmode')
+    return url.set(drivername=drivername, query=query)
+
+
+def _engine_options(url):
+    if url.get_backend_name() == 'postgresql':
+        return {
+            'pool_pre_ping': True,
+            'pool_recycle': 3600,
+            'pool_size': 5,
+            'max_overflow': 10,
+            'connect_args': {'server_settings': {'timezone': 'utc'}}
+        }
+    return {}
+
+
+class AsyncDatabaseManager:
+    """asyncio twin of DatabaseManager (same methods, awaitable)
+
+    Uses asyncpg for Postgres and aiosqlite for SQLite. Call `await initialize()`
+    once before use; schema migrations stay with the sync DatabaseManager.
+    """
+
+    def __init__(self, database_url=None):
+        self.db_available = False
+        self.engine = None
+        self.SessionLocal = None
+        database_url = database_url or DATABASE_URL
+        if create_async_engine is None or not database_url:
+            return
+        try:
+            url = to_async_url(database_url)
+            self.engine = create_async_engine(url, **_engine_options(url))
+        except (ImportError, SQLAlchemyError) as e:
+            print(f"Async database driver unavailable: {e}")
+            return
+        if is_sqlite_url(database_url):
+            event.listen(self.engine.sync_engine, 'connect', apply_sqlite_pragmas)
+        self.SessionLocal = async_sessionmaker(self.engine, expire_on_commit=False, autoflush=False)
+        self.catalog_index = CatalogSearchIndex(self.engine)
+
+    async def initialize(self):
+        """Check the connection and make sure tables and the search index exist"""
+        if self.engine is None:
+            return False
+        try:
+            async with self.engine.begin() as conn:
+                await conn.execute(text("SELECT 1"))
+                await conn.run_sync(Base.metadata.create_all)
+                self.catalog_index.backend = await conn.run_sync(self.catalog_index.create_index)
+            self.db_available = True
+        except (SQLAlchemyError, OSError) as e:
+            print(f"Async database initialization failed: {e}")
+            self.db_available = False
+        return self.db_available
+
+    async def close(self):
+        if self.engine is not None:
+            await self.engine.dispose()
+
+    async def save_search_history(self, query, engines, results_count, user_session, keywords=None):
+        """Save search to history"""
+        if not self.db_available:
+            return False
+        async with self.SessionLocal() as session:
+            try:
+                session.add(SearchHistory(
+                    query=query,
+                    engines=engines,
+                    keywords=keywords,
+                    results_count=results_count,
+                    user_session=user_session
+                ))
+                await session.commit()
+                return True
+            except SQLAlchemyError as e:
+                await session.rollback()
+                print(f"Error saving search history: {e}")
+                return False
+
+    async def get_search_history(self, user_session, limit=10):
+        """Get search history for user"""
+        if not self.db_available:
+            return []
+        async with self.SessionLocal() as session:
+            try:
+                history = (await session.execute(
+                    select(SearchHistory)
+                    .where(SearchHistory.user_session == user_session)
+                    .order_by(SearchHistory.timestamp.desc())
+                    .limit(limit)
+                )).scalars().all()
+                return [{
+                    'id': h.id,
+                    'query': h.query,
+                    'engines': h.engines,
+                    'results_count': h.results_count,
+                    'timestamp': h.timestamp.strftime("%d/%m/%Y %H:%M")
+                } for h in history]
+            except SQLAlchemyError as e:
+                print(f"Error getting search history: {e}")
+                return []
+
+    async def get_frequent_searches(self, since, limit=10, max_rows=5000):
+        """Most repeated (query, keywords, engines) combinations since a datetime"""
+        if not self.db_available:
+            return []
+        async with self.SessionLocal() as session:
+            try:
+                # JSON columns can't be grouped portably, so count the recent rows here
+                rows = (await session.execute(
+                    select(SearchHistory.query, SearchHistory.keywords, SearchHistory.engines)
+                    .where(SearchHistory.timestamp >= since)
+                    .order_by(SearchHistory.timestamp.desc())
+                    .limit(max_rows)
+                )).all()
+                counts = {}
+                for query, keywords, engines in rows:
+                    key = (query, tuple(keywords or []), tuple(sorted(engines or [])))
+                    counts[key] = counts.get(key, 0) + 1
+                ranked = sorted(counts.items(), key=lambda item: -item[1])[:limit]
+                return [{
+                    'query': query,
+                    'keywords': list(keywords),
+                    'engines': list(engines),
+                    'searches': count
+                } for (query, keywords, engines), count in ranked]
+            except SQLAlchemyError as e:
+                print(f"Error getting frequent searches: {e}")
+                return []
+
+    async def _upsert_opportunity(self, session, opportunity_data):
+        return (await session.execute(
+            upsert_opportunity_statement(self.engine.dialect.name, opportunity_data)
+        )).scalar_one()
+
+    async def upsert_opportunity(self, opportunity_data):
+        """Add an opportunity to the catalog (or refresh it) and return its id"""
+        ids = await self.upsert_opportunities([opportunity_data])
+        return ids[0] if ids else None
+
+    async def upsert_opportunities(self, results):
+        """Add a batch of search results to the catalog; returns their catalog ids"""
+        if not self.db_available or not results:
+            return []
+        async with self.SessionLocal() as session:
+            try:
+                ids = {}
+                for result in results:
+                    fingerprint = opportunity_fingerprint(result)
+                    if fingerprint not in ids:
+                        ids[fingerprint] = await self._upsert_opportunity(session, result)
+                await session.commit()
+                return [ids[opportunity_fingerprint(result)] for result in results]
+            except SQLAlchemyError as e:
+                await session.rollback()
+                print(f"Error saving catalog opportunities: {e}")
+                return []
+
+    async def update_opportunity(self, opportunity_id, **fields):
+        """Update catalog fields (e.g. deadline, url) for every user that saved it"""
+        if not self.db_available:
+            return False
+        updates = {field: value for field, value in fields.items() if field in OPPORTUNITY_FIELDS}
+        if not updates:
+            return False
+        updates['updated_at'] = datetime.utcnow()
+        async with self.SessionLocal() as session:
+            try:
+                result = await session.execute(
+                    update(Opportunity).where(Opportunity.id == opportunity_id).values(**updates)
+                )
+                await session.commit()
+                return result.rowcount > 0
+            except SQLAlchemyError as e:
+                await session.rollback()
+                print(f"Error updating opportunity: {e}")
+                return False
+
+    async def save_opportunity(self, opportunity_data, user_session):
+        """Save opportunity to saved searches"""
+        if not self.db_available:
+            return False
+        async with self.SessionLocal() as session:
+            try:
+                opportunity_id = await self._upsert_opportunity(session, opportunity_data)
+                added = (await session.execute(
+                    save_reference_statement(self.engine.dialect.name, user_session, opportunity_id)
+                )).rowcount
+                await session.commit()
+                return added > 0
+            except SQLAlchemyError as e:
+                await session.rollback()
+                print(f"Error saving opportunity: {e}")
+                return False
+
+    async def get_saved_opportunities(self, user_session):
+        """Get saved opportunities for user"""
+        if not self.db_available:
+            return []
+        async with self.SessionLocal() as session:
+            try:
+                rows = (await session.execute(
+                    select(SavedSearch, Opportunity)
+                    .join(Opportunity, SavedSearch.opportunity_id == Opportunity.id)
+                    .where(SavedSearch.user_session == user_session)
+                    .order_by(SavedSearch.saved_at.desc())
+                )).all()
+                return [dict(opportunity_to_dict(o), id=s.id, saved_at=s.saved_at) for s, o in rows]
+            except SQLAlchemyError as e:
+                print(f"Error getting saved opportunities: {e}")
+                return []
+
+    async def iter_saved_opportunities(self, user_session, batch_size=500):
+        """Stream saved opportunities from a server-side cursor, batch_size rows at a time"""
+        if not self.db_available:
+            return
+        async with self.SessionLocal() as session:
+            try:
+                columns = [getattr(Opportunity, field) for field in OPPORTUNITY_FIELDS]
+                rows = await session.stream(
+                    select(SavedSearch.id, SavedSearch.saved_at, Opportunity.id, Opportunity.fingerprint, *columns)
+                    .join(Opportunity, SavedSearch.opportunity_id == Opportunity.id)
+                    .where(SavedSearch.user_session == user_session)
+                    .order_by(SavedSearch.saved_at.desc())
+                    .execution_options(yield_per=batch_size)
+                )
+                async for saved_id, saved_at, opportunity_id, fingerprint, *values in rows:
+                    yield dict(zip(OPPORTUNITY_FIELDS, values), id=saved_id, opportunity_id=opportunity_id,
+                               fingerprint=fingerprint, saved_at=saved_at)
+            except SQLAlchemyError as e:
+                print(f"Error streaming saved opportunities: {e}")
+
+    async def remove_saved_opportunity(self, opportunity_id, user_session):
+        """Remove saved opportunity"""
+        if not self.db_available:
+            return False
+        async with self.SessionLocal() as session:
+            try:
+                result = await session.execute(
+                    delete(SavedSearch)
+                    .where(SavedSearch.id == opportunity_id)
+                    .where(SavedSearch.user_session == user_session)
+                )
+                await session.commit()
+                return result.rowcount > 0
+            except SQLAlchemyError as e:
+                await session.rollback()
+                print(f"Error removing saved opportunity: {e}")
+                return False
+
+    async def save_user_preferences(self, user_session, custom_keywords=None, preferred_engines=None, default_filters=None):
+        """Save or update user preferences"""
+        if not self.db_available:
+            return False
+        async with self.SessionLocal() as session:
+            try:
+                prefs = (await session.execute(
+                    select(UserPreferences).where(UserPreferences.user_session == user_session)
+                )).scalars().first()
+                if prefs:
+                    if custom_keywords is not None:
+                        prefs.custom_keywords = custom_keywords
+                    if preferred_engines is not None:
+                        prefs.preferred_engines = preferred_engines
+                    if default_filters is not None:
+                        prefs.default_filters = default_filters
+                    prefs.updated_at = datetime.utcnow()
+                else:
+                    prefs = UserPreferences(
+                        user_session=user_session,
+                        custom_keywords=custom_keywords,
+                        preferred_engines=preferred_engines,
+                        default_filters=default_filters,
+                        updated_at=datetime.utcnow()
+                    )
+                    session.add(prefs)
+                saved, updated_at = preferences_to_dict(prefs), prefs.updated_at
+                await session.commit()
+                cache_user_preferences(user_session, saved, updated_at)
+                return True
+            except SQLAlchemyError as e:
+                await session.rollback()
+                print(f"Error saving user preferences: {e}")
+                return False
+
+    async def get_user_preferences(self, user_session):
+        """Get user preferences"""
+        if not self.db_available:
+            return None
+        async with self.SessionLocal() as session:
+            try:
+                prefs = (await session.execute(
+                    select(UserPreferences).where(UserPreferences.user_session == user_session)
+                )).scalars().first()
+                return preferences_to_dict(prefs) if prefs else None
+            except SQLAlchemyError as e:
+                print(f"Error getting user preferences: {e}")
+                return None
+
+    async def iter_user_preferences(self, user_sessions=None, batch_size=500):
+        """Stream (user_session, preferences) for the given sessions, or every user"""
+        if not self.db_available:
+            return
+        async with self.SessionLocal() as session:
+            try:
+                statement = select(UserPreferences.user_session, UserPreferences.custom_keywords,
+                                   UserPreferences.preferred_engines, UserPreferences.default_filters)
+                if user_sessions:
+                    statement = statement.where(UserPreferences.user_session.in_(list(user_sessions)))
+                rows = await session.stream(
+                    statement.order_by(UserPreferences.id).execution_options(yield_per=batch_size)
+                )
+                async for user_session, custom_keywords, preferred_engines, default_filters in rows:
+                    yield user_session, {
+                        'custom_keywords': custom_keywords,
+                        'preferred_engines': preferred_engines,
+                        'default_filters': default_filters
+                    }
+            except SQLAlchemyError as e:
+                print(f"Error streaming user preferences: {e}")
+
+    async def clear_search_history(self, user_session):
+        """Clear search history for user"""
+        if not self.db_available:
+            return False
+        async with self.SessionLocal() as session:
+            try:
+                await session.execute(delete(SearchHistory).where(SearchHistory.user_session == user_session))
+                await session.execute(
+                    text("DELETE FROM search_history_archive WHERE user_session = :user_session"),
+                    {'user_session': user_session}
+                )
+                await session.execute(delete(SeenResult).where(SeenResult.user_session == user_session))
+                await session.commit()
+                return True
+            except SQLAlchemyError as e:
+                await session.rollback()
+                print(f"Error clearing search history: {e}")
+                return False
+
+    async def get_seen_fingerprints(self, user_session, fingerprints, chunk_size=500):
+        """Return the subset of fingerprints this user has already been shown"""
+        if not self.db_available:
+            return set()
+        fingerprints = list(set(fingerprints))
+        async with self.SessionLocal() as session:
+            try:
+                seen = set()
+                for start in range(0, len(fingerprints), chunk_size):
+                    seen.update((await session.execute(
+                        select(SeenResult.fingerprint)
+                        .where(SeenResult.user_session == user_session)
+                        .where(SeenResult.fingerprint.in_(fingerprints[start:start + chunk_size]))
+                    )).scalars())
+                return seen
+            except SQLAlchemyError as e:
+                print(f"Error getting seen results: {e}")
+                return set()
+
+    async def mark_results_seen(self, user_session, fingerprints, chunk_size=500):
+        """Record that the user was shown these results"""
+        if not self.db_available:
+            return False
+        fingerprints = list(set(fingerprints))
+        now = datetime.utcnow()
+        async with self.SessionLocal() as session:
+            try:
+                for start in range(0, len(fingerprints), chunk_size):
+                    await session.execute(mark_seen_statement(
+                        self.engine.dialect.name, user_session, fingerprints[start:start + chunk_size], now
+                    ))
+                await session.commit()
+                return True
+            except SQLAlchemyError as e:
+                await session.rollback()
+                print(f"Error marking results as seen: {e}")
+                return False
+
+    async def record_engine_usage(self, engine, requests=1, day=None, daily_limit=None):
+        """Add upstream requests to the engine's current daily and monthly windows (see DatabaseManager)"""
+        if not self.db_available:
+            return False
+        day = day or datetime.utcnow().date()
+        windows = [('day', day), ('month', date(day.year, day.month, 1))]
+        async with self.SessionLocal() as session:
+            try:
+                for attempt in range(2):
+                    try:
+                        for window, period_start in windows:
+                            limited = daily_limit is not None and window == 'day'
+                            current = [EngineUsage.engine == engine, EngineUsage.period == window,
+                                       EngineUsage.period_start == period_start]
+                            within = current + [EngineUsage.requests + requests <= daily_limit] if limited else current
+                            updated = (await session.execute(
+                                update(EngineUsage)
+                                .where(*within)
+                                .values(requests=EngineUsage.requests + requests, updated_at=datetime.utcnow())
+                            )).rowcount
+                            if not updated:
+                                if limited and (requests > daily_limit or (await session.execute(
+                                        select(EngineUsage.id).where(*current))).first() is not None):
+                                    await session.rollback()
+                                    return False
+                                session.add(EngineUsage(engine=engine, period=window,
+                                                        period_start=period_start, requests=requests))
+                        await session.commit()
+                        return True
+                    except IntegrityError:
+                        # Another process created the window row first; retry as an update
+                        await session.rollback()
+                return False
+            except SQLAlchemyError as e:
+                await session.rollback()
+                print(f"Error recording engine usage: {e}")
+                return False
+
+    async def get_engine_usage(self, day=None):
+        """Return {engine: {'day': requests, 'month': requests}} for the current windows"""
+        if not self.db_available:
+            return {}
+        day = day or datetime.utcnow().date()
+        async with self.SessionLocal() as session:
+            try:
+                rows = (await session.execute(
+                    select(EngineUsage).where(
+                        ((EngineUsage.period == 'day') & (EngineUsage.period_start == day)) |
+                        ((EngineUsage.period == 'month') & (EngineUsage.period_start == date(day.year, day.month, 1)))
+                    )
+                )).scalars().all()
+                usage = {}
+                for row in rows:
+                    usage.setdefault(row.engine, {'day': 0, 'month': 0})[row.period] = row.requests or 0
+                return usage
+            except SQLAlchemyError as e:
+                print(f"Error getting engine usage: {e}")
+                return {}
+
+    async def get_trending_opportunities(self, limit=5):
+        """Read the precomputed top-N trending opportunities (see trending.py)"""
+        if not self.db_available:
+            return []
+        async with self.SessionLocal() as session:
+            try:
+                rows = (await session.execute(
+                    select(TrendingScore, Opportunity)
+                    .join(Opportunity, TrendingScore.opportunity_id == Opportunity.id)
+                    .where(TrendingScore.kind == 'opportunity')
+                    .order_by(TrendingScore.score.desc())
+                    .limit(limit)
+                )).all()
+                return [dict(opportunity_to_dict(o), trending_score=t.score, trending_events=t.events)
+                        for t, o in rows]
+            except SQLAlchemyError as e:
+                print(f"Error getting trending opportunities: {e}")
+                return []
+
+    async def get_trending_queries(self, limit=5):
+        """Read the precomputed top-N trending search queries"""
+        if not self.db_available:
+            return []
+        async with self.SessionLocal() as session:
+            try:
+                rows = (await session.execute(
+                    select(TrendingScore)
+                    .where(TrendingScore.kind == 'query')
+                    .order_by(TrendingScore.score.desc())
+                    .limit(limit)
+                )).scalars().all()
+                return [{'query': t.label, 'score': t.score, 'events': t.events} for t in rows]
+            except SQLAlchemyError as e:
+                print(f"Error getting trending queries: {e}")
+                return []
+
+    async def enqueue_reminders(self, reminders):
+        """Write fired reminders to the outbox, skipping ones already there; returns rows added"""
+        if not self.db_available or not reminders:
+            return 0
+        async with self.SessionLocal() as session:
+            try:
+                added = (await session.execute(
+                    enqueue_reminders_statement(self.engine.dialect.name, reminders)
+                )).rowcount
+                await session.commit()
+                return added
+            except SQLAlchemyError as e:
+                await session.rollback()
+                print(f"Error enqueuing reminders: {e}")
+                return 0
+
+    async def get_pending_reminders(self, user_session=None, limit=20):
+        """Undelivered reminders, closest deadline first; all users when user_session is None"""
+        if not self.db_available:
+            return []
+        async with self.SessionLocal() as session:
+            try:
+                statement = select(ReminderOutbox).where(ReminderOutbox.delivered_at.is_(None))
+                if user_session is not None:
+                    statement = statement.where(ReminderOutbox.user_session == user_session)
+                rows = (await session.execute(
+                    statement.order_by(ReminderOutbox.deadline, ReminderOutbox.id).limit(limit)
+                )).scalars().all()
+                return [reminder_to_dict(r) for r in rows]
+            except SQLAlchemyError as e:
+                print(f"Error getting pending reminders: {e}")
+                return []
+
+    async def claim_pending_reminders(self, claimed_by, limit=100, lease_seconds=600):
+        """Claim undelivered reminders for one delivery run; returns the rows this run now holds"""
+        if not self.db_available:
+            return []
+        async with self.SessionLocal() as session:
+            try:
+                now = datetime.utcnow()
+                ids = (await session.execute(
+                    select(ReminderOutbox.id)
+                    .where(claimable_reminders(now, lease_seconds))
+                    .order_by(ReminderOutbox.deadline, ReminderOutbox.id)
+                    .limit(limit)
+                    .with_for_update(skip_locked=True)
+                )).scalars().all()
+                if not ids:
+                    await session.rollback()
+                    return []
+                await session.execute(
+                    update(ReminderOutbox)
+                    .where(ReminderOutbox.id.in_(ids))
+                    .where(claimable_reminders(now, lease_seconds))
+                    .values(claimed_by=claimed_by, claimed_at=now)
+                )
+                await session.commit()
+                rows = (await session.execute(
+                    select(ReminderOutbox)
+                    .where(ReminderOutbox.claimed_by == claimed_by)
+                    .where(ReminderOutbox.delivered_at.is_(None))
+                    .order_by(ReminderOutbox.deadline, ReminderOutbox.id)
+                )).scalars().all()
+                return [reminder_to_dict(r) for r in rows]
+            except SQLAlchemyError as e:
+                await session.rollback()
+                print(f"Error claiming reminders: {e}")
+                return []
+
+    async def mark_reminders_delivered(self, reminder_ids):
+        """Take delivered reminders out of the outbox queue"""
+        if not self.db_available or not reminder_ids:
+            return False
+        async with self.SessionLocal() as session:
+            try:
+                await session.execute(
+                    update(ReminderOutbox)
+                    .where(ReminderOutbox.id.in_(list(reminder_ids)))
+                    .where(ReminderOutbox.delivered_at.is_(None))
+                    .values(delivered_at=datetime.utcnow())
+                )
+                await session.commit()
+                return True
+            except SQLAlchemyError as e:
+                await session.rollback()
+                print(f"Error marking reminders delivered: {e}")
+                return False
+
+    async def get_database_stats(self):
+        """Get database statistics"""
+        if not self.db_available:
+            return None
+        async with self.SessionLocal() as session:
+            try:
+                # The hot table stays small under the retention policy; older
+                # searches are counted from the daily rollups
+                hot_searches = await session.scalar(select(func.count()).select_from(SearchHistory))
+                archived_searches = await session.scalar(
+                    select(func.coalesce(func.sum(SearchHistoryDaily.searches), 0))
+                )
+                return {
+                    'total_searches': hot_searches + int(archived_searches),
+                    'total_saved_opportunities': await session.scalar(select(func.count()).select_from(SavedSearch)),
+                    'total_users': await session.scalar(select(func.count()).select_from(UserPreferences)),
+                    'recent_searches': (await session.execute(
+                        select(SearchHistory).order_by(SearchHistory.timestamp.desc()).limit(5)
+                    )).scalars().all()
+                }
+            except SQLAlchemyError as e:
+                print(f"Error getting database stats: {e}")
+                return None
+
+    async def search_catalog(self, query, filters=None, limit=20, cursor=None):
+        """Full-text search over already collected opportunities (see DatabaseManager.search_catalog)"""
+        empty = {'results': [], 'next_cursor': None}
+        if not self.db_available:
+            return empty
+        async with self.SessionLocal() as session:
+            try:
+                statement, params = self.catalog_index.build_statement(query, filters, limit, cursor)
+                rows = (await session.execute(statement, params)).mappings().all()
+                return self.catalog_index.build_page(rows, limit)
+            except SQLAlchemyError as e:
+                print(f"Error searching catalog: {e}")
+                return empty
+
+    async def get_opportunities_by_fingerprint(self, fingerprints, chunk_size=500):
+        """Catalog rows for the given fingerprints, as {fingerprint: result dict}"""
+        if not self.db_available:
+            return {}
+        fingerprints = list(set(fingerprints))
+        async with self.SessionLocal() as session:
+            try:
+                found = {}
+                for start in range(0, len(fingerprints), chunk_size):
+                    rows = (await session.execute(
+                        select(Opportunity).where(Opportunity.fingerprint.in_(fingerprints[start:start + chunk_size]))
+                    )).scalars().all()
+                    for opportunity in rows:
+                        found[opportunity.fingerprint] = dict(opportunity_to_dict(opportunity),
+                                                              fingerprint=opportunity.fingerprint)
+                return found
+            except SQLAlchemyError as e:
+                print(f"Error getting opportunities by fingerprint: {e}")
+                return {}
+
+
+class AsyncDatabaseRunner:
+    """Runs an AsyncDatabaseManager on a background event loop
+
+    Streamlit scripts are synchronous; submit() schedules a coroutine and
+    returns a concurrent.futures.Future, so DB work overlaps with engine I/O
+    and the script only blocks when it calls .result().
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="async-db", daemon=True)
+        self._thread.start()
+        self.available = self.submit(manager.initialize()).result()
+
+    def submit(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def call(self, method, *args, **kwargs):
+        """Schedule manager.<method>(*args, **kwargs) and return its future"""
+        return self.submit(getattr(self.manager, method)(*args, **kwargs))
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_async_db():
+    """Return the process-wide AsyncDatabaseRunner, or None when no async driver is usable"""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            manager = AsyncDatabaseManager()
+            # False marks "checked and unavailable" so we don't retry on every rerun
+            _runner = AsyncDatabaseRunner(manager) if manager.engine is not None else False
+        return _runner if _runner and _runner.available else None
@@ -0,0 +1,298 @@
+"""Run keyword sweeps headlessly (cron, workers) through the app's search pipeline
+
+Usage:
+  python batch_runner.py --sweeps sweeps.jsonl --output results.jsonl
+  python batch_runner.py --from-preferences --catalog            # every saved user profile
+  python batch_runner.py --keywords "edital cultural" --engines Google DuckDuckGo --output out.parquet
+
+A sweeps file holds one JSON object per line (or a JSON list) with "query",
+"keywords", "engines" and optional "filters" (FilterManager.apply_filters
+arguments; deadline_range is a pair of ISO dates, e.g. ["2026-01-01", "2026-03-31"]).
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+
+from database import DatabaseManager
+from exporters import EXPORT_FIELDS, iter_jsonl
+from filters import FilterManager, DEADLINE_FILTERS
+from quota import get_quota_scheduler
+from result_cache import normalize_terms
+from search_engines import SearchEngineManager
+
+DEFAULT_ENGINES = ["Google", "DuckDuckGo"]
+DEFAULT_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '2'))
+DEFAULT_ENGINE_CONCURRENCY = int(os.getenv('BATCH_ENGINE_CONCURRENCY', '2'))
+FILTER_OPTIONS = {
+    'include_tocantins', 'exclude_other_states', 'national_only',
+    'opportunity_types', 'deadline_filter', 'deadline_range'
+}
+BATCH_FIELDS = ['sweep', 'query', 'fingerprint'] + [field for field in EXPORT_FIELDS if field != 'saved_at']
+DATE_FIELDS = ('deadline', 'published_date')
+
+
+def sweep_key(sweep):
+    return (' '.join(sweep['query'].lower().split()), normalize_terms(sweep['keywords']),
+            tuple(sorted(sweep['engines'])), json.dumps(sweep['filters'], sort_keys=True, default=str))
+
+
+def _parse_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def parse_filters(filters):
+    """Validate sweep filters and convert JSON values to what FilterManager expects"""
+    filters = dict(filters or {})
+    unknown = sorted(set(filters) - FILTER_OPTIONS)
+    if unknown:
+        raise ValueError(f"unknown filter option(s): {', '.join(unknown)}")
+    deadline_filter = filters.get('deadline_filter', "Todos")
+    if deadline_filter not in DEADLINE_FILTERS:
+        raise ValueError(f"deadline_filter must be one of: {', '.join(DEADLINE_FILTERS)}")
+    if filters.get('deadline_range') is not None:
+        deadline_range = filters['deadline_range']
+        if not isinstance(deadline_range, (list, tuple)) or len(deadline_range) != 2:
+            raise ValueError("deadline_range must be a [start, end] pair of ISO dates")
+        filters['deadline_range'] = tuple(_parse_date(value) for value in deadline_range)
+    elif deadline_filter == "Intervalo personalizado":
+        raise ValueError("deadline_filter 'Intervalo personalizado' needs a deadline_range")
+    return filters
+
+
+def make_sweep(query=None, keywords=None, engines=None, filters=None):
+    """Raises ValueError on filters FilterManager would not understand"""
+    return {
+        'query': query or "",
+        'keywords': list(keywords or []),
+        'engines': list(engines or DEFAULT_ENGINES),
+        'filters': parse_filters(filters)
+    }
+
+
+def load_sweeps_file(path):
+    with open(path, encoding='utf-8') as f:
+        content = f.read().strip()
+    if content.startswith('['):
+        entries = json.loads(content)
+    else:
+        entries = [json.loads(line) for line in content.splitlines() if line.strip()]
+    sweeps = []
+    for number, entry in enumerate(entries, start=1):
+        try:
+            sweeps.append(make_sweep(entry.get('query'), entry.get('keywords'), entry.get('engines'),
+                                     entry.get('filters')))
+        except ValueError as e:
+            raise ValueError(f"{path}: sweep {number}: {e}") from e
+    return sweeps
+
+
+def load_preference_sweeps(db_manager, user_sessions, query, engines):
+    """One sweep per saved profile; users sharing a profile share the sweep
+
+    Saved profiles can name engines the batch runner lacks (the app also
+    offers Yandex) or carry invalid filters; those are reported and left
+    out rather than stopping the other users' sweeps.
+    """
+    sweeps = []
+    for user_session, prefs in db_manager.iter_user_preferences(user_sessions or None):
+        if not (prefs['custom_keywords'] or prefs['preferred_engines']):
+            continue
+        preferred = prefs['preferred_engines'] or []
+        unknown = unknown_engines([{'engines': preferred}], engines)
+        if unknown:
+            print(f"Ignoring engine(s) {', '.join(unknown)} for {user_session}", file=sys.stderr)
+        try:
+            sweeps.append(make_sweep(query, prefs['custom_keywords'],
+                                     [engine for engine in preferred if engine not in unknown],
+                                     prefs['default_filters']))
+        except ValueError as e:
+            print(f"Skipping preferences of {user_session}: {e}", file=sys.stderr)
+    return sweeps
+
+
+def unknown_engines(sweeps, engines):
+    """Engine names used by the sweeps that the search manager does not have"""
+    return sorted({engine for sweep in sweeps for engine in sweep['engines']} - set(engines))
+
+
+def dedupe_sweeps(sweeps):
+    unique = {}
+    for sweep in sweeps:
+        unique.setdefault(sweep_key(sweep), sweep)
+    return list(unique.values())
+
+
+class BatchRunner:
+    """Runs sweeps concurrently on one shared SearchEngineManager"""
+
+    def __init__(self, search_manager, filter_manager, concurrency=DEFAULT_CONCURRENCY, apply_filters=True):
+        self.search_manager = search_manager
+        self.filter_manager = filter_manager
+        self.concurrency = max(concurrency, 1)
+        self.apply_filters = apply_filters
+
+    def run_sweep(self, sweep):
+        unknown = unknown_engines([sweep], self.search_manager.mock_generators)
+        if unknown:
+            raise ValueError(f"unknown engine(s): {', '.join(unknown)}")
+        results, fingerprints = [], set()
+        for _, batch in self.search_manager.iter_engine_batches(sweep['engines'], sweep['query'], sweep['keywords']):
+            for result in batch:
+                if result['fingerprint'] not in fingerprints:
+                    fingerprints.add(result['fingerprint'])
+                    results.append(result)
+        if self.apply_filters:
+            results = self.filter_manager.apply_filters(results, **sweep['filters'])
+        return results
+
+    def run(self, sweeps):
+        """Yield (index, sweep, results or None, error) as sweeps finish"""
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {executor.submit(self.run_sweep, sweep): (index, sweep) for index, sweep in enumerate(sweeps)}
+            for future in as_completed(futures):
+                index, sweep = futures[future]
+                try:
+                    yield index, sweep, future.result(), None
+                except Exception as e:
+                    yield index, sweep, None, e
+
+
+class ParquetSink:
+    """Collects rows and writes one Parquet file at close (needs pyarrow or fastparquet)"""
+
+    def __init__(self, path):
+        if not any(importlib.util.find_spec(engine) for engine in ('pyarrow', 'fastparquet')):
+            raise ValueError("Parquet output needs pyarrow or fastparquet installed")
+        import pandas as pd
+        self.pd = pd
+        self.path = path
+        self.rows = []
+
+    def write(self, rows):
+        self.rows.extend({field: row.get(field) for field in BATCH_FIELDS} for row in rows)
+
+    def close(self):
+        frame = self.pd.DataFrame(self.rows, columns=BATCH_FIELDS)
+        for field in DATE_FIELDS:
+            frame[field] = self.pd.to_datetime(frame[field], errors='coerce')
+        frame.to_parquet(self.path, index=False)
+
+
+class JsonlSink:
+    """Appends rows as they arrive, so a long sweep can be followed with tail -f"""
+
+    def __init__(self, path):
+        self.file = sys.stdout if path == '-' else open(path, 'w', encoding='utf-8')
+
+    def write(self, rows):
+        for line in iter_jsonl(rows, BATCH_FIELDS):
+            self.file.write(line)
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+def open_sink(path, fmt=None):
+    fmt = fmt or ('parquet' if path.endswith('.parquet') else 'jsonl')
+    return ParquetSink(path) if fmt == 'parquet' else JsonlSink(path)
+
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = arg_parser.add_argument_group("sweeps")
+    source.add_argument('--sweeps', help="JSON/JSONL file with the sweeps to run")
+    source.add_argument('--from-preferences', nargs='*', metavar='SESSION',
+                        help="Build sweeps from user_preferences (all users when no session is given)")
+    source.add_argument('--query', default="", help="Base query for --keywords and --from-preferences sweeps")
+    source.add_argument('--keywords', nargs='+', help="Run one sweep with these keywords")
+    source.add_argument('--engines', nargs='+', help=f"Engines for --keywords (default: {' '.join(DEFAULT_ENGINES)})")
+
+    output = arg_parser.add_argument_group("output")
+    output.add_argument('--output', help="JSONL ('-' for stdout) or .parquet file")
+    output.add_argument('--format', choices=['jsonl', 'parquet'], help="Override the format picked from --output")
+    output.add_argument('--catalog', action='store_true', help="Upsert real results into the opportunities catalog")
+
+    run = arg_parser.add_argument_group("execution")
+    run.add_argument('--mock', action='store_true', help="Use mock data instead of the real engines")
+    run.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="Sweeps running at once")
+    run.add_argument('--engine-concurrency', type=int, default=DEFAULT_ENGINE_CONCURRENCY,
+                     help="Uncached searches running at once per engine (0: no cap)")
+    run.add_argument('--no-filters', action='store_true', help="Keep results the filters would drop")
+    return arg_parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not (args.output or args.catalog):
+        print("Nothing to write: pass --output and/or --catalog", file=sys.stderr)
+        return 1
+
+    db_manager = DatabaseManager()
+    search_manager = SearchEngineManager()
+    engines = list(search_manager.mock_generators)
+    sweeps = []
+    try:
+        if args.sweeps:
+            sweeps.extend(load_sweeps_file(args.sweeps))
+        if args.keywords:
+            sweeps.append(make_sweep(args.query, args.keywords, args.engines))
+    except (ValueError, OSError) as e:
+        print(f"Error loading sweeps: {e}", file=sys.stderr)
+        return 1
+    unknown = unknown_engines(sweeps, engines)
+    if unknown:
+        print(f"Unknown engine(s): {', '.join(unknown)} (available: {', '.join(engines)})", file=sys.stderr)
+        return 1
+    if args.from_preferences is not None:
+        sweeps.extend(load_preference_sweeps(db_manager, args.from_preferences, args.query, engines))
+    sweeps = dedupe_sweeps(sweeps)
+    if not sweeps:
+        print("No sweeps to run", file=sys.stderr)
+        return 1
+
+    search_manager.use_real_data = not args.mock
+    search_manager.quota = get_quota_scheduler(db_manager)
+    search_manager.limit_engine_concurrency(args.engine_concurrency)
+    runner = BatchRunner(search_manager, FilterManager(), args.concurrency, apply_filters=not args.no_filters)
+
+    try:
+        sink = open_sink(args.output, args.format) if args.output else None
+    except (ValueError, OSError) as e:
+        print(f"Error opening output: {e}", file=sys.stderr)
+        return 1
+    started = time.monotonic()
+    total, failed = 0, 0
+    try:
+        for index, sweep, results, error in runner.run(sweeps):
+            label = sweep['query'] or ', '.join(sweep['keywords'][:3]) or "busca geral"
+            if error is not None:
+                failed += 1
+                print(f"[{index + 1}/{len(sweeps)}] {label}: error: {error}", file=sys.stderr)
+                continue
+            for result in results:
+                result['sweep'] = index
+                result['query'] = sweep['query']
+            if sink:
+                sink.write(results)
+            if args.catalog:
+                db_manager.upsert_opportunities([result for result in results if result.get('is_real_data')])
+            total += len(results)
+            print(f"[{index + 1}/{len(sweeps)}] {label}: {len(results)} results", file=sys.stderr)
+    finally:
+        if sink:
+            sink.close()
+
+    print(f"{len(sweeps)} sweeps, {total} results, {failed} failed in {time.monotonic() - started:.1f}s",
+          file=sys.stderr)
+    return 1 if failed == len(sweeps) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
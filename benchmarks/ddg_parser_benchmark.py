@@ -0,0 +1,61 @@
+"""Benchmark the DuckDuckGo HTML parser backends on saved result pages
+
+Usage: python benchmarks/ddg_parser_benchmark.py [--runs 200] [--limit 5]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_parser import PARSER_BACKENDS
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_fixtures():
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, 'ddg_*.html'))):
+        with open(path, 'rb') as f:
+            fixtures[os.path.basename(path)] = f.read()
+    return fixtures
+
+
+def bench(parser, html, runs, limit):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        parser.parse_results(html, limit=limit)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--runs', type=int, default=200)
+    arg_parser.add_argument('--limit', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    fixtures = load_fixtures()
+    if not fixtures:
+        print(f"No fixtures found in {FIXTURES_DIR}")
+        return 1
+
+    for name, html in fixtures.items():
+        print(f"{name} ({len(html) / 1024:.1f} KiB, limit={args.limit})")
+        for backend in PARSER_BACKENDS:
+            if not backend.available():
+                print(f"  {backend.name:<12} not installed")
+                continue
+            parser = backend()
+            found = len(parser.parse_results(html, limit=args.limit))
+            p50, p95 = bench(parser, html, args.runs, args.limit)
+            print(f"  {backend.name:<12} p50 {p50 * 1000:7.3f} ms  p95 {p95 * 1000:7.3f} ms  ({found} results)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
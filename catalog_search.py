@@ -0,0 +1,220 @@
+import base64
+import json
+import re
+from datetime import datetime
+
+from sqlalchemy import text, DateTime, Boolean
+from sqlalchemy.exc import SQLAlchemyError
+
+# Columns returned for every hit, in the same shape as DatabaseManager results
+CATALOG_COLUMNS = [
+    'id', 'title', 'source', 'type', 'description', 'location', 'deadline',
+    'tocantins_eligible', 'url', 'search_engine', 'published_date'
+]
+
+POSTGRES_INDEX_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() is only STABLE; generated columns and indexes need an IMMUTABLE wrapper
+    """
+    CREATE OR REPLACE FUNCTION izy_unaccent(text) RETURNS text AS
+    $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    """,
+    """
+    ALTER TABLE opportunities ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('portuguese', izy_unaccent(coalesce(title, ''))), 'A') ||
+        setweight(to_tsvector('portuguese', izy_unaccent(coalesce(source, ''))), 'B') ||
+        setweight(to_tsvector('portuguese', izy_unaccent(coalesce(description, ''))), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_opportunities_search_vector ON opportunities USING GIN (search_vector)"
+]
+
+SQLITE_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS opportunities_fts USING fts5(
+        title, source, description,
+        content='opportunities', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS opportunities_fts_insert AFTER INSERT ON opportunities BEGIN
+        INSERT INTO opportunities_fts(rowid, title, source, description)
+        VALUES (new.id, new.title, new.source, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS opportunities_fts_delete AFTER DELETE ON opportunities BEGIN
+        INSERT INTO opportunities_fts(opportunities_fts, rowid, title, source, description)
+        VALUES ('delete', old.id, old.title, old.source, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS opportunities_fts_update AFTER UPDATE ON opportunities BEGIN
+        INSERT INTO opportunities_fts(opportunities_fts, rowid, title, source, description)
+        VALUES ('delete', old.id, old.title, old.source, old.description);
+        INSERT INTO opportunities_fts(rowid, title, source, description)
+        VALUES (new.id, new.title, new.source, new.description);
+    END
+    """
+]
+
+
+def encode_cursor(score, row_id):
+    """Opaque keyset cursor pointing just after (score, id)"""
+    raw = json.dumps({'s': score, 'i': row_id}).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return float(data['s']), int(data['i'])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def fts5_query(query):
+    """Turn free text into an FTS5 expression: every word must match, last one as a prefix"""
+    words = re.findall(r'\w+', query or '')
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+class CatalogSearchIndex:
+    """Full-text search over the opportunities catalog
+
+    Postgres uses a generated tsvector column (portuguese config + unaccent)
+    with a GIN index; SQLite uses an external-content FTS5 table kept in sync
+    by triggers. Other backends fall back to LIKE matching.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.backend = 'like'
+
+    def create_index(self, conn):
+        """Create the search column/table on an open connection and return the backend name"""
+        dialect = conn.dialect.name
+        if dialect == 'postgresql':
+            for statement in POSTGRES_INDEX_DDL:
+                conn.execute(text(statement))
+            return 'postgres'
+        if dialect == 'sqlite':
+            existed = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE name = 'opportunities_fts'"
+            )).first()
+            for statement in SQLITE_INDEX_DDL:
+                conn.execute(text(statement))
+            if not existed:
+                # Index rows that were in the catalog before the FTS table existed
+                conn.execute(text("INSERT INTO opportunities_fts(opportunities_fts) VALUES ('rebuild')"))
+            return 'fts5'
+        return 'like'
+
+    def ensure_index(self):
+        """Create the search column/table if missing and pick the query backend"""
+        try:
+            with self.engine.begin() as conn:
+                self.backend = self.create_index(conn)
+        except SQLAlchemyError as e:
+            print(f"Full-text index unavailable, falling back to LIKE search: {e}")
+            self.backend = 'like'
+        return self.backend
+
+    def _match_clause(self, query, params):
+        """Return (FROM/JOIN fragment, WHERE fragment, score expression); higher score is better"""
+        if not (query or '').strip():
+            return "opportunities o", "1 = 1", "0.0"
+        if self.backend == 'postgres':
+            params['query'] = query
+            return (
+                "opportunities o, websearch_to_tsquery('portuguese', izy_unaccent(:query)) q",
+                "o.search_vector @@ q",
+                "ts_rank_cd(o.search_vector, q)"
+            )
+        if self.backend == 'fts5':
+            expression = fts5_query(query)
+            if expression is None:
+                return "opportunities o", "1 = 1", "0.0"
+            params['query'] = expression
+            # bm25() is lower-is-better, so negate it; weights follow column order
+            return (
+                "opportunities o JOIN opportunities_fts f ON f.rowid = o.id",
+                "opportunities_fts MATCH :query",
+                "-bm25(opportunities_fts, 10.0, 5.0, 1.0)"
+            )
+        conditions = []
+        for position, word in enumerate(re.findall(r'\w+', query)):
+            params[f'word{position}'] = f'%{word}%'
+            conditions.append(f"(o.title LIKE :word{position} OR o.description LIKE :word{position})")
+        return "opportunities o", " AND ".join(conditions) or "1 = 1", "0.0"
+
+    def _filter_clauses(self, filters, params):
+        clauses = []
+        if filters.get('types'):
+            names = []
+            for position, opp_type in enumerate(filters['types']):
+                params[f'type{position}'] = opp_type
+                names.append(f':type{position}')
+            clauses.append(f"o.type IN ({', '.join(names)})")
+        if filters.get('tocantins_eligible') is not None:
+            params['eligible'] = bool(filters['tocantins_eligible'])
+            clauses.append("o.tocantins_eligible = :eligible")
+        if filters.get('source'):
+            params['source'] = filters['source']
+            clauses.append("o.source = :source")
+        if filters.get('open_only'):
+            params['now'] = datetime.now()
+            clauses.append("o.deadline >= :now")
+        if filters.get('deadline_from'):
+            params['deadline_from'] = filters['deadline_from']
+            clauses.append("o.deadline >= :deadline_from")
+        if filters.get('deadline_to'):
+            params['deadline_to'] = filters['deadline_to']
+            clauses.append("o.deadline <= :deadline_to")
+        return clauses
+
+    def build_statement(self, query, filters=None, limit=20, cursor=None):
+        """Return (statement, params) fetching one page (plus one row to detect more)"""
+        params = {'limit': limit + 1}
+        source, match, score = self._match_clause(query, params)
+        where = [match] + self._filter_clauses(filters or {}, params)
+        columns = ", ".join(f"o.{column}" for column in CATALOG_COLUMNS)
+        inner = f"SELECT {columns}, {score} AS score FROM {source} WHERE {' AND '.join(where)}"
+
+        outer_where = ""
+        position = decode_cursor(cursor) if cursor else None
+        if position:
+            params['cursor_score'], params['cursor_id'] = position
+            outer_where = "WHERE score < :cursor_score OR (score = :cursor_score AND id < :cursor_id)"
+
+        statement = text(
+            f"SELECT * FROM ({inner}) hits {outer_where} ORDER BY score DESC, id DESC LIMIT :limit"
+        ).columns(deadline=DateTime, published_date=DateTime, tocantins_eligible=Boolean)
+        return statement, params
+
+    def build_page(self, rows, limit):
+        """Turn fetched rows into {'results': [...], 'next_cursor': ...}"""
+        page = rows[:limit]
+        results = []
+        for row in page:
+            result = {column: row[column] for column in CATALOG_COLUMNS if column != 'id'}
+            result['opportunity_id'] = row['id']
+            result['score'] = float(row['score'] or 0)
+            results.append(result)
+        next_cursor = None
+        if len(rows) > limit and page:
+            next_cursor = encode_cursor(float(page[-1]['score'] or 0), page[-1]['id'])
+        return {'results': results, 'next_cursor': next_cursor}
+
+    def search(self, session, query, filters=None, limit=20, cursor=None):
+        """Return {'results': [...], 'next_cursor': str or None}, ordered by relevance"""
+        statement, params = self.build_statement(query, filters, limit, cursor)
+        rows = session.execute(statement, params).mappings().all()
+        return self.build_page(rows, limit)
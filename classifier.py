@@ -0,0 +1,204 @@
+import threading
+import unicodedata
+from collections import deque
+from urllib.parse import urlparse
+
+# Keyword rules are written without accents; text is normalized the same way.
+# Earlier type rules win when several match, mirroring the old if/elif order.
+TYPE_RULES = [
+    ("Concursos Literários", ["concurso", "competicao"]),
+    ("Editais Culturais", ["edital", "chamada"]),
+    ("Prêmios", ["premio"]),
+    ("Festivais", ["festival"]),
+    ("Antologias", ["antologia"])
+]
+DEFAULT_TYPE = "Outros"
+
+TOCANTINS_PATTERNS = [
+    "tocantins", "palmas", "araguaina", "gurupi", "porto nacional",
+    "- to", ", to", "/to", "(to)", "secult.to"
+]
+NATIONAL_PATTERNS = ["nacional", "todos os estados", "todo o brasil", "todo o pais", "regiao norte"]
+OTHER_STATE_PATTERNS = [
+    "sao paulo", "rio de janeiro", "minas gerais", "rio grande do sul", "parana",
+    "santa catarina", "bahia", "pernambuco", "ceara", "distrito federal",
+    "- sp", ", sp", "/sp", "(sp)", "- rj", ", rj", "/rj", "(rj)",
+    "- mg", ", mg", "/mg", "(mg)", "- rs", ", rs", "/rs", "(rs)"
+]
+
+LOCATION_TOCANTINS = "Tocantins"
+LOCATION_NATIONAL = "Nacional (todos os estados)"
+LOCATION_OTHER_STATE = "Específico por estado"
+
+# Registered domains (and all their subdomains) -> source name
+SOURCE_DOMAINS = {
+    "cultura.gov.br": "Ministério da Cultura",
+    "gov.br/cultura": "Ministério da Cultura",
+    "funarte.gov.br": "Funarte",
+    "bn.gov.br": "Fundação Biblioteca Nacional",
+    "palmares.gov.br": "Fundação Cultural Palmares",
+    "secult.to.gov.br": "Secretaria de Cultura - TO",
+    "to.gov.br": "Governo do Tocantins",
+    "palmas.to.gov.br": "Prefeitura de Palmas",
+    "itaucultural.org.br": "Itaú Cultural",
+    "sesc.com.br": "SESC",
+    "sescsp.org.br": "SESC",
+    "academia.org.br": "Academia Brasileira de Letras",
+    "premiojabuti.com.br": "Câmara Brasileira do Livro"
+}
+DEFAULT_SOURCE = "Site não identificado"
+
+
+def normalize_text(text):
+    """Lowercase and strip accents so 'Prêmio' and 'PREMIO' match the same rule"""
+    decomposed = unicodedata.normalize('NFKD', (text or '').lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton: finds every registered keyword in one pass over the text"""
+
+    def __init__(self, keywords):
+        # keywords: iterable of (pattern, label, whole_word); patterns must already
+        # be normalized. Every match starts at a word boundary; whole_word patterns
+        # must also end at one, others may be word prefixes ("concurso" in "concursos").
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for pattern, label, whole_word in keywords:
+            self._add(pattern, label, whole_word)
+        self._build_failure_links()
+
+    def _add(self, pattern, label, whole_word):
+        state = 0
+        for ch in pattern:
+            if ch not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][ch] = len(self._goto) - 1
+            state = self._goto[state][ch]
+        self._output[state].append((label, len(pattern), whole_word))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find(self, text):
+        """Yield (label, start) for every keyword occurrence at word boundaries"""
+        state = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for end, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for label, length, whole_word in output[state]:
+                start = end - length + 1
+                if start > 0 and text[start - 1].isalnum() and text[start].isalnum():
+                    continue
+                if whole_word and end + 1 < len(text) and text[end + 1].isalnum() and ch.isalnum():
+                    continue
+                yield label, start
+
+
+class DomainTrie:
+    """Suffix trie over domain labels; the longest registered suffix wins"""
+
+    def __init__(self, domains):
+        self._root = {}
+        for domain, source in domains.items():
+            host, _, path = domain.partition('/')
+            node = self._root
+            for part in reversed(host.split('.')):
+                node = node.setdefault(part, {})
+            node.setdefault('', {})[path] = source
+
+    def lookup(self, url):
+        parsed = urlparse(url if '//' in (url or '') else '//' + (url or ''))
+        host = (parsed.hostname or '').lower()
+        path = parsed.path.strip('/').lower()
+        node, found = self._root, None
+        for part in reversed(host.split('.')):
+            node = node.get(part)
+            if node is None:
+                break
+            sources = node.get('', {})
+            for prefix, source in sources.items():
+                if not prefix or path.startswith(prefix):
+                    found = source
+        return found
+
+
+class OpportunityClassifier:
+    """Shared type / source / eligibility classifier for results from every engine"""
+
+    def __init__(self, type_rules=TYPE_RULES, source_domains=SOURCE_DOMAINS):
+        keywords = []
+        self._type_priority = {}
+        for priority, (opp_type, words) in enumerate(type_rules):
+            self._type_priority[opp_type] = priority
+            keywords.extend((normalize_text(word), ('type', opp_type), False) for word in words)
+        keywords.extend((p, ('location', LOCATION_TOCANTINS), True) for p in TOCANTINS_PATTERNS)
+        keywords.extend((p, ('location', LOCATION_NATIONAL), True) for p in NATIONAL_PATTERNS)
+        keywords.extend((p, ('location', LOCATION_OTHER_STATE), True) for p in OTHER_STATE_PATTERNS)
+        self.automaton = KeywordAutomaton(keywords)
+        self.domains = DomainTrie(source_domains)
+
+    def classify(self, result):
+        """Return type, source, location and tocantins_eligible for one result"""
+        title = normalize_text(result.get('title'))
+        text = title + '\n' + normalize_text(result.get('description'))
+        title_types, text_types, locations = set(), set(), set()
+        for (kind, value), start in self.automaton.find(text):
+            if kind == 'type':
+                (title_types if start < len(title) else text_types).add(value)
+            else:
+                locations.add(value)
+
+        # The title decides the type; the description is only a fallback
+        candidates = title_types or text_types
+        opp_type = min(candidates, key=self._type_priority.get) if candidates else DEFAULT_TYPE
+
+        if LOCATION_TOCANTINS in locations:
+            location, eligible = LOCATION_TOCANTINS, True
+        elif LOCATION_NATIONAL in locations or LOCATION_OTHER_STATE not in locations:
+            location, eligible = LOCATION_NATIONAL, True
+        else:
+            location, eligible = LOCATION_OTHER_STATE, False
+
+        return {
+            'type': opp_type,
+            'source': self.domains.lookup(result.get('url')) or DEFAULT_SOURCE,
+            'location': location,
+            'tocantins_eligible': eligible
+        }
+
+    def classify_batch(self, results, overwrite=False):
+        """Classify results in place; existing fields are kept unless overwrite=True"""
+        for result in results:
+            for field, value in self.classify(result).items():
+                if overwrite or result.get(field) in (None, ''):
+                    result[field] = value
+        return results
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_classifier():
+    """Return the process-wide classifier (the automaton is built once)"""
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            _classifier = OpportunityClassifier()
+        return _classifier
@@ -0,0 +1,275 @@
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import date, datetime
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    from pyarrow import fs as pa_fs
+except ImportError:  # Optional: without pyarrow the corpus is simply not recorded
+    pa = ds = pq = pa_fs = None
+
+# '' disables the corpus; otherwise a directory of day=YYYY-MM-DD partitions
+CORPUS_PATH = os.getenv('CORPUS_PATH', 'corpus')
+CORPUS_FLUSH_ROWS = int(os.getenv('CORPUS_FLUSH_ROWS', '5000'))
+CORPUS_FLUSH_SECONDS = int(os.getenv('CORPUS_FLUSH_SECONDS', '300'))
+# Written in a partition while compact() replaces its files; '_' hides it from readers
+COMPACTION_MARKER = '_compacting.json'
+
+STRING_FIELDS = ['fingerprint', 'title', 'url', 'description', 'source', 'type', 'location', 'search_engine']
+DATE_FIELDS = ['deadline', 'published_date']
+
+if pa is not None:
+    CORPUS_SCHEMA = pa.schema(
+        [(field, pa.string()) for field in STRING_FIELDS] +
+        [(field, pa.timestamp('us')) for field in DATE_FIELDS] +
+        [
+            ('tocantins_eligible', pa.bool_()),
+            ('is_real_data', pa.bool_()),
+            ('query_hits', pa.int32()),
+            ('query', pa.string()),
+            ('keywords', pa.list_(pa.string())),
+            ('collected_at', pa.timestamp('us'))
+        ]
+    )
+    PARTITIONING = ds.partitioning(pa.schema([('day', pa.string())]), flavor='hive')
+    # What readers see: the file columns plus the day partition key
+    DATASET_SCHEMA = CORPUS_SCHEMA.append(pa.field('day', pa.string()))
+
+
+def _timestamp(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return None
+
+
+class CorpusStore:
+    """Append-only Parquet corpus of every normalized engine result
+
+    Rows are buffered and written as new files under day=YYYY-MM-DD by a
+    background thread, off the search path; files are never rewritten except
+    by compact(). Reads go through pyarrow.dataset over a memory-mapped
+    filesystem, so scans only decode the projected columns of the partitions
+    and row groups that can match the filter.
+    """
+
+    def __init__(self, root=CORPUS_PATH, flush_rows=CORPUS_FLUSH_ROWS, flush_seconds=CORPUS_FLUSH_SECONDS):
+        self.root = root
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self._buffer = {}  # day -> [row]
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._flush_due = threading.Event()
+        self._flusher = None
+        self.filesystem = pa_fs.LocalFileSystem(use_mmap=True)
+
+    def append(self, results, query="", keywords=None, collected_at=None):
+        """Buffer one engine response; the flusher writes it once the buffer is large or old enough"""
+        collected_at = collected_at or datetime.utcnow()
+        keywords = list(keywords or [])
+        day = collected_at.strftime('%Y-%m-%d')
+        rows = []
+        for result in results:
+            row = {field: result.get(field) for field in STRING_FIELDS}
+            row.update({field: _timestamp(result.get(field)) for field in DATE_FIELDS})
+            row.update({
+                'tocantins_eligible': bool(result.get('tocantins_eligible', False)),
+                'is_real_data': bool(result.get('is_real_data', False)),
+                'query_hits': result.get('query_hits'),
+                'query': query or "",
+                'keywords': keywords,
+                'collected_at': collected_at
+            })
+            rows.append(row)
+        with self._lock:
+            self._buffer.setdefault(day, []).extend(rows)
+            self._buffered += len(rows)
+            due = (self._buffered >= self.flush_rows
+                   or time.monotonic() - self._last_flush >= self.flush_seconds)
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="corpus-flush", daemon=True)
+                self._flusher.start()
+        if due:
+            # The Parquet write must not add to the latency of the search that filled the buffer
+            self._flush_due.set()
+
+    def _flush_loop(self):
+        while True:
+            self._flush_due.wait(self.flush_seconds)
+            self._flush_due.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing corpus: {e}")
+
+    def flush(self):
+        """Write buffered rows as one new Parquet file per day; returns rows written"""
+        with self._lock:
+            buffer, self._buffer, self._buffered = self._buffer, {}, 0
+            self._last_flush = time.monotonic()
+        written = 0
+        for day, rows in buffer.items():
+            try:
+                self._write_file(day, pa.Table.from_pylist(rows, schema=CORPUS_SCHEMA))
+                written += len(rows)
+            except (pa.ArrowException, OSError) as e:
+                print(f"Error writing corpus partition {day}: {e}")
+        return written
+
+    def _partition_dir(self, day):
+        return os.path.join(self.root, f"day={day}")
+
+    @staticmethod
+    def _write_hidden(directory, table):
+        """Write a new file under a hidden temp name; returns (temp name, final name)"""
+        name = f"part-{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.parquet"
+        tmp_path = os.path.join(directory, f".{name}.tmp")
+        try:
+            pq.write_table(table, tmp_path, compression='zstd')
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return f".{name}.tmp", name
+
+    def _write_file(self, day, table):
+        """Write to a hidden temp name and rename, so readers never see a partial file"""
+        directory = self._partition_dir(day)
+        os.makedirs(directory, exist_ok=True)
+        tmp_name, name = self._write_hidden(directory, table)
+        os.replace(os.path.join(directory, tmp_name), os.path.join(directory, name))
+
+    def dataset(self):
+        return ds.dataset(self.root, schema=DATASET_SCHEMA, format='parquet',
+                          partitioning=PARTITIONING, filesystem=self.filesystem,
+                          exclude_invalid_files=False, ignore_prefixes=['.', '_'])
+
+    @staticmethod
+    def build_filter(start=None, end=None, equals=None, where=None):
+        """Combine a day range (partition pruning), column equalities and a raw expression"""
+        expression = None
+        conditions = []
+        if start:
+            conditions.append(ds.field('day') >= str(start))
+        if end:
+            conditions.append(ds.field('day') <= str(end))
+        for column, value in (equals or {}).items():
+            if isinstance(value, (list, tuple, set)):
+                conditions.append(ds.field(column).isin(list(value)))
+            else:
+                conditions.append(ds.field(column) == value)
+        if where is not None:
+            conditions.append(where)
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def scanner(self, columns=None, start=None, end=None, equals=None, where=None, batch_size=65536):
+        """Scanner with column projection and predicate pushdown
+
+        start/end are dates (inclusive) on the day partitions; equals maps a
+        column to a value or a list of values; where is any pyarrow.dataset
+        expression, e.g. ds.field('deadline') > datetime(2026, 1, 1).
+        """
+        if not os.path.isdir(self.root):
+            return None
+        return self.dataset().scanner(columns=columns, filter=self.build_filter(start, end, equals, where),
+                                      batch_size=batch_size)
+
+    def query(self, columns=None, start=None, end=None, equals=None, where=None):
+        """Matching rows as one Arrow table (use iter_batches for large scans)"""
+        scanner = self.scanner(columns, start, end, equals, where)
+        if scanner is None:
+            return pa.table({name: pa.array([], type=DATASET_SCHEMA.field(name).type)
+                             for name in (columns or DATASET_SCHEMA.names)})
+        return scanner.to_table()
+
+    def iter_batches(self, columns=None, start=None, end=None, equals=None, where=None, batch_size=65536):
+        """Stream matching rows as Arrow record batches, for re-classification or offline analysis"""
+        scanner = self.scanner(columns, start, end, equals, where, batch_size)
+        if scanner is not None:
+            yield from scanner.to_batches()
+
+    def compact(self, day):
+        """Merge a day's small files into one (run for past days, not the one being written)
+
+        The merged file is written under a hidden temp name and a marker
+        records the files it replaces; those are removed before the rename, so
+        a scan never sees a row twice. A run that stopped halfway is finished
+        by the next compact() or recover().
+        """
+        directory = self._partition_dir(str(day))
+        if not os.path.isdir(directory):
+            return 0
+        self._finish_compaction(directory)
+        files = sorted(name for name in os.listdir(directory)
+                       if name.endswith('.parquet') and not name.startswith(('.', '_')))
+        if len(files) < 2:
+            return 0
+        table = pa.concat_tables(
+            pq.read_table(os.path.join(directory, name), schema=CORPUS_SCHEMA, memory_map=True) for name in files
+        )
+        tmp_name, name = self._write_hidden(directory, table)
+        marker_tmp = os.path.join(directory, f"{COMPACTION_MARKER}.tmp")
+        with open(marker_tmp, 'w') as f:
+            json.dump({'sources': files, 'tmp': tmp_name, 'target': name}, f)
+        os.replace(marker_tmp, os.path.join(directory, COMPACTION_MARKER))
+        self._finish_compaction(directory)
+        return len(files)
+
+    @staticmethod
+    def _finish_compaction(directory):
+        """Complete the compaction recorded in a partition's marker, if there is one"""
+        marker = os.path.join(directory, COMPACTION_MARKER)
+        try:
+            with open(marker) as f:
+                plan = json.load(f)
+        except FileNotFoundError:
+            return
+        tmp_path = os.path.join(directory, plan['tmp'])
+        # Without the temp file the rename already happened
+        if os.path.exists(tmp_path):
+            for name in plan['sources']:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except FileNotFoundError:
+                    pass
+            os.replace(tmp_path, os.path.join(directory, plan['target']))
+        os.remove(marker)
+
+    def recover(self):
+        """Finish compactions that a crash interrupted; returns partitions repaired"""
+        if not os.path.isdir(self.root):
+            return 0
+        repaired = 0
+        for entry in os.listdir(self.root):
+            directory = os.path.join(self.root, entry)
+            if entry.startswith('day=') and os.path.exists(os.path.join(directory, COMPACTION_MARKER)):
+                self._finish_compaction(directory)
+                repaired += 1
+        return repaired
+
+
+_corpus_store = None
+_corpus_store_lock = threading.Lock()
+
+
+def get_corpus_store():
+    """Return the process-wide corpus store, or None without pyarrow or when disabled"""
+    global _corpus_store
+    with _corpus_store_lock:
+        if _corpus_store is None and pa is not None and CORPUS_PATH:
+            _corpus_store = CorpusStore()
+            _corpus_store.recover()
+            # Buffered rows would otherwise be lost when the server stops
+            atexit.register(_corpus_store.flush)
+        return _corpus_store
@@ -1,27 +1,82 @@
 import os
 import json
-from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text, JSON, text
+import hashlib
+from datetime import datetime, date, timedelta
+from urllib.parse import urlsplit, urlunsplit
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, Date, Boolean, Float, Text, JSON, text, func
+from sqlalchemy import ForeignKey, UniqueConstraint, inspect, event, and_, or_, case
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.exc import SQLAlchemyError, OperationalError
+from sqlalchemy.exc import SQLAlchemyError, OperationalError, IntegrityError
 from sqlalchemy.pool import StaticPool
 import time
+import threading
+from catalog_search import CatalogSearchIndex
+from shared_cache import get_shared_cache
 
-# Database configuration
-DATABASE_URL = os.getenv('DATABASE_URL')
+# Database configuration: Postgres via DATABASE_URL, embedded SQLite otherwise
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'izy_hunter.db')
+DATABASE_URL = os.getenv('DATABASE_URL') or f"sqlite:///{SQLITE_PATH}"
+if DATABASE_URL.startswith('postgres://'):
+    # SQLAlchemy 2 only accepts the postgresql:// scheme
+    DATABASE_URL = DATABASE_URL.replace('postgres://', 'postgresql://', 1)
+
+SQLITE_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",       # Readers don't block the writer
+    "PRAGMA synchronous=NORMAL",     # Durable at checkpoints; safe with WAL
+    "PRAGMA cache_size=-32000",      # 32 MiB page cache per connection
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",    # 256 MiB memory-mapped reads
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA foreign_keys=ON"
+]
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune every new SQLite connection"""
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+def is_sqlite_url(url):
+    return url.startswith('sqlite')
+
+def create_database_engine(url):
+    """Create the engine for Postgres or the embedded SQLite backend"""
+    if is_sqlite_url(url):
+        in_memory = url in ('sqlite://', 'sqlite:///:memory:')
+        sqlite_engine = create_engine(
+            url,
+            # Pooled connections keep their compiled statement cache between calls
+            connect_args={
+                "check_same_thread": False,
+                "cached_statements": 256
+            },
+            # An in-memory database only exists on one connection
+            poolclass=StaticPool if in_memory else None,
+            pool_pre_ping=not in_memory
+        )
+        event.listen(sqlite_engine, 'connect', apply_sqlite_pragmas)
+        return sqlite_engine
+    
+    if url.startswith('postgresql'):
+        return create_engine(
+            url,
+            pool_pre_ping=True,  # Enable connection health checks
+            pool_recycle=3600,   # Recycle connections after 1 hour
+            pool_size=5,         # Connection pool size
+            max_overflow=10,     # Maximum overflow connections
+            connect_args={
+                "options": "-c timezone=utc"
+            }
+        )
+    
+    return create_engine(url, pool_pre_ping=True, pool_recycle=3600)
 
 # Configure engine with better connection handling
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,  # Enable connection health checks
-    pool_recycle=3600,   # Recycle connections after 1 hour
-    pool_size=5,         # Connection pool size
-    max_overflow=10,     # Maximum overflow connections
-    connect_args={
-        "options": "-c timezone=utc"
-    }
-)
+engine = create_database_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
@@ -33,26 +88,120 @@ class SearchHistory(Base):
     id = Column(Integer, primary_key=True, index=True)
     query = Column(String, nullable=False)
     engines = Column(JSON)  # Store list of search engines used
+    keywords = Column(JSON)  # Custom keywords sent with the query
     results_count = Column(Integer, default=0)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
     user_session = Column(String, index=True)  # For session-based tracking
+
+class SearchHistoryDaily(Base):
+    """Per-day rollup of search_history rows that aged out of the hot table"""
+    __tablename__ = "search_history_daily"
+    __table_args__ = (UniqueConstraint('day', 'query', 'engines_key', name='uq_search_history_daily'),)
     
-class SavedSearch(Base):
-    __tablename__ = "saved_searches"
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False, index=True)
+    query = Column(String, nullable=False)
+    engines_key = Column(String, nullable=False, default='')  # Sorted engines joined by ','
+    engines = Column(JSON)
+    searches = Column(Integer, default=0)
+    results_count = Column(Integer, default=0)
+    users = Column(Integer, default=0)  # Distinct sessions that day
+    
+class Opportunity(Base):
+    """Global catalog: one row per distinct opportunity, shared by every user"""
+    __tablename__ = "opportunities"
     
     id = Column(Integer, primary_key=True, index=True)
+    fingerprint = Column(String(64), unique=True, index=True, nullable=False)
     title = Column(String, nullable=False)
     source = Column(String)
     type = Column(String)
     description = Column(Text)
     location = Column(String)
-    deadline = Column(DateTime)
+    deadline = Column(DateTime, index=True)
     tocantins_eligible = Column(Boolean, default=False)
     url = Column(String)
     search_engine = Column(String)
     published_date = Column(DateTime)
-    saved_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SavedSearch(Base):
+    """A user's reference to a catalog opportunity"""
+    __tablename__ = "saved_searches"
+    __table_args__ = (UniqueConstraint('user_session', 'opportunity_id', name='uq_saved_searches_user_opportunity'),)
+    
+    id = Column(Integer, primary_key=True, index=True)
     user_session = Column(String, index=True)
+    opportunity_id = Column(Integer, ForeignKey('opportunities.id', ondelete='CASCADE'), index=True, nullable=False)
+    saved_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class SeenResult(Base):
+    """Fingerprints of results a user has already been shown (for "only new" searches)"""
+    __tablename__ = "seen_results"
+    __table_args__ = (UniqueConstraint('user_session', 'fingerprint', name='uq_seen_results_user_fingerprint'),)
+
+    id = Column(Integer, primary_key=True)
+    user_session = Column(String, nullable=False, index=True)
+    fingerprint = Column(String(64), nullable=False)
+    first_seen_at = Column(DateTime, default=datetime.utcnow)
+    last_seen_at = Column(DateTime, default=datetime.utcnow)
+
+class TrendingScore(Base):
+    """Materialized trending rank: decayed activity score per opportunity or query"""
+    __tablename__ = "trending_scores"
+    __table_args__ = (UniqueConstraint('kind', 'key', name='uq_trending_scores_kind_key'),)
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)  # 'opportunity' or 'query'
+    key = Column(String, nullable=False)  # Opportunity id or normalized query
+    label = Column(String)
+    opportunity_id = Column(Integer, ForeignKey('opportunities.id', ondelete='CASCADE'), nullable=True)
+    score = Column(Float, default=0.0, index=True)  # Decayed to trending_state.refreshed_at
+    events = Column(Integer, default=0)
+    last_event_at = Column(DateTime)
+
+class TrendingState(Base):
+    """(timestamp, id) watermarks for the incremental trending refresh (single row)"""
+    __tablename__ = "trending_state"
+
+    id = Column(Integer, primary_key=True)
+    last_saved_at = Column(DateTime)
+    last_saved_id = Column(Integer, default=0)
+    last_history_at = Column(DateTime)
+    last_history_id = Column(Integer, default=0)
+    refreshed_at = Column(DateTime)
+
+class EngineUsage(Base):
+    """Upstream requests per engine in daily and monthly quota windows"""
+    __tablename__ = "engine_usage"
+    __table_args__ = (UniqueConstraint('engine', 'period', 'period_start', name='uq_engine_usage_window'),)
+
+    id = Column(Integer, primary_key=True)
+    engine = Column(String, nullable=False)
+    period = Column(String, nullable=False)  # 'day' or 'month'
+    period_start = Column(Date, nullable=False)
+    requests = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ReminderOutbox(Base):
+    """Deadline reminders fired by reminders.py, waiting to be delivered"""
+    __tablename__ = "reminder_outbox"
+    __table_args__ = (UniqueConstraint('saved_id', 'lead_hours', 'deadline', name='uq_reminder_outbox_saved_lead'),)
+
+    id = Column(Integer, primary_key=True)
+    saved_id = Column(Integer, ForeignKey('saved_searches.id', ondelete='CASCADE'), nullable=False, index=True)
+    user_session = Column(String, nullable=False, index=True)
+    opportunity_id = Column(Integer, ForeignKey('opportunities.id', ondelete='CASCADE'), nullable=False)
+    title = Column(String)
+    url = Column(String)
+    deadline = Column(DateTime, nullable=False)
+    lead_hours = Column(Integer, nullable=False)
+    due_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    claimed_by = Column(String)  # Delivery run that is sending it (see claim_pending_reminders)
+    claimed_at = Column(DateTime)
+    delivered_at = Column(DateTime, index=True)
 
 class UserPreferences(Base):
     __tablename__ = "user_preferences"
@@ -65,16 +214,222 @@ class UserPreferences(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+# Cold storage for search_history: monthly range partitions on Postgres,
+# a plain table pruned by date on SQLite. Managed by retention.py.
+SEARCH_HISTORY_ARCHIVE_DDL = {
+    'postgresql': [
+        """
+        CREATE TABLE IF NOT EXISTS search_history_archive (
+            id INTEGER NOT NULL,
+            query VARCHAR NOT NULL,
+            engines JSON,
+            keywords JSON,
+            results_count INTEGER,
+            timestamp TIMESTAMP NOT NULL,
+            user_session VARCHAR,
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_search_history_archive_user_session ON search_history_archive (user_session)",
+        "CREATE INDEX IF NOT EXISTS ix_search_history_timestamp ON search_history (timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_saved_searches_saved_at ON saved_searches (saved_at)"
+    ],
+    'default': [
+        """
+        CREATE TABLE IF NOT EXISTS search_history_archive (
+            id INTEGER NOT NULL,
+            query VARCHAR NOT NULL,
+            engines JSON,
+            keywords JSON,
+            results_count INTEGER,
+            timestamp DATETIME NOT NULL,
+            user_session VARCHAR,
+            PRIMARY KEY (id, timestamp)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_search_history_archive_timestamp ON search_history_archive (timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_search_history_archive_user_session ON search_history_archive (user_session)",
+        "CREATE INDEX IF NOT EXISTS ix_search_history_timestamp ON search_history (timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_saved_searches_saved_at ON saved_searches (saved_at)"
+    ]
+}
+
+# Columns added after their table was first created: (table, column) -> type
+ADDED_COLUMNS = {
+    ('search_history', 'keywords'): 'JSON',
+    ('search_history_archive', 'keywords'): 'JSON',
+    ('reminder_outbox', 'claimed_by'): 'VARCHAR',
+    ('reminder_outbox', 'claimed_at'): 'TIMESTAMP',
+    ('trending_state', 'last_saved_at'): 'TIMESTAMP',
+    ('trending_state', 'last_history_at'): 'TIMESTAMP'
+}
+
+# Catalog columns copied from a result dict; everything except the fingerprint
+OPPORTUNITY_FIELDS = [
+    'title', 'source', 'type', 'description', 'location', 'deadline',
+    'tocantins_eligible', 'url', 'search_engine', 'published_date'
+]
+
+# Catalog fields a newer result may correct; the others keep the first value seen
+# (engines stamp published_date with the time of the search, for instance)
+OPPORTUNITY_REFRESH_FIELDS = ['deadline', 'url', 'description']
+
+PREFERENCES_CACHE_NAMESPACE = 'preferences'
+PREFERENCES_CACHE_TTL_SECONDS = 300
+
+def cache_user_preferences(user_session, preferences, updated_at=None):
+    """Put a user's preferences ({} for none) in the shared cache, versioned by the row's updated_at
+
+    A reader that loaded the row before a save cannot overwrite the saved
+    value afterwards: its version is older.
+    """
+    shared_cache = get_shared_cache()
+    if shared_cache:
+        shared_cache.set(PREFERENCES_CACHE_NAMESPACE, user_session, preferences, PREFERENCES_CACHE_TTL_SECONDS,
+                         version=updated_at.timestamp() if updated_at else 0.0)
+
+def preferences_to_dict(prefs):
+    return {
+        'custom_keywords': prefs.custom_keywords,
+        'preferred_engines': prefs.preferred_engines,
+        'default_filters': prefs.default_filters
+    }
+
+def reminder_to_dict(reminder):
+    return {
+        'id': reminder.id, 'saved_id': reminder.saved_id, 'user_session': reminder.user_session,
+        'opportunity_id': reminder.opportunity_id, 'title': reminder.title, 'url': reminder.url,
+        'deadline': reminder.deadline, 'lead_hours': reminder.lead_hours, 'due_at': reminder.due_at
+    }
+
+def claimable_reminders(now, lease_seconds):
+    """Undelivered outbox rows nobody holds a live claim on"""
+    return and_(
+        ReminderOutbox.delivered_at.is_(None),
+        or_(ReminderOutbox.claimed_at.is_(None),
+            ReminderOutbox.claimed_at < now - timedelta(seconds=lease_seconds))
+    )
+
+def dialect_insert(dialect_name, model):
+    """INSERT with ON CONFLICT support for the two supported databases (Postgres, SQLite)"""
+    return (postgresql_insert if dialect_name == 'postgresql' else sqlite_insert)(model)
+
+def mark_seen_statement(dialect_name, user_session, fingerprints, now):
+    """INSERT ... ON CONFLICT marking fingerprints seen; rows already there get last_seen_at refreshed
+
+    Conflicts are resolved row by row by the database, so a concurrent search
+    by the same user cannot make the whole batch fail.
+    """
+    statement = dialect_insert(dialect_name, SeenResult).values([
+        {'user_session': user_session, 'fingerprint': fingerprint, 'first_seen_at': now, 'last_seen_at': now}
+        for fingerprint in fingerprints
+    ])
+    return statement.on_conflict_do_update(
+        index_elements=['user_session', 'fingerprint'],
+        set_={'last_seen_at': statement.excluded.last_seen_at}
+    )
+
+def upsert_opportunity_statement(dialect_name, opportunity_data):
+    """INSERT ... ON CONFLICT (fingerprint) for one catalog row, returning its id
+
+    Concurrent first saves of the same opportunity both end up with the one
+    row. An existing row only takes the OPPORTUNITY_REFRESH_FIELDS that the
+    new result carries, and updated_at only moves when one of them changed.
+    """
+    now = datetime.utcnow()
+    values = {field: opportunity_data.get(field) for field in OPPORTUNITY_FIELDS}
+    if values['tocantins_eligible'] is None:
+        values['tocantins_eligible'] = False
+    statement = dialect_insert(dialect_name, Opportunity).values(
+        fingerprint=opportunity_fingerprint(opportunity_data), created_at=now, updated_at=now, **values
+    )
+    columns = Opportunity.__table__.c
+    refreshed = {
+        field: func.coalesce(statement.excluded[field], columns[field]) for field in OPPORTUNITY_REFRESH_FIELDS
+    }
+    changed = or_(*(value.is_distinct_from(columns[field]) for field, value in refreshed.items()))
+    return statement.on_conflict_do_update(
+        index_elements=['fingerprint'],
+        set_=dict(refreshed, updated_at=case((changed, now), else_=columns.updated_at))
+    ).returning(Opportunity.id)
+
+def save_reference_statement(dialect_name, user_session, opportunity_id):
+    """INSERT ... ON CONFLICT DO NOTHING for a user's saved reference; rowcount 0 means already saved"""
+    return dialect_insert(dialect_name, SavedSearch)\
+        .values(user_session=user_session, opportunity_id=opportunity_id, saved_at=datetime.utcnow())\
+        .on_conflict_do_nothing(index_elements=['user_session', 'opportunity_id'])
+
+def rollup_daily_statement(dialect_name, groups):
+    """INSERT ... ON CONFLICT adding per-day history aggregates onto search_history_daily
+
+    The increment happens inside the database, so retention runs in several
+    processes cannot lose each other's counts or race on a new day's row.
+    """
+    statement = dialect_insert(dialect_name, SearchHistoryDaily).values(groups)
+    return statement.on_conflict_do_update(
+        index_elements=['day', 'query', 'engines_key'],
+        set_={
+            'searches': SearchHistoryDaily.searches + statement.excluded.searches,
+            'results_count': SearchHistoryDaily.results_count + statement.excluded.results_count,
+            # Batches can split a day; distinct users become an upper bound then
+            'users': SearchHistoryDaily.users + statement.excluded.users
+        }
+    )
+
+def enqueue_reminders_statement(dialect_name, reminders):
+    """INSERT ... ON CONFLICT DO NOTHING for fired reminders (another process may have fired them too)"""
+    now = datetime.utcnow()
+    return dialect_insert(dialect_name, ReminderOutbox)\
+        .values([dict(reminder, created_at=now) for reminder in reminders])\
+        .on_conflict_do_nothing(index_elements=['saved_id', 'lead_hours', 'deadline'])
+
+def _normalize_url(url):
+    """Lowercase scheme/host and drop fragments and trailing slashes"""
+    parts = urlsplit((url or '').strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), parts.query, ''))
+
+def opportunity_fingerprint(opportunity_data):
+    """Content fingerprint identifying the same opportunity across users and engines"""
+    title = ' '.join((opportunity_data.get('title') or '').lower().split())
+    key = f"{_normalize_url(opportunity_data.get('url'))}\n{title}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+def opportunity_to_dict(opportunity):
+    """Serialize a catalog row to the result dict shape used by the app"""
+    data = {field: getattr(opportunity, field) for field in OPPORTUNITY_FIELDS}
+    data['opportunity_id'] = opportunity.id
+    return data
+
+# Schema setup (tables, migrations, search index) runs once per process:
+# Streamlit builds a DatabaseManager on every rerun, and some of the DDL
+# takes table locks on Postgres
+_schema_lock = threading.Lock()
+_schema_backend = None  # Catalog search backend picked by the first setup that succeeded
+
 # Database Manager
 class DatabaseManager:
     def __init__(self):
         self.engine = engine
         self.SessionLocal = SessionLocal
         self.db_available = True
+        self.catalog_index = CatalogSearchIndex(self.engine)
+        self.shared_cache = get_shared_cache()
         self._initialize_database()
     
     def _initialize_database(self):
-        """Initialize database with retry logic"""
+        """Initialize database with retry logic (once per process)"""
+        global _schema_backend
+        with _schema_lock:
+            if _schema_backend is not None:
+                self.catalog_index.backend = _schema_backend
+                self.db_available = True
+                return
+            self._setup_schema()
+            if self.db_available:
+                _schema_backend = self.catalog_index.backend
+    
+    def _setup_schema(self):
+        """Connect, create tables and run the migrations; db_available reflects the outcome"""
         max_retries = 3
         retry_delay = 2
         
@@ -84,8 +439,16 @@ class DatabaseManager:
                 with self.engine.connect() as conn:
                     conn.execute(text("SELECT 1"))
                 
+                # Move pre-catalog saved_searches out of the way before creating tables
+                legacy_saved = self._detach_legacy_saved_searches()
+                
                 # Create tables if connection is successful
                 Base.metadata.create_all(bind=self.engine)
+                if legacy_saved:
+                    self._migrate_legacy_saved_searches()
+                self.catalog_index.ensure_index()
+                self._ensure_history_archive()
+                self._ensure_added_columns()
                 self.db_available = True
                 return
                 
@@ -97,13 +460,50 @@ class DatabaseManager:
                     print("Database initialization failed. Running in mock mode.")
                     self.db_available = False
     
+    def _ensure_history_archive(self):
+        """Create the search_history archive table (and the activity timestamp indexes on older databases)"""
+        statements = SEARCH_HISTORY_ARCHIVE_DDL.get(self.engine.dialect.name, SEARCH_HISTORY_ARCHIVE_DDL['default'])
+        try:
+            with self.engine.begin() as conn:
+                for statement in statements:
+                    conn.execute(text(statement))
+        except SQLAlchemyError as e:
+            print(f"Error creating search history archive: {e}")
+            return
+        # Archives created before the primary key get the same guarantee from a unique index
+        if inspect(self.engine).get_pk_constraint('search_history_archive').get('constrained_columns'):
+            return
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS uq_search_history_archive_id "
+                    "ON search_history_archive (id, timestamp)"
+                ))
+        except SQLAlchemyError as e:
+            print(f"Error adding search_history_archive unique key: {e}")
+    
+    def _ensure_added_columns(self):
+        """Add columns introduced after their table was first created"""
+        inspector = inspect(self.engine)
+        existing = {}
+        for (table, column), column_type in ADDED_COLUMNS.items():
+            try:
+                if table not in existing:
+                    existing[table] = {c['name'] for c in inspector.get_columns(table)}
+                if column in existing[table]:
+                    continue
+                with self.engine.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+            except SQLAlchemyError as e:
+                print(f"Error adding {table}.{column}: {e}")
+    
     def get_session(self):
         """Get database session"""
         if not self.db_available:
             return None
         return self.SessionLocal()
     
-    def save_search_history(self, query, engines, results_count, user_session):
+    def save_search_history(self, query, engines, results_count, user_session, keywords=None):
         """Save search to history"""
         if not self.db_available:
             return False
@@ -116,6 +516,7 @@ class DatabaseManager:
             search_entry = SearchHistory(
                 query=query,
                 engines=engines,
+                keywords=keywords,
                 results_count=results_count,
                 user_session=user_session
             )
@@ -157,6 +558,221 @@ class DatabaseManager:
             return []
         finally:
             session.close()
+
+    def get_frequent_searches(self, since, limit=10, max_rows=5000):
+        """Most repeated (query, keywords, engines) combinations since a datetime"""
+        if not self.db_available:
+            return []
+
+        session = self.get_session()
+        if not session:
+            return []
+
+        try:
+            # JSON columns can't be grouped portably, so count the recent rows here
+            rows = session.query(SearchHistory.query, SearchHistory.keywords, SearchHistory.engines)\
+                .filter(SearchHistory.timestamp >= since)\
+                .order_by(SearchHistory.timestamp.desc())\
+                .limit(max_rows)\
+                .all()
+
+            counts = {}
+            for query, keywords, engines in rows:
+                key = (query, tuple(keywords or []), tuple(sorted(engines or [])))
+                counts[key] = counts.get(key, 0) + 1
+            ranked = sorted(counts.items(), key=lambda item: -item[1])[:limit]
+            return [{
+                'query': query,
+                'keywords': list(keywords),
+                'engines': list(engines),
+                'searches': count
+            } for (query, keywords, engines), count in ranked]
+        except SQLAlchemyError as e:
+            print(f"Error getting frequent searches: {e}")
+            return []
+        finally:
+            session.close()
+    
+    def _detach_legacy_saved_searches(self):
+        """Rename a pre-catalog saved_searches table (full copies per user) to saved_searches_legacy"""
+        inspector = inspect(self.engine)
+        if 'saved_searches' not in inspector.get_table_names():
+            return 'saved_searches_legacy' in inspector.get_table_names()
+        columns = {column['name'] for column in inspector.get_columns('saved_searches')}
+        if 'opportunity_id' in columns:
+            return 'saved_searches_legacy' in inspector.get_table_names()
+        
+        with self.engine.begin() as conn:
+            conn.execute(text("ALTER TABLE saved_searches RENAME TO saved_searches_legacy"))
+            # Index names are schema-wide; free them for the new table
+            conn.execute(text("DROP INDEX IF EXISTS ix_saved_searches_id"))
+            conn.execute(text("DROP INDEX IF EXISTS ix_saved_searches_user_session"))
+        print("Legacy saved_searches table renamed to saved_searches_legacy for migration.")
+        return True
+    
+    def _migrate_legacy_saved_searches(self, batch_size=500):
+        """Copy legacy saved rows into the catalog plus per-user references, then drop the legacy table"""
+        session = self.SessionLocal()
+        try:
+            legacy_query = text(
+                "SELECT user_session, saved_at, " + ", ".join(OPPORTUNITY_FIELDS) +
+                " FROM saved_searches_legacy ORDER BY id"
+            ).columns(saved_at=DateTime, deadline=DateTime, published_date=DateTime,
+                      tocantins_eligible=Boolean)
+            legacy_rows = session.execute(legacy_query).mappings()
+            
+            catalog_ids = {}
+            saved_refs = set()
+            migrated = 0
+            for row in legacy_rows:
+                data = dict(row)
+                opportunity_id = catalog_ids.get(opportunity_fingerprint(data))
+                if opportunity_id is None:
+                    opportunity_id = self._upsert_opportunity(session, data)
+                    catalog_ids[opportunity_fingerprint(data)] = opportunity_id
+                if (data['user_session'], opportunity_id) in saved_refs:
+                    continue
+                saved_refs.add((data['user_session'], opportunity_id))
+                session.add(SavedSearch(
+                    user_session=data['user_session'],
+                    opportunity_id=opportunity_id,
+                    saved_at=data['saved_at']
+                ))
+                migrated += 1
+                if migrated % batch_size == 0:
+                    session.flush()
+            
+            session.execute(text("DROP TABLE saved_searches_legacy"))
+            session.commit()
+            print(f"Migrated {migrated} saved opportunities into {len(catalog_ids)} catalog entries.")
+        except SQLAlchemyError as e:
+            session.rollback()
+            print(f"Error migrating legacy saved searches (kept in saved_searches_legacy): {e}")
+        finally:
+            session.close()
+    
+    def _upsert_opportunity(self, session, opportunity_data):
+        """Get or create the catalog row for an opportunity, refreshing corrected fields; returns its id"""
+        return session.execute(upsert_opportunity_statement(self.engine.dialect.name, opportunity_data)).scalar_one()
+    
+    def upsert_opportunity(self, opportunity_data):
+        """Add an opportunity to the catalog (or refresh it) and return its id"""
+        if not self.db_available:
+            return None
+            
+        session = self.get_session()
+        if not session:
+            return None
+            
+        try:
+            opportunity_id = self._upsert_opportunity(session, opportunity_data)
+            session.commit()
+            return opportunity_id
+        except SQLAlchemyError as e:
+            session.rollback()
+            print(f"Error saving catalog opportunity: {e}")
+            return None
+        finally:
+            session.close()
+    
+    def upsert_opportunities(self, results):
+        """Add a batch of search results to the catalog; returns their catalog ids"""
+        if not self.db_available or not results:
+            return []
+            
+        session = self.get_session()
+        if not session:
+            return []
+            
+        try:
+            ids = {}
+            for result in results:
+                fingerprint = opportunity_fingerprint(result)
+                if fingerprint not in ids:
+                    ids[fingerprint] = self._upsert_opportunity(session, result)
+            session.commit()
+            return [ids[opportunity_fingerprint(result)] for result in results]
+        except SQLAlchemyError as e:
+            session.rollback()
+            print(f"Error saving catalog opportunities: {e}")
+            return []
+        finally:
+            session.close()
+    
+    def search_catalog(self, query, filters=None, limit=20, cursor=None):
+        """Full-text search over already collected opportunities
+
+        filters may contain: types (list), tocantins_eligible (bool), source,
+        open_only (bool), deadline_from, deadline_to. Returns
+        {'results': [...], 'next_cursor': ...}; pass next_cursor back for the next page.
+        """
+        empty = {'results': [], 'next_cursor': None}
+        if not self.db_available:
+            return empty
+            
+        session = self.get_session()
+        if not session:
+            return empty
+            
+        try:
+            return self.catalog_index.search(session, query, filters, limit, cursor)
+        except SQLAlchemyError as e:
+            print(f"Error searching catalog: {e}")
+            return empty
+        finally:
+            session.close()
+    
+    def get_opportunities_by_fingerprint(self, fingerprints, chunk_size=500):
+        """Catalog rows for the given fingerprints, as {fingerprint: result dict}"""
+        if not self.db_available:
+            return {}
+
+        session = self.get_session()
+        if not session:
+            return {}
+
+        fingerprints = list(set(fingerprints))
+        try:
+            found = {}
+            for start in range(0, len(fingerprints), chunk_size):
+                rows = session.query(Opportunity)\
+                    .filter(Opportunity.fingerprint.in_(fingerprints[start:start + chunk_size]))\
+                    .all()
+                for opportunity in rows:
+                    found[opportunity.fingerprint] = dict(opportunity_to_dict(opportunity),
+                                                          fingerprint=opportunity.fingerprint)
+            return found
+        except SQLAlchemyError as e:
+            print(f"Error getting opportunities by fingerprint: {e}")
+            return {}
+        finally:
+            session.close()
+
+    def update_opportunity(self, opportunity_id, **fields):
+        """Update catalog fields (e.g. deadline, url) for every user that saved it"""
+        if not self.db_available:
+            return False
+            
+        session = self.get_session()
+        if not session:
+            return False
+            
+        try:
+            updates = {field: value for field, value in fields.items() if field in OPPORTUNITY_FIELDS}
+            if not updates:
+                return False
+            updates['updated_at'] = datetime.utcnow()
+            updated = session.query(Opportunity)\
+                .filter(Opportunity.id == opportunity_id)\
+                .update(updates)
+            session.commit()
+            return updated > 0
+        except SQLAlchemyError as e:
+            session.rollback()
+            print(f"Error updating opportunity: {e}")
+            return False
+        finally:
+            session.close()
     
     def save_opportunity(self, opportunity_data, user_session):
         """Save opportunity to saved searches"""
@@ -168,31 +784,13 @@ class DatabaseManager:
             return False
             
         try:
-            # Check if already saved
-            existing = session.query(SavedSearch)\
-                .filter(SavedSearch.title == opportunity_data['title'])\
-                .filter(SavedSearch.user_session == user_session)\
-                .first()
-            
-            if existing:
-                return False  # Already saved
-            
-            saved_search = SavedSearch(
-                title=opportunity_data['title'],
-                source=opportunity_data.get('source'),
-                type=opportunity_data.get('type'),
-                description=opportunity_data.get('description'),
-                location=opportunity_data.get('location'),
-                deadline=opportunity_data.get('deadline'),
-                tocantins_eligible=opportunity_data.get('tocantins_eligible', False),
-                url=opportunity_data.get('url'),
-                search_engine=opportunity_data.get('search_engine'),
-                published_date=opportunity_data.get('published_date'),
-                user_session=user_session
-            )
-            session.add(saved_search)
+            opportunity_id = self._upsert_opportunity(session, opportunity_data)
+            # Nothing is added when it was already saved (refreshed catalog fields are still kept)
+            added = session.execute(
+                save_reference_statement(self.engine.dialect.name, user_session, opportunity_id)
+            ).rowcount
             session.commit()
-            return True
+            return added > 0
         except SQLAlchemyError as e:
             session.rollback()
             print(f"Error saving opportunity: {e}")
@@ -210,31 +808,47 @@ class DatabaseManager:
             return []
             
         try:
-            saved = session.query(SavedSearch)\
+            saved = session.query(SavedSearch, Opportunity)\
+                .join(Opportunity, SavedSearch.opportunity_id == Opportunity.id)\
                 .filter(SavedSearch.user_session == user_session)\
                 .order_by(SavedSearch.saved_at.desc())\
                 .all()
             
-            return [{
-                'id': s.id,
-                'title': s.title,
-                'source': s.source,
-                'type': s.type,
-                'description': s.description,
-                'location': s.location,
-                'deadline': s.deadline,
-                'tocantins_eligible': s.tocantins_eligible,
-                'url': s.url,
-                'search_engine': s.search_engine,
-                'published_date': s.published_date,
-                'saved_at': s.saved_at
-            } for s in saved]
+            return [dict(opportunity_to_dict(o), id=s.id, saved_at=s.saved_at) for s, o in saved]
         except SQLAlchemyError as e:
             print(f"Error getting saved opportunities: {e}")
             return []
         finally:
             session.close()
-    
+
+    def iter_saved_opportunities(self, user_session, batch_size=500):
+        """Stream saved opportunities from a server-side cursor, batch_size rows at a time"""
+        if not self.db_available:
+            return
+
+        session = self.get_session()
+        if not session:
+            return
+
+        try:
+            # Only plain columns are selected so no ORM identity map builds up
+            # while streaming; yield_per also turns on stream_results.
+            columns = [getattr(Opportunity, field) for field in OPPORTUNITY_FIELDS]
+            rows = session.query(SavedSearch.id, SavedSearch.saved_at, Opportunity.id, Opportunity.fingerprint,
+                                 *columns)\
+                .join(Opportunity, SavedSearch.opportunity_id == Opportunity.id)\
+                .filter(SavedSearch.user_session == user_session)\
+                .order_by(SavedSearch.saved_at.desc())\
+                .yield_per(batch_size)
+
+            for saved_id, saved_at, opportunity_id, fingerprint, *values in rows:
+                yield dict(zip(OPPORTUNITY_FIELDS, values), id=saved_id, opportunity_id=opportunity_id,
+                           fingerprint=fingerprint, saved_at=saved_at)
+        except SQLAlchemyError as e:
+            print(f"Error streaming saved opportunities: {e}")
+        finally:
+            session.close()
+
     def remove_saved_opportunity(self, opportunity_id, user_session):
         """Remove saved opportunity"""
         if not self.db_available:
@@ -292,11 +906,15 @@ class DatabaseManager:
                     user_session=user_session,
                     custom_keywords=custom_keywords,
                     preferred_engines=preferred_engines,
-                    default_filters=default_filters
+                    default_filters=default_filters,
+                    updated_at=datetime.utcnow()
                 )
                 session.add(prefs)
             
+            saved, updated_at = preferences_to_dict(prefs), prefs.updated_at
             session.commit()
+            # Write through: every worker sees the new value right away
+            cache_user_preferences(user_session, saved, updated_at)
             return True
         except SQLAlchemyError as e:
             session.rollback()
@@ -309,6 +927,11 @@ class DatabaseManager:
         """Get user preferences"""
         if not self.db_available:
             return None
+        
+        # Read on every rerun by every worker; the shared cache spares the query
+        cached = self.shared_cache.get(PREFERENCES_CACHE_NAMESPACE, user_session) if self.shared_cache else None
+        if cached is not None:
+            return cached or None
             
         session = self.get_session()
         if not session:
@@ -319,18 +942,41 @@ class DatabaseManager:
                 .filter(UserPreferences.user_session == user_session)\
                 .first()
             
-            if prefs:
-                return {
-                    'custom_keywords': prefs.custom_keywords,
-                    'preferred_engines': prefs.preferred_engines,
-                    'default_filters': prefs.default_filters
-                }
-            return None
+            result = preferences_to_dict(prefs) if prefs else None
+            # {} records "no preferences" so new sessions are cached too
+            cache_user_preferences(user_session, result or {}, prefs.updated_at if prefs else None)
+            return result
         except SQLAlchemyError as e:
             print(f"Error getting user preferences: {e}")
             return None
         finally:
             session.close()
+
+    def iter_user_preferences(self, user_sessions=None, batch_size=500):
+        """Stream (user_session, preferences) for the given sessions, or every user"""
+        if not self.db_available:
+            return
+
+        session = self.get_session()
+        if not session:
+            return
+
+        try:
+            query = session.query(UserPreferences.user_session, UserPreferences.custom_keywords,
+                                  UserPreferences.preferred_engines, UserPreferences.default_filters)
+            if user_sessions:
+                query = query.filter(UserPreferences.user_session.in_(list(user_sessions)))
+            for user_session, custom_keywords, preferred_engines, default_filters in \
+                    query.order_by(UserPreferences.id).yield_per(batch_size):
+                yield user_session, {
+                    'custom_keywords': custom_keywords,
+                    'preferred_engines': preferred_engines,
+                    'default_filters': default_filters
+                }
+        except SQLAlchemyError as e:
+            print(f"Error streaming user preferences: {e}")
+        finally:
+            session.close()
     
     def clear_search_history(self, user_session):
         """Clear search history for user"""
@@ -345,6 +991,15 @@ class DatabaseManager:
             session.query(SearchHistory)\
                 .filter(SearchHistory.user_session == user_session)\
                 .delete()
+            # Archived rows belong to the user too; daily rollups are anonymous
+            session.execute(
+                text("DELETE FROM search_history_archive WHERE user_session = :user_session"),
+                {'user_session': user_session}
+            )
+            # Forgetting the history also resets what counts as "new"
+            session.query(SeenResult)\
+                .filter(SeenResult.user_session == user_session)\
+                .delete()
             session.commit()
             return True
         except SQLAlchemyError as e:
@@ -354,6 +1009,56 @@ class DatabaseManager:
         finally:
             session.close()
     
+    def get_seen_fingerprints(self, user_session, fingerprints, chunk_size=500):
+        """Return the subset of fingerprints this user has already been shown"""
+        if not self.db_available:
+            return set()
+
+        session = self.get_session()
+        if not session:
+            return set()
+
+        fingerprints = list(set(fingerprints))
+        try:
+            seen = set()
+            for start in range(0, len(fingerprints), chunk_size):
+                rows = session.query(SeenResult.fingerprint)\
+                    .filter(SeenResult.user_session == user_session)\
+                    .filter(SeenResult.fingerprint.in_(fingerprints[start:start + chunk_size]))\
+                    .all()
+                seen.update(fingerprint for fingerprint, in rows)
+            return seen
+        except SQLAlchemyError as e:
+            print(f"Error getting seen results: {e}")
+            return set()
+        finally:
+            session.close()
+
+    def mark_results_seen(self, user_session, fingerprints, chunk_size=500):
+        """Record that the user was shown these results"""
+        if not self.db_available:
+            return False
+
+        session = self.get_session()
+        if not session:
+            return False
+
+        fingerprints = list(set(fingerprints))
+        now = datetime.utcnow()
+        try:
+            for start in range(0, len(fingerprints), chunk_size):
+                session.execute(mark_seen_statement(
+                    self.engine.dialect.name, user_session, fingerprints[start:start + chunk_size], now
+                ))
+            session.commit()
+            return True
+        except SQLAlchemyError as e:
+            session.rollback()
+            print(f"Error marking results as seen: {e}")
+            return False
+        finally:
+            session.close()
+
     def get_database_stats(self):
         """Get database statistics"""
         if not self.db_available:
@@ -364,8 +1069,11 @@ class DatabaseManager:
             return None
             
         try:
+            # The hot table stays small under the retention policy; older
+            # searches are counted from the daily rollups
+            archived_searches = session.query(func.coalesce(func.sum(SearchHistoryDaily.searches), 0)).scalar()
             stats = {
-                'total_searches': session.query(SearchHistory).count(),
+                'total_searches': session.query(SearchHistory).count() + int(archived_searches),
                 'total_saved_opportunities': session.query(SavedSearch).count(),
                 'total_users': session.query(UserPreferences).count(),
                 'recent_searches': session.query(SearchHistory)\
@@ -378,4 +1086,242 @@ class DatabaseManager:
             print(f"Error getting database stats: {e}")
             return None
         finally:
-            session.close()
\ No newline at end of file
+            session.close()
+
+    def record_engine_usage(self, engine, requests=1, day=None, daily_limit=None):
+        """Add upstream requests to the engine's current daily and monthly windows
+
+        With daily_limit nothing is recorded (and False is returned) when the
+        day's window would go over it; the check and the increment are one
+        conditional UPDATE, so concurrent processes cannot overspend.
+        """
+        if not self.db_available:
+            return False
+
+        session = self.get_session()
+        if not session:
+            return False
+
+        day = day or datetime.utcnow().date()
+        windows = [('day', day), ('month', date(day.year, day.month, 1))]
+        try:
+            for attempt in range(2):
+                try:
+                    for window, period_start in windows:
+                        limited = daily_limit is not None and window == 'day'
+                        current = session.query(EngineUsage)\
+                            .filter(EngineUsage.engine == engine)\
+                            .filter(EngineUsage.period == window)\
+                            .filter(EngineUsage.period_start == period_start)
+                        within = current.filter(EngineUsage.requests + requests <= daily_limit) if limited else current
+                        updated = within.update({EngineUsage.requests: EngineUsage.requests + requests,
+                                                 EngineUsage.updated_at: datetime.utcnow()},
+                                                synchronize_session=False)
+                        if not updated:
+                            if limited and (requests > daily_limit or current.first() is not None):
+                                session.rollback()
+                                return False
+                            session.add(EngineUsage(engine=engine, period=window,
+                                                    period_start=period_start, requests=requests))
+                    session.commit()
+                    return True
+                except IntegrityError:
+                    # Another process created the window row first; retry as an update
+                    session.rollback()
+            return False
+        except SQLAlchemyError as e:
+            session.rollback()
+            print(f"Error recording engine usage: {e}")
+            return False
+        finally:
+            session.close()
+
+    def get_engine_usage(self, day=None):
+        """Return {engine: {'day': requests, 'month': requests}} for the current windows"""
+        if not self.db_available:
+            return {}
+
+        session = self.get_session()
+        if not session:
+            return {}
+
+        day = day or datetime.utcnow().date()
+        try:
+            rows = session.query(EngineUsage)\
+                .filter(
+                    ((EngineUsage.period == 'day') & (EngineUsage.period_start == day)) |
+                    ((EngineUsage.period == 'month') & (EngineUsage.period_start == date(day.year, day.month, 1)))
+                )\
+                .all()
+
+            usage = {}
+            for row in rows:
+                usage.setdefault(row.engine, {'day': 0, 'month': 0})[row.period] = row.requests or 0
+            return usage
+        except SQLAlchemyError as e:
+            print(f"Error getting engine usage: {e}")
+            return {}
+        finally:
+            session.close()
+
+    def get_trending_opportunities(self, limit=5):
+        """Read the precomputed top-N trending opportunities (see trending.py)"""
+        if not self.db_available:
+            return []
+
+        session = self.get_session()
+        if not session:
+            return []
+
+        try:
+            rows = session.query(TrendingScore, Opportunity)\
+                .join(Opportunity, TrendingScore.opportunity_id == Opportunity.id)\
+                .filter(TrendingScore.kind == 'opportunity')\
+                .order_by(TrendingScore.score.desc())\
+                .limit(limit)\
+                .all()
+
+            return [dict(opportunity_to_dict(o), trending_score=t.score, trending_events=t.events)
+                    for t, o in rows]
+        except SQLAlchemyError as e:
+            print(f"Error getting trending opportunities: {e}")
+            return []
+        finally:
+            session.close()
+
+    def get_trending_queries(self, limit=5):
+        """Read the precomputed top-N trending search queries"""
+        if not self.db_available:
+            return []
+
+        session = self.get_session()
+        if not session:
+            return []
+
+        try:
+            rows = session.query(TrendingScore)\
+                .filter(TrendingScore.kind == 'query')\
+                .order_by(TrendingScore.score.desc())\
+                .limit(limit)\
+                .all()
+
+            return [{'query': t.label, 'score': t.score, 'events': t.events} for t in rows]
+        except SQLAlchemyError as e:
+            print(f"Error getting trending queries: {e}")
+            return []
+        finally:
+            session.close()
+
+    def enqueue_reminders(self, reminders):
+        """Write fired reminders to the outbox, skipping ones already there; returns rows added"""
+        if not self.db_available or not reminders:
+            return 0
+
+        session = self.get_session()
+        if not session:
+            return 0
+
+        try:
+            added = session.execute(enqueue_reminders_statement(self.engine.dialect.name, reminders)).rowcount
+            session.commit()
+            return added
+        except SQLAlchemyError as e:
+            session.rollback()
+            print(f"Error enqueuing reminders: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def get_pending_reminders(self, user_session=None, limit=20):
+        """Undelivered reminders, closest deadline first; all users when user_session is None"""
+        if not self.db_available:
+            return []
+
+        session = self.get_session()
+        if not session:
+            return []
+
+        try:
+            query = session.query(ReminderOutbox)\
+                .filter(ReminderOutbox.delivered_at.is_(None))
+            if user_session is not None:
+                query = query.filter(ReminderOutbox.user_session == user_session)
+            rows = query.order_by(ReminderOutbox.deadline, ReminderOutbox.id)\
+                .limit(limit)\
+                .all()
+
+            return [reminder_to_dict(r) for r in rows]
+        except SQLAlchemyError as e:
+            print(f"Error getting pending reminders: {e}")
+            return []
+        finally:
+            session.close()
+
+    def claim_pending_reminders(self, claimed_by, limit=100, lease_seconds=600):
+        """Claim undelivered reminders for one delivery run; returns the rows this run now holds
+
+        claimed_by must be unique to the run. The claim is a conditional UPDATE,
+        so when every server process delivers each reminder still goes to one
+        of them. Claims of a run that died or failed to send expire after
+        lease_seconds and the reminder is claimed again.
+        """
+        if not self.db_available:
+            return []
+
+        session = self.get_session()
+        if not session:
+            return []
+
+        try:
+            now = datetime.utcnow()
+            ids = [row.id for row in session.query(ReminderOutbox.id)
+                   .filter(claimable_reminders(now, lease_seconds))
+                   .order_by(ReminderOutbox.deadline, ReminderOutbox.id)
+                   .limit(limit)
+                   .with_for_update(skip_locked=True)
+                   .all()]
+            if not ids:
+                session.rollback()
+                return []
+            session.query(ReminderOutbox)\
+                .filter(ReminderOutbox.id.in_(ids))\
+                .filter(claimable_reminders(now, lease_seconds))\
+                .update({ReminderOutbox.claimed_by: claimed_by, ReminderOutbox.claimed_at: now},
+                        synchronize_session=False)
+            session.commit()
+
+            rows = session.query(ReminderOutbox)\
+                .filter(ReminderOutbox.claimed_by == claimed_by)\
+                .filter(ReminderOutbox.delivered_at.is_(None))\
+                .order_by(ReminderOutbox.deadline, ReminderOutbox.id)\
+                .all()
+            return [reminder_to_dict(r) for r in rows]
+        except SQLAlchemyError as e:
+            session.rollback()
+            print(f"Error claiming reminders: {e}")
+            return []
+        finally:
+            session.close()
+
+    def mark_reminders_delivered(self, reminder_ids):
+        """Take delivered reminders out of the outbox queue"""
+        if not self.db_available or not reminder_ids:
+            return False
+
+        session = self.get_session()
+        if not session:
+            return False
+
+        try:
+            session.query(ReminderOutbox)\
+                .filter(ReminderOutbox.id.in_(list(reminder_ids)))\
+                .filter(ReminderOutbox.delivered_at.is_(None))\
+                .update({ReminderOutbox.delivered_at: datetime.utcnow()}, synchronize_session=False)
+            session.commit()
+            return True
+        except SQLAlchemyError as e:
+            session.rollback()
+            print(f"Error marking reminders delivered: {e}")
+            return False
+        finally:
+            session.close()
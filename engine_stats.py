@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from collections import deque
+
+from request_policy import LatencyTracker
+
+STATS_WINDOW = 200  # Calls kept per engine
+AUTO_MIN_SAMPLES = 5  # Engines with fewer calls are always tried (exploration)
+AUTO_MAX_ENGINES = int(os.getenv('AUTO_MAX_ENGINES', '2'))
+# An engine auto mode left out this long gets called again, so its stats can recover
+AUTO_RESAMPLE_SECONDS = int(os.getenv('AUTO_RESAMPLE_SECONDS', '900'))
+
+
+class EngineStats:
+    """Rolling per-engine statistics over the last STATS_WINDOW calls"""
+
+    def __init__(self, window=STATS_WINDOW):
+        self.latency = LatencyTracker(window)
+        self._calls = deque(maxlen=window)  # (error, results, eligible)
+        self._overlap = deque(maxlen=window)  # (results, duplicates)
+        self._lock = threading.Lock()
+        self.last_call_at = None  # time.monotonic() of the newest call
+
+    def record_call(self, seconds, results, eligible, error=False):
+        if not error:
+            self.latency.record(seconds)
+        with self._lock:
+            self._calls.append((error, results, eligible))
+            self.last_call_at = time.monotonic()
+
+    def record_overlap(self, results, duplicates):
+        with self._lock:
+            self._overlap.append((results, duplicates))
+
+    def summary(self):
+        with self._lock:
+            calls = list(self._calls)
+            overlap = list(self._overlap)
+        p50 = self.latency.percentile(0.5)
+        total_results = sum(results for results, _ in overlap)
+        overlap_rate = sum(duplicates for _, duplicates in overlap) / total_results if total_results else 0.0
+        eligible_per_call = sum(eligible for _, _, eligible in calls) / len(calls) if calls else 0.0
+        # Eligible results this engine adds on top of the others, per millisecond
+        marginal_yield = eligible_per_call * (1 - overlap_rate)
+        return {
+            'calls': len(calls),
+            'p50_ms': p50 * 1000 if p50 is not None else None,
+            'p95_ms': self.latency.percentile(0.95) * 1000 if p50 is not None else None,
+            'error_rate': sum(1 for error, _, _ in calls if error) / len(calls) if calls else 0.0,
+            'results_per_call': sum(results for _, results, _ in calls) / len(calls) if calls else 0.0,
+            'eligible_per_call': eligible_per_call,
+            'overlap_rate': overlap_rate,
+            'yield_per_ms': marginal_yield / max(p50 * 1000, 1.0) if p50 is not None else 0.0
+        }
+
+
+class EngineStatsRegistry:
+    """Per-engine stats for one data mode (real or mock) and the auto-mode ranking"""
+
+    def __init__(self):
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    def get(self, engine):
+        with self._lock:
+            if engine not in self._engines:
+                self._engines[engine] = EngineStats()
+            return self._engines[engine]
+
+    def summaries(self):
+        with self._lock:
+            engines = dict(self._engines)
+        return {engine: stats.summary() for engine, stats in engines.items()}
+
+    def rank(self, engines):
+        """Best marginal yield per millisecond first; penalized by error rate"""
+        def score(engine):
+            summary = self.get(engine).summary()
+            return summary['yield_per_ms'] * (1 - summary['error_rate'])
+        return sorted(engines, key=score, reverse=True)
+
+    def select(self, engines, max_engines=AUTO_MAX_ENGINES, resample_seconds=AUTO_RESAMPLE_SECONDS, now=None):
+        """Engines to call in auto mode: unexplored ones plus the top-ranked
+
+        Stats of an engine that is left out never change, so one slow or
+        failing spell would lock it out for good; the engine left out the
+        longest is added back once its newest call is resample_seconds old.
+        """
+        unexplored = [engine for engine in engines if self.get(engine).summary()['calls'] < AUTO_MIN_SAMPLES]
+        ranked = [engine for engine in self.rank(engines) if engine not in unexplored]
+        chosen = unexplored + ranked[:max(max_engines - len(unexplored), 0)]
+        chosen = chosen or ranked[:1]
+        now = time.monotonic() if now is None else now
+        stale = [engine for engine in ranked
+                 if engine not in chosen and now - self.get(engine).last_call_at >= resample_seconds]
+        if stale:
+            chosen.append(min(stale, key=lambda engine: self.get(engine).last_call_at))
+        return chosen
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_engine_stats(real_data):
+    """Return the process-wide stats registry for real or mock searches"""
+    key = 'real' if real_data else 'mock'
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = EngineStatsRegistry()
+        return _registries[key]
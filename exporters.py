@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime, timedelta
+
+from database import opportunity_fingerprint
+
+# Exports are handed to the browser from memory, so they are capped
+EXPORT_MAX_BYTES = int(os.getenv('EXPORT_MAX_BYTES', str(20 * 1024 * 1024)))
+
+EXPORT_FIELDS = [
+    'title', 'type', 'source', 'location', 'deadline', 'tocantins_eligible',
+    'url', 'search_engine', 'published_date', 'saved_at', 'description'
+]
+
+EXPORT_FORMATS = {
+    'csv': {'label': "CSV (planilha)", 'mime': "text/csv", 'extension': "csv"},
+    'jsonl': {'label': "JSON Lines", 'mime': "application/x-ndjson", 'extension': "jsonl"},
+    'ics': {'label': "iCalendar (prazos)", 'mime': "text/calendar", 'extension': "ics"}
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def iter_csv(rows, fields=EXPORT_FIELDS):
+    """Yield CSV text one row at a time"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({
+            field: value.isoformat() if isinstance(value, (datetime, date)) else value
+            for field, value in row.items()
+        })
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    remainder = buffer.getvalue()
+    if remainder:
+        yield remainder
+
+
+def iter_jsonl(rows, fields=EXPORT_FIELDS):
+    """Yield one JSON document per line"""
+    for row in rows:
+        yield json.dumps({field: row.get(field) for field in fields},
+                         ensure_ascii=False, default=_json_default) + '\n'
+
+
+def _ics_escape(value):
+    return (str(value or '')
+            .replace('\\', '\\\\')
+            .replace(';', '\\;')
+            .replace(',', '\\,')
+            .replace('\r\n', '\\n')
+            .replace('\n', '\\n'))
+
+
+def _ics_line(line):
+    """Fold a content line at 75 octets as required by RFC 5545"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts, current = [], b''
+    for ch in line:
+        piece = ch.encode('utf-8')
+        limit = 75 if not parts else 74  # continuation lines start with a space
+        if len(current) + len(piece) > limit:
+            parts.append(current.decode('utf-8'))
+            current = b''
+        current += piece
+    parts.append(current.decode('utf-8'))
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def iter_ics(rows, calendar_name="Prazos - Oportunidades Literárias"):
+    """Yield an iCalendar feed with one all-day event per deadline"""
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    yield ''.join(_ics_line(line) for line in [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Izy Hunter//Oportunidades Literarias Tocantins//PT',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_ics_escape(calendar_name)}'
+    ])
+    for row in rows:
+        deadline = row.get('deadline')
+        if not deadline:
+            continue
+        day = deadline.date() if isinstance(deadline, datetime) else deadline
+        # Same opportunity, same UID: calendar apps update the event on re-import
+        uid = row.get('fingerprint') or opportunity_fingerprint(row)
+        url = row.get('url') or ''
+        description = f"{row.get('description') or ''}\n\nFonte: {row.get('source') or ''}\n{url}".strip()
+        lines = [
+            'BEGIN:VEVENT',
+            f'UID:opportunity-{uid}@izy-hunter',
+            f'DTSTAMP:{stamp}',
+            f'DTSTART;VALUE=DATE:{day:%Y%m%d}',
+            f'DTEND;VALUE=DATE:{day + timedelta(days=1):%Y%m%d}',
+            f'SUMMARY:{_ics_escape("Prazo: " + (row.get("title") or ""))}',
+            f'DESCRIPTION:{_ics_escape(description)}'
+        ]
+        if url:
+            lines.append(f'URL:{url}')
+        lines.extend(['TRANSP:TRANSPARENT', 'END:VEVENT'])
+        yield ''.join(_ics_line(line) for line in lines)
+    yield _ics_line('END:VCALENDAR')
+
+
+EXPORT_WRITERS = {'csv': iter_csv, 'jsonl': iter_jsonl, 'ics': iter_ics}
+
+
+def iter_export(export_format, rows):
+    """Yield text chunks for rows in the given format"""
+    return EXPORT_WRITERS[export_format](rows)
+
+
+def write_export(export_format, rows, fileobj, max_bytes=None):
+    """Stream rows into a binary file object; returns the number of bytes written
+
+    Raises ValueError as soon as the output would exceed max_bytes.
+    """
+    written = 0
+    for chunk in iter_export(export_format, rows):
+        data = chunk.encode('utf-8')
+        if max_bytes is not None and written + len(data) > max_bytes:
+            raise ValueError(f"export exceeds {max_bytes} bytes")
+        fileobj.write(data)
+        written += len(data)
+    return written
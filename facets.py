@@ -0,0 +1,75 @@
+from collections import Counter
+from datetime import datetime
+
+FACET_NAMES = ('type', 'eligibility', 'search_engine', 'source', 'deadline')
+
+# (label, upper bound in days left); checked in order, first match wins
+DEADLINE_BUCKETS = [
+    ("Expirados", 0),
+    ("Próximos 7 dias", 7),
+    ("Próximos 30 dias", 30),
+    ("Próximos 90 dias", 90),
+    ("Mais de 90 dias", None)
+]
+
+ELIGIBLE_LABEL = "Elegíveis TO"
+NOT_ELIGIBLE_LABEL = "Não elegíveis TO"
+NO_DEADLINE_LABEL = "Sem prazo"
+
+
+class FacetEngine:
+    """Single-pass facet counter for a result set, updated incrementally per batch"""
+
+    def __init__(self, results=None, now=None):
+        self.now = now or datetime.now()
+        self.total = 0
+        self.counts = {name: Counter() for name in FACET_NAMES}
+        if results:
+            self.add_batch(results)
+
+    def _deadline_bucket(self, deadline):
+        if not deadline:
+            return NO_DEADLINE_LABEL
+        days_left = (deadline - self.now).total_seconds() / 86400
+        for label, upper in DEADLINE_BUCKETS:
+            if upper is None or days_left < upper:
+                return label
+        return DEADLINE_BUCKETS[-1][0]
+
+    def add(self, result):
+        """Count a single result in every facet"""
+        self.total += 1
+        counts = self.counts
+        counts['type'][result.get('type') or 'Outros'] += 1
+        counts['eligibility'][ELIGIBLE_LABEL if result.get('tocantins_eligible', False) else NOT_ELIGIBLE_LABEL] += 1
+        counts['search_engine'][result.get('search_engine') or 'Desconhecido'] += 1
+        counts['source'][result.get('source') or 'Site não identificado'] += 1
+        counts['deadline'][self._deadline_bucket(result.get('deadline'))] += 1
+
+    def add_batch(self, results):
+        """Fold a batch of results (e.g. one engine's answer) into the counts"""
+        for result in results:
+            self.add(result)
+        return self
+
+    def get(self, facet):
+        """Return the counts of one facet as a plain dict"""
+        return dict(self.counts[facet])
+
+    def count(self, facet, value):
+        """Count for a single facet value (0 when absent)"""
+        return self.counts[facet].get(value, 0)
+
+    def eligibility_summary(self):
+        """Same shape as FilterManager.get_eligibility_summary, without another pass"""
+        eligible = self.count('eligibility', ELIGIBLE_LABEL)
+        return {
+            'total': self.total,
+            'eligible': eligible,
+            'not_eligible': self.total - eligible,
+            'percentage_eligible': (eligible / self.total * 100) if self.total > 0 else 0
+        }
+
+    def format_option(self, facet, value):
+        """Label a filter option with its live count, e.g. 'Prêmios (3)'"""
+        return f"{value} ({self.count(facet, value)})"
@@ -1,4 +1,70 @@
-from datetime import datetime, timedelta
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+
+DEADLINE_WINDOWS = {
+    "Próximos 7 dias": 7,
+    "Próximos 30 dias": 30,
+    "Próximos 90 dias": 90
+}
+DEADLINE_FILTERS = ["Todos", "Ainda abertos", *DEADLINE_WINDOWS, "Intervalo personalizado"]
+
+def _as_datetime(value, end_of_day=False):
+    """Promote plain dates (e.g. from st.date_input) to datetimes"""
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, time.max if end_of_day else time.min)
+    return value
+
+class DeadlineIndex:
+    """Sorted deadline index answering date-range queries with bisect"""
+
+    def __init__(self, results):
+        self.results = results
+        entries = sorted(
+            ((r['deadline'], position) for position, r in enumerate(results) if r.get('deadline')),
+            key=lambda entry: entry[0]
+        )
+        self._deadlines = [deadline for deadline, _ in entries]
+        self._positions = [position for _, position in entries]
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def _slice(self, start=None, end=None):
+        start = _as_datetime(start)
+        end = _as_datetime(end, end_of_day=True)
+        lo = bisect_left(self._deadlines, start) if start is not None else 0
+        hi = bisect_right(self._deadlines, end) if end is not None else len(self._deadlines)
+        return lo, max(lo, hi)
+
+    def range(self, start=None, end=None):
+        """Return results with a deadline in [start, end], ordered by deadline"""
+        lo, hi = self._slice(start, end)
+        return [self.results[p] for p in self._positions[lo:hi]]
+
+    def range_in_original_order(self, start=None, end=None):
+        """Return results with a deadline in [start, end], keeping the input order"""
+        lo, hi = self._slice(start, end)
+        return [self.results[p] for p in sorted(self._positions[lo:hi])]
+
+    def count(self, start=None, end=None):
+        """Count results with a deadline in [start, end]"""
+        lo, hi = self._slice(start, end)
+        return hi - lo
+
+    def still_open(self, now=None):
+        """Results whose deadline has not passed yet"""
+        return self.range(start=now or datetime.now())
+
+    def closing_within(self, days, now=None):
+        """Results closing in the next `days` days (expired ones excluded)"""
+        now = now or datetime.now()
+        return self.range(now, now + timedelta(days=days))
+
+    def closing_this_week(self, now=None):
+        """Results closing in the next 7 days"""
+        return self.closing_within(7, now)
 
 class FilterManager:
     def __init__(self):
@@ -6,11 +72,20 @@ class FilterManager:
             "TO", "Tocantins", "Palmas", "Araguaína", "Gurupi", 
             "Nacional", "todos os estados", "Região Norte"
         ]
+        self._deadline_index = None
+    
+    def get_deadline_index(self, results):
+        """Return the deadline index for a result set, building it only once"""
+        if self._deadline_index is None or self._deadline_index.results is not results:
+            self._deadline_index = DeadlineIndex(results)
+        return self._deadline_index
     
     def apply_filters(self, results, include_tocantins=True, exclude_other_states=False, 
-                     national_only=False, opportunity_types=None, deadline_filter="Todos"):
+                     national_only=False, opportunity_types=None, deadline_filter="Todos",
+                     deadline_range=None):
         """Apply all filters to search results"""
-        filtered_results = results.copy()
+        # Deadline filter first: it is answered by the index over the full result set
+        filtered_results = self._apply_deadline_filter(results, deadline_filter, deadline_range)
         
         # Regional filters
         if include_tocantins and not national_only:
@@ -28,9 +103,6 @@ class FilterManager:
         if opportunity_types:
             filtered_results = [r for r in filtered_results if r.get('type') in opportunity_types]
         
-        # Deadline filter
-        filtered_results = self._apply_deadline_filter(filtered_results, deadline_filter)
-        
         return filtered_results
     
     def _is_national_or_tocantins(self, location):
@@ -45,23 +117,21 @@ class FilterManager:
         return any(indicator.lower() in location_lower for indicator in 
                   ["nacional", "todos os estados"])
     
-    def _apply_deadline_filter(self, results, deadline_filter):
+    def _apply_deadline_filter(self, results, deadline_filter, deadline_range=None):
         """Apply deadline filtering"""
-        if deadline_filter == "Todos":
-            return results
-        
         now = datetime.now()
         
-        if deadline_filter == "Próximos 7 dias":
-            cutoff = now + timedelta(days=7)
-        elif deadline_filter == "Próximos 30 dias":
-            cutoff = now + timedelta(days=30)
-        elif deadline_filter == "Próximos 90 dias":
-            cutoff = now + timedelta(days=90)
+        if deadline_filter == "Ainda abertos":
+            start, end = now, None
+        elif deadline_filter in DEADLINE_WINDOWS:
+            start, end = now, now + timedelta(days=DEADLINE_WINDOWS[deadline_filter])
+        elif deadline_filter == "Intervalo personalizado" and deadline_range:
+            start, end = deadline_range
         else:
-            return results
+            return list(results)
         
-        return [r for r in results if r.get('deadline') and r['deadline'] <= cutoff]
+        index = self.get_deadline_index(results)
+        return index.range_in_original_order(start, end)
     
     def get_eligibility_summary(self, results):
         """Get summary of eligibility for results"""
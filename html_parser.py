@@ -0,0 +1,154 @@
+import os
+import re
+from urllib.parse import urlparse, parse_qs, unquote
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxHTMLParser
+except ImportError:
+    SelectolaxHTMLParser = None
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+# DuckDuckGo HTML endpoint markup
+RESULT_CLASS = "result"
+TITLE_CLASS = "result__a"
+SNIPPET_CLASS = "result__snippet"
+
+# Matched against the raw class attribute while parsing, where it is not split yet
+RESULT_CLASS_RE = re.compile(r'(^|\s)%s(\s|$)' % RESULT_CLASS)
+
+CHUNK_SIZE = 16 * 1024
+
+
+def clean_result_url(href):
+    """Unwrap DuckDuckGo redirect links (//duckduckgo.com/l/?uddg=...)"""
+    if not href:
+        return ''
+    if 'uddg=' in href:
+        target = parse_qs(urlparse(href).query).get('uddg')
+        if target:
+            return unquote(target[0])
+    if href.startswith('//'):
+        return 'https:' + href
+    return href
+
+
+def _has_class(class_attr, name):
+    return name in (class_attr or '').split()
+
+
+class BeautifulSoupParser:
+    """Pure-Python fallback; only builds the tree for result blocks"""
+
+    name = "html.parser"
+
+    @staticmethod
+    def available():
+        return True
+
+    def parse_results(self, html, limit=5):
+        strainer = SoupStrainer('div', attrs={'class': RESULT_CLASS_RE})
+        soup = BeautifulSoup(html, 'html.parser', parse_only=strainer)
+        results = []
+        for result_div in soup.find_all('div', class_=RESULT_CLASS):
+            title_elem = result_div.find('a', class_=TITLE_CLASS)
+            if not title_elem:
+                continue
+            desc_elem = result_div.find(class_=SNIPPET_CLASS)
+            results.append({
+                'title': title_elem.get_text(strip=True),
+                'url': clean_result_url(title_elem.get('href', '')),
+                'snippet': desc_elem.get_text(strip=True) if desc_elem else ''
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+
+class LxmlParser:
+    """Incremental libxml2 parser that stops feeding input once enough results are found"""
+
+    name = "lxml"
+
+    @staticmethod
+    def available():
+        return lxml_etree is not None
+
+    def _text(self, element):
+        return ' '.join(''.join(element.itertext()).split())
+
+    def parse_results(self, html, limit=5):
+        if isinstance(html, str):
+            html = html.encode('utf-8')
+        parser = lxml_etree.HTMLPullParser(events=('end',), tag='div')
+        results = []
+        for offset in range(0, len(html), CHUNK_SIZE):
+            parser.feed(html[offset:offset + CHUNK_SIZE])
+            for _, element in parser.read_events():
+                if not _has_class(element.get('class'), RESULT_CLASS):
+                    continue
+                title_elem = next((a for a in element.iter('a') if _has_class(a.get('class'), TITLE_CLASS)), None)
+                if title_elem is None:
+                    continue
+                desc_elem = next((e for e in element.iter() if _has_class(e.get('class'), SNIPPET_CLASS)), None)
+                results.append({
+                    'title': self._text(title_elem),
+                    'url': clean_result_url(title_elem.get('href', '')),
+                    'snippet': self._text(desc_elem) if desc_elem is not None else ''
+                })
+                if len(results) >= limit:
+                    return results
+        parser.close()
+        return results
+
+
+class SelectolaxParser:
+    """Lexbor-based parser with targeted CSS selectors"""
+
+    name = "selectolax"
+
+    @staticmethod
+    def available():
+        return SelectolaxHTMLParser is not None
+
+    def parse_results(self, html, limit=5):
+        tree = SelectolaxHTMLParser(html)
+        results = []
+        for node in tree.css(f'div.{RESULT_CLASS}'):
+            title_elem = node.css_first(f'a.{TITLE_CLASS}')
+            if title_elem is None:
+                continue
+            desc_elem = node.css_first(f'.{SNIPPET_CLASS}')
+            results.append({
+                'title': title_elem.text(strip=True),
+                'url': clean_result_url(title_elem.attributes.get('href') or ''),
+                'snippet': desc_elem.text(strip=True) if desc_elem is not None else ''
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+
+# Fastest first; html.parser is always available
+PARSER_BACKENDS = [SelectolaxParser, LxmlParser, BeautifulSoupParser]
+
+
+def get_html_parser(name=None):
+    """Return the requested backend, or the fastest installed one
+
+    The backend can be forced with the IZY_HTML_PARSER environment variable.
+    """
+    name = name or os.getenv('IZY_HTML_PARSER')
+    for backend in PARSER_BACKENDS:
+        if name and backend.name != name:
+            continue
+        if backend.available():
+            return backend()
+    if name:
+        print(f"HTML parser backend '{name}' not available, falling back to html.parser")
+    return BeautifulSoupParser()
@@ -0,0 +1,129 @@
+import math
+import os
+
+# Upstream requests allowed for one search, shared by the selected paid engines
+REQUEST_BUDGET = int(os.getenv('QUERY_PLANNER_REQUEST_BUDGET', '12'))
+# Sub-queries for each engine without a quota; not reduced by the paid engines
+FREE_ENGINE_BUDGET = int(os.getenv('QUERY_PLANNER_FREE_BUDGET', '6'))
+MAX_PARALLEL_SUBQUERIES = int(os.getenv('QUERY_PLANNER_MAX_PARALLEL', '4'))
+
+# Query syntax and size limits per engine. Engines without an OR operator get
+# one keyword per sub-query; max_group caps how many alternatives share one.
+ENGINE_QUERY_LIMITS = {
+    "Google": {'max_chars': 2048, 'max_words': 32, 'or_operator': "OR", 'max_group': 4},
+    "Yahoo!": {'max_chars': 1000, 'max_words': 32, 'or_operator': "OR", 'max_group': 4},
+    "Bravo Search": {'max_chars': 400, 'max_words': 50, 'or_operator': "OR", 'max_group': 4},
+    "DuckDuckGo": {'max_chars': 500, 'max_words': 20, 'or_operator': None, 'max_group': 1}
+}
+DEFAULT_QUERY_LIMITS = {'max_chars': 256, 'max_words': 10, 'or_operator': None, 'max_group': 1}
+
+
+def _quote(term):
+    return f'"{term}"' if ' ' in term else term
+
+
+def result_key(result):
+    """Identity used to merge duplicates: normalized URL, else title"""
+    url = (result.get('url') or '').strip().lower().rstrip('/')
+    return url or (result.get('title') or '').strip().lower()
+
+
+class QueryPlanner:
+    """Splits custom keywords into engine-sized sub-queries and merges their results"""
+
+    def __init__(self, limits=ENGINE_QUERY_LIMITS, request_budget=REQUEST_BUDGET,
+                 free_engine_budget=FREE_ENGINE_BUDGET):
+        self.limits = limits
+        self.request_budget = request_budget
+        self.free_engine_budget = free_engine_budget
+
+    def engine_budgets(self, engines, free_engines=()):
+        """Sub-queries each engine may send: paid engines share the request budget"""
+        paid = [engine for engine in engines if engine not in free_engines]
+        paid_budget = max(1, self.request_budget // max(len(paid), 1))
+        return {engine: self.free_engine_budget if engine in free_engines else paid_budget for engine in engines}
+
+    @staticmethod
+    def _terms(custom_keywords):
+        """Keywords with whitespace collapsed and case-insensitive duplicates removed"""
+        terms, seen = [], set()
+        for keyword in custom_keywords or []:
+            term = ' '.join(keyword.split())
+            if term and term.lower() not in seen:
+                seen.add(term.lower())
+                terms.append(term)
+        return terms
+
+    def format_subquery(self, engine, query, terms):
+        limits = self.limits.get(engine, DEFAULT_QUERY_LIMITS)
+        query = ' '.join((query or '').split())
+        if not terms:
+            return query
+        quoted = [_quote(term) for term in terms]
+        if len(quoted) == 1:
+            alternatives = quoted[0]
+        else:
+            alternatives = f" {limits['or_operator']} ".join(quoted)
+            if query:
+                alternatives = f"({alternatives})"
+        return f"{query} {alternatives}".strip()
+
+    def _fits(self, engine, query, terms):
+        limits = self.limits.get(engine, DEFAULT_QUERY_LIMITS)
+        subquery = self.format_subquery(engine, query, terms)
+        return len(subquery) <= limits['max_chars'] and len(subquery.split()) <= limits['max_words']
+
+    def _pack(self, engine, query, terms, max_group):
+        groups = []
+        for term in terms:
+            if groups and len(groups[-1]) < max_group and self._fits(engine, query, groups[-1] + [term]):
+                groups[-1].append(term)
+            else:
+                groups.append([term])
+        return groups
+
+    def plan(self, engine, query, custom_keywords, budget=None):
+        """Return [(sub-query string, keywords it covers)], at most budget entries
+
+        Keywords keep their order, so when the budget is too small for every
+        keyword the ones at the end of the list are the ones left out.
+        """
+        budget = budget or self.request_budget
+        limits = self.limits.get(engine, DEFAULT_QUERY_LIMITS)
+        terms = self._terms(custom_keywords)
+        if not terms:
+            return [(self.format_subquery(engine, query, []), [])]
+
+        max_group = limits['max_group'] if limits['or_operator'] else 1
+        groups = self._pack(engine, query, terms, max_group)
+        if len(groups) > budget and limits['or_operator']:
+            # Fewer, wider sub-queries before dropping anything
+            groups = self._pack(engine, query, terms, max(max_group, math.ceil(len(terms) / budget)))
+        return [(self.format_subquery(engine, query, group), group) for group in groups[:budget]]
+
+    def left_out(self, subqueries, custom_keywords):
+        """Keywords a plan from plan() does not search for"""
+        covered = {term for _, group in subqueries for term in group}
+        return [term for term in self._terms(custom_keywords) if term not in covered]
+
+    @staticmethod
+    def merge_ranked(batches):
+        """Merge per-sub-query result lists; documents hit by more sub-queries rank first"""
+        merged = {}
+        for batch in batches:
+            seen = set()
+            for position, result in enumerate(batch):
+                key = result_key(result)
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+                entry = merged.get(key)
+                if entry is None:
+                    merged[key] = {'result': result, 'hits': 1, 'best': position, 'order': len(merged)}
+                else:
+                    entry['hits'] += 1
+                    entry['best'] = min(entry['best'], position)
+        ranked = sorted(merged.values(), key=lambda entry: (-entry['hits'], entry['best'], entry['order']))
+        for entry in ranked:
+            entry['result']['query_hits'] = entry['hits']
+        return [entry['result'] for entry in ranked]
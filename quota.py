@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+
+# Plan limits per engine and window; None means unlimited. Engines missing
+# here (DuckDuckGo scraping, mock data) are free.
+ENGINE_QUOTAS = {
+    "Google": {'day': int(os.getenv('GOOGLE_DAILY_QUOTA', '100')), 'month': None},
+    "Yahoo!": {'day': int(os.getenv('YAHOO_DAILY_QUOTA', '1000')), 'month': None},
+    "Bravo Search": {'day': None, 'month': int(os.getenv('BRAVO_MONTHLY_QUOTA', '2000'))}
+}
+# Below this share of a window left, an engine is only used when the
+# cached/free engines came back with fewer than QUOTA_MIN_RESULTS results
+QUOTA_RESERVE_FRACTION = float(os.getenv('QUOTA_RESERVE_FRACTION', '0.1'))
+QUOTA_MIN_RESULTS = int(os.getenv('QUOTA_MIN_RESULTS', '10'))
+USAGE_REFRESH_SECONDS = 30
+
+WINDOW_LABELS = {'day': "hoje", 'month': "no mês"}
+
+
+def is_free_engine(engine, quotas=ENGINE_QUOTAS):
+    limits = quotas.get(engine)
+    return not limits or all(limit is None for limit in limits.values())
+
+
+class QuotaScheduler:
+    """Tracks per-engine usage in the database and decides which engines may run"""
+
+    def __init__(self, db_manager, quotas=ENGINE_QUOTAS, refresh_seconds=USAGE_REFRESH_SECONDS):
+        self.db_manager = db_manager
+        self.quotas = quotas
+        self.refresh_seconds = refresh_seconds
+        self._usage = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def usage(self, engine):
+        """Requests used in the current {'day', 'month'} windows (shared across processes)"""
+        with self._lock:
+            if time.monotonic() - self._loaded_at > self.refresh_seconds:
+                self._usage = self.db_manager.get_engine_usage()
+                self._loaded_at = time.monotonic()
+            return dict(self._usage.get(engine, {'day': 0, 'month': 0}))
+
+    def record(self, engine, requests=1):
+        self.db_manager.record_engine_usage(engine, requests)
+        self._count(engine, requests)
+
+    def try_record(self, engine, requests=1, daily_limit=None):
+        """Record requests only if the engine's daily usage stays within daily_limit
+
+        The check runs in the database, so processes sharing it share the limit.
+        """
+        if not self.db_manager.record_engine_usage(engine, requests, daily_limit=daily_limit):
+            return False
+        self._count(engine, requests)
+        return True
+
+    def _count(self, engine, requests):
+        with self._lock:
+            counts = self._usage.setdefault(engine, {'day': 0, 'month': 0})
+            counts['day'] += requests
+            counts['month'] += requests
+
+    def is_free(self, engine):
+        return is_free_engine(engine, self.quotas)
+
+    def remaining(self, engine):
+        """Requests left in the tightest window, or None when the engine is free"""
+        if self.is_free(engine):
+            return None
+        used = self.usage(engine)
+        return max(min(limit - used.get(window, 0)
+                       for window, limit in self.quotas[engine].items() if limit is not None), 0)
+
+    def in_reserve(self, engine):
+        """True when any window is below the reserve share"""
+        if self.is_free(engine):
+            return False
+        used = self.usage(engine)
+        return any(limit - used.get(window, 0) < limit * QUOTA_RESERVE_FRACTION
+                   for window, limit in self.quotas[engine].items() if limit is not None)
+
+    def budget_for(self, engine, budget):
+        """Cap a per-search request budget by what is left of the engine's quota"""
+        remaining = self.remaining(engine)
+        return budget if remaining is None else max(min(budget, remaining), 0)
+
+    def schedule(self, engines, cached=()):
+        """Split engines into (run now, run only if needed, skipped)
+
+        Cached engines cost nothing and free engines come next; paid engines
+        run in order of how much quota they have left.
+        """
+        primary, reserve, exhausted = [], [], []
+        for engine in engines:
+            if engine in cached or self.is_free(engine):
+                primary.append(engine)
+            elif self.remaining(engine) <= 0:
+                exhausted.append(engine)
+            elif self.in_reserve(engine):
+                reserve.append(engine)
+            else:
+                primary.append(engine)
+
+        def priority(engine):
+            if engine in cached:
+                return (0, 0)
+            remaining = self.remaining(engine)
+            return (1, 0) if remaining is None else (2, -remaining)
+
+        return sorted(primary, key=priority), sorted(reserve, key=priority), exhausted
+
+    def describe(self, engine):
+        """Human-readable remaining quota for the config UI"""
+        if self.is_free(engine):
+            return "Sem cota (uso livre)"
+        used = self.usage(engine)
+        return " · ".join(
+            f"{max(limit - used.get(window, 0), 0)}/{limit} restantes {WINDOW_LABELS[window]}"
+            for window, limit in self.quotas[engine].items() if limit is not None
+        )
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_quota_scheduler(db_manager):
+    """Return the process-wide quota scheduler, or None without a database"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None and db_manager.db_available:
+            _scheduler = QuotaScheduler(db_manager)
+        return _scheduler
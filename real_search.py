@@ -1,11 +1,13 @@
 import requests
-from bs4 import BeautifulSoup
 import time
 from datetime import datetime, timedelta
 import re
 from urllib.parse import urljoin, quote_plus
 import json
 import urllib.parse
+from html_parser import get_html_parser
+from request_policy import get_policy
+from classifier import get_classifier
 
 class RealSearchEngine:
     def __init__(self):
@@ -14,6 +16,9 @@ class RealSearchEngine:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
         self.delay = 2  # Delay between requests to be respectful
+        self.html_parser = get_html_parser()
+        self.classifier = get_classifier()
+        self.max_results = 5
         
     def search_google_web(self, query, custom_keywords, max_results=10):
         """
@@ -145,22 +150,27 @@ class RealSearchEngine:
         
         return cultural_results
     
-    def search_duckduckgo(self, query, custom_keywords):
+    def search_duckduckgo(self, query, custom_keywords, raw_query=None):
         """
         Search DuckDuckGo for literary opportunities
+        raw_query (a sub-query from the query planner) is sent as-is
         """
         results = []
         
-        # Combine query with custom keywords
-        search_terms = [query] + custom_keywords if query else custom_keywords
-        full_query = ' '.join(search_terms[:5])  # Limit to avoid too long queries
-        
-        # Add specific terms for literary opportunities
-        literary_terms = "concurso literário OR prêmio literatura OR edital cultural"
-        tocantins_terms = "Tocantins OR nacional OR Brasil"
-        
-        final_query = f"{full_query} {literary_terms} {tocantins_terms}"
+        if raw_query:
+            final_query = raw_query
+        else:
+            # Combine query with custom keywords
+            search_terms = [query] + custom_keywords if query else custom_keywords
+            full_query = ' '.join(search_terms[:5])  # Limit to avoid too long queries
+            
+            # Add specific terms for literary opportunities
+            literary_terms = "concurso literário OR prêmio literatura OR edital cultural"
+            tocantins_terms = "Tocantins OR nacional OR Brasil"
+            
+            final_query = f"{full_query} {literary_terms} {tocantins_terms}"
         encoded_query = urllib.parse.quote_plus(final_query)
+        parse_errors = 0
         
         try:
             # DuckDuckGo search URL
@@ -170,65 +180,22 @@ class RealSearchEngine:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
             
-            response = self.session.get(url, headers=headers, timeout=10)
+            response = get_policy('DuckDuckGo').get(url, session=self.session, headers=headers, timeout=10)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
+                # Parse DuckDuckGo results, stopping once enough are found
+                search_results = self.html_parser.parse_results(response.content, limit=self.max_results)
                 
-                # Parse DuckDuckGo results
-                search_results = soup.find_all('div', class_='result')
-                
-                for result_div in search_results[:5]:  # Limit to first 5 results
+                for parsed in search_results:
                     try:
-                        # Extract title
-                        title_elem = result_div.find('a', class_='result__a')
-                        if not title_elem:
-                            continue
-                        
-                        title = title_elem.get_text(strip=True)
-                        url = title_elem.get('href', '')
-                        
-                        # Extract description
-                        desc_elem = result_div.find('div', class_='result__snippet')
-                        description = desc_elem.get_text(strip=True) if desc_elem else "Descrição não disponível"
-                        
-                        # Determine source from URL
-                        source = "Site não identificado"
-                        if 'cultura.gov.br' in url:
-                            source = "Ministério da Cultura"
-                        elif 'funarte.gov.br' in url:
-                            source = "Funarte"
-                        elif 'secult.to.gov.br' in url:
-                            source = "Secretaria de Cultura - TO"
-                        elif 'itaucultural.org.br' in url:
-                            source = "Itaú Cultural"
-                        elif 'sesc' in url:
-                            source = "SESC"
+                        title = parsed['title']
+                        url = parsed['url']
+                        description = parsed['snippet'] or "Descrição não disponível"
                         
-                        # Determine opportunity type
-                        opp_type = "Outros"
-                        title_lower = title.lower()
-                        if any(word in title_lower for word in ['concurso', 'competição']):
-                            opp_type = "Concursos Literários"
-                        elif any(word in title_lower for word in ['edital', 'chamada']):
-                            opp_type = "Editais Culturais"
-                        elif 'prêmio' in title_lower:
-                            opp_type = "Prêmios"
-                        elif 'festival' in title_lower:
-                            opp_type = "Festivais"
-                        elif 'antologia' in title_lower:
-                            opp_type = "Antologias"
-                        
-                        # Determine location and eligibility
-                        location = "Nacional (todos os estados)"
-                        tocantins_eligible = True
-                        
-                        if 'tocantins' in description.lower() or 'TO' in description:
-                            location = "Tocantins"
-                            tocantins_eligible = True
-                        elif any(state in description.lower() for state in ['sp', 'rj', 'mg', 'rs']):
-                            location = "Específico por estado"
-                            tocantins_eligible = False
+                        # Type, source and eligibility come from the shared classifier
+                        classification = self.classifier.classify({
+                            'title': title, 'description': description, 'url': url
+                        })
                         
                         # Try to extract deadline
                         deadline = self.extract_deadline_from_text(description)
@@ -239,11 +206,11 @@ class RealSearchEngine:
                             'title': title,
                             'url': url,
                             'description': description,
-                            'source': source,
-                            'type': opp_type,
-                            'location': location,
+                            'source': classification['source'],
+                            'type': classification['type'],
+                            'location': classification['location'],
                             'deadline': deadline,
-                            'tocantins_eligible': tocantins_eligible,
+                            'tocantins_eligible': classification['tocantins_eligible'],
                             'search_engine': 'DuckDuckGo',
                             'published_date': datetime.now() - timedelta(days=1),
                             'is_real_data': True,
@@ -254,7 +221,14 @@ class RealSearchEngine:
                         
                     except Exception as e:
                         print(f"Error parsing DuckDuckGo result: {e}")
+                        parse_errors += 1
                         continue
+            else:
+                # Throttled clients get a 202 challenge page instead of results
+                raise requests.HTTPError(f"DuckDuckGo returned HTTP {response.status_code}", response=response)
+            
+            if not results and parse_errors:
+                raise ValueError(f"none of the {parse_errors} DuckDuckGo results could be parsed")
             
             # If no real results, provide structured examples
             if not results:
@@ -280,7 +254,8 @@ class RealSearchEngine:
             
         except Exception as e:
             print(f"Error in DuckDuckGo search: {e}")
-            return []
+            # Raised so the engine's error rate sees the failure
+            raise
     
     def get_real_opportunities(self, query, custom_keywords, selected_engines):
         """
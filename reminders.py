@@ -0,0 +1,274 @@
+import heapq
+import itertools
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import SavedSearch, Opportunity
+
+# Hours before a deadline at which a reminder fires, longest first
+REMINDER_LEAD_HOURS = sorted(
+    {int(hours) for hours in os.getenv('REMINDER_LEAD_HOURS', '168,72,24').split(',') if hours.strip()},
+    reverse=True
+)
+# Deadlines are pulled into the heap one window at a time, so the heap only
+# holds reminders that can fire before the next load
+LOAD_WINDOW_HOURS = int(os.getenv('REMINDER_LOAD_WINDOW_HOURS', '24'))
+# How often saves made after the last load are picked up (by id watermark),
+# along with deadlines that search upserts moved into the loaded window
+NEW_SAVES_INTERVAL_SECONDS = int(os.getenv('REMINDER_NEW_SAVES_INTERVAL', '60'))
+# Catalog changes are re-read this far behind the last check, for writes
+# that committed after it
+CHANGE_LAG_SECONDS = 300
+# '' keeps reminders in the outbox, where the app shows them in "Buscas Salvas"
+REMINDER_NOTIFIER = os.getenv('REMINDER_NOTIFIER', '')
+# A claimed reminder that was not sent (failure, crashed process) is claimed again after this
+REMINDER_CLAIM_SECONDS = int(os.getenv('REMINDER_CLAIM_SECONDS', '600'))
+
+
+class LogNotifier:
+    """Local stand-in for a real channel (e-mail, push): prints each reminder"""
+
+    def send(self, reminder):
+        print(f"Reminder for {reminder['user_session']}: '{reminder['title']}' closes "
+              f"{reminder['deadline']:%d/%m/%Y} ({reminder['lead_hours']}h notice)")
+        return True
+
+
+NOTIFIERS = {'log': LogNotifier}
+
+
+class ReminderScheduler:
+    """Fires deadline reminders for saved opportunities from a min-heap keyed by due time
+
+    Rows are read only when their deadline enters the load window, when
+    they were saved after the last read or when their deadline changed, all
+    through range queries; a tick never scans saved_searches.
+    """
+
+    def __init__(self, db_manager, notifier=None, lead_hours=REMINDER_LEAD_HOURS,
+                 window_hours=LOAD_WINDOW_HOURS, new_saves_interval=NEW_SAVES_INTERVAL_SECONDS,
+                 batch_size=500, claim_seconds=REMINDER_CLAIM_SECONDS):
+        self.db_manager = db_manager
+        self.notifier = notifier
+        self.claim_seconds = claim_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.lead_hours = sorted(set(lead_hours), reverse=True)
+        self.max_lead = timedelta(hours=self.lead_hours[0]) if self.lead_hours else timedelta(0)
+        self.window = timedelta(hours=window_hours)
+        self.new_saves_interval = timedelta(seconds=new_saves_interval)
+        self.batch_size = batch_size
+        self._heap = []  # (due_at, seq, reminder)
+        self._queued = set()  # (saved_id, lead_hours, deadline) already in the heap
+        self._seq = itertools.count()
+        self._loaded_until = None  # Every deadline up to here has been read
+        self._next_load_at = None
+        self._last_saved_id = 0
+        self._next_saves_check = None
+        self._changes_checked_at = None  # Wall clock: catalog rows updated before this were read
+
+    def _due_times(self, deadline, saved_at, now):
+        due = [(deadline - timedelta(hours=lead), lead) for lead in self.lead_hours]
+        # A lead time that had already passed when the user saved never fires
+        due = [(due_at, lead) for due_at, lead in due if saved_at is None or due_at >= saved_at]
+        upcoming = [item for item in due if item[0] > now]
+        passed = [item for item in due if item[0] <= now]
+        # After downtime only the most recent missed reminder still makes sense
+        return upcoming + ([max(passed)] if passed else [])
+
+    def _push(self, saved_id, saved_at, user_session, opportunity_id, title, url, deadline, now):
+        if deadline is None or deadline <= now:
+            return
+        for due_at, lead in self._due_times(deadline, saved_at, now):
+            key = (saved_id, lead, deadline)
+            if key in self._queued:
+                continue
+            self._queued.add(key)
+            heapq.heappush(self._heap, (due_at, next(self._seq), {
+                'saved_id': saved_id, 'user_session': user_session, 'opportunity_id': opportunity_id,
+                'title': title, 'url': url, 'deadline': deadline, 'lead_hours': lead, 'due_at': due_at
+            }))
+
+    def _columns(self, session):
+        return session.query(SavedSearch.id, SavedSearch.saved_at, SavedSearch.user_session,
+                             Opportunity.id, Opportunity.title, Opportunity.url, Opportunity.deadline)\
+            .join(Opportunity, SavedSearch.opportunity_id == Opportunity.id)
+
+    def _load_window(self, session, now):
+        """Read saved opportunities whose deadline falls in the next window (keyset-paginated)"""
+        if self._loaded_until is None:
+            # Saves up to here are covered by window loads from now on
+            self._last_saved_id = session.query(SavedSearch.id).order_by(SavedSearch.id.desc()).limit(1).scalar() or 0
+            self._next_saves_check = now + self.new_saves_interval
+            self._changes_checked_at = datetime.utcnow()
+        lower = max(self._loaded_until or now, now)
+        upper = now + self.max_lead + self.window
+        cursor = None
+        while True:
+            query = self._columns(session)\
+                .filter(Opportunity.deadline > lower)\
+                .filter(Opportunity.deadline <= upper)
+            if cursor:
+                query = query.filter(or_(Opportunity.deadline > cursor[0],
+                                         and_(Opportunity.deadline == cursor[0], SavedSearch.id > cursor[1])))
+            rows = query.order_by(Opportunity.deadline, SavedSearch.id).limit(self.batch_size).all()
+            for row in rows:
+                self._push(*row, now)
+            if len(rows) < self.batch_size:
+                break
+            cursor = (rows[-1][6], rows[-1][0])
+        self._loaded_until = upper
+        # Reload while the longest lead of the next window is still ahead
+        self._next_load_at = now + self.window / 2
+
+    def _load_new_saves(self, session, now):
+        """Saves made since the last read whose deadline is inside the loaded window"""
+        while True:
+            rows = self._columns(session)\
+                .filter(SavedSearch.id > self._last_saved_id)\
+                .order_by(SavedSearch.id)\
+                .limit(self.batch_size)\
+                .all()
+            for row in rows:
+                if row[6] is not None and row[6] <= self._loaded_until:
+                    self._push(*row, now)
+                self._last_saved_id = row[0]
+            if len(rows) < self.batch_size:
+                break
+        self._next_saves_check = now + self.new_saves_interval
+
+    def _load_changed_deadlines(self, session, now):
+        """Saved opportunities whose deadline moved into the loaded window since the last check
+
+        Search results refresh catalog deadlines; a deadline moved from beyond
+        the loaded window into it is neither a new save nor read by the next
+        window load. Re-reads are harmless: the outbox skips reminders it has.
+        """
+        checked_at = datetime.utcnow()
+        rows = self._columns(session)\
+            .filter(Opportunity.updated_at >= self._changes_checked_at - timedelta(seconds=CHANGE_LAG_SECONDS))\
+            .filter(Opportunity.deadline > now)\
+            .filter(Opportunity.deadline <= self._loaded_until)\
+            .all()
+        for row in rows:
+            self._push(*row, now)
+        self._changes_checked_at = checked_at
+
+    def _still_valid(self, session, due, now):
+        """Drop reminders for unsaved items; re-queue the ones whose deadline moved"""
+        current = dict(
+            session.query(SavedSearch.id, Opportunity.deadline)
+            .join(Opportunity, SavedSearch.opportunity_id == Opportunity.id)
+            .filter(SavedSearch.id.in_({reminder['saved_id'] for reminder in due}))
+            .all()
+        )
+        valid = []
+        for reminder in due:
+            if reminder['saved_id'] not in current:
+                continue
+            deadline = current[reminder['saved_id']]
+            if deadline == reminder['deadline']:
+                valid.append(reminder)
+            elif deadline is not None and deadline <= self._loaded_until:
+                # Later deadlines are read by the window load that reaches them
+                self._push(reminder['saved_id'], None, reminder['user_session'], reminder['opportunity_id'],
+                           reminder['title'], reminder['url'], deadline, now)
+        return valid
+
+    def tick(self, now=None):
+        """Load what became due for loading, fire due reminders; returns reminders written"""
+        if not self.db_manager.db_available:
+            return 0
+        session = self.db_manager.get_session()
+        if not session:
+            return 0
+
+        now = now or datetime.utcnow()
+        try:
+            if self._loaded_until is None or now >= self._next_load_at:
+                self._load_window(session, now)
+            if now >= self._next_saves_check:
+                self._load_new_saves(session, now)
+                self._load_changed_deadlines(session, now)
+
+            due = []
+            while self._heap and self._heap[0][0] <= now:
+                reminder = heapq.heappop(self._heap)[2]
+                self._queued.discard((reminder['saved_id'], reminder['lead_hours'], reminder['deadline']))
+                due.append(reminder)
+            if due:
+                due = self._still_valid(session, due, now)
+        except SQLAlchemyError as e:
+            print(f"Error loading reminders: {e}")
+            return 0
+        finally:
+            session.close()
+
+        fired = self.db_manager.enqueue_reminders(due) if due else 0
+        self.deliver()
+        return fired
+
+    def deliver(self, limit=100):
+        """Hand outbox reminders to the notifier; without one they wait for the app
+
+        Every server process delivers, so reminders are claimed before they
+        are sent; a failed send keeps its claim until it expires and is
+        retried then.
+        """
+        if self.notifier is None:
+            return 0
+        delivered = []
+        claimed_by = f"{self.worker_id}:{uuid.uuid4().hex}"
+        for reminder in self.db_manager.claim_pending_reminders(claimed_by, limit, self.claim_seconds):
+            try:
+                if self.notifier.send(reminder):
+                    delivered.append(reminder['id'])
+            except Exception as e:
+                print(f"Error delivering reminder {reminder['id']}: {e}")
+        if delivered:
+            self.db_manager.mark_reminders_delivered(delivered)
+        return len(delivered)
+
+    def seconds_until_next(self, now=None):
+        """Sleep until the next reminder is due or the next load/new-saves check"""
+        now = now or datetime.utcnow()
+        wakeups = [moment for moment in (self._next_load_at, self._next_saves_check) if moment]
+        if self._heap:
+            wakeups.append(self._heap[0][0])
+        if not wakeups:
+            return self.new_saves_interval.total_seconds()
+        return max((min(wakeups) - now).total_seconds(), 1.0)
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def start_reminder_worker(db_manager, notifier=None):
+    """Start the process-wide reminder thread (no-op if already running)"""
+    global _worker
+    with _worker_lock:
+        if _worker is not None or not db_manager.db_available:
+            return _worker
+        if notifier is None and REMINDER_NOTIFIER:
+            notifier = NOTIFIERS[REMINDER_NOTIFIER]()
+        scheduler = ReminderScheduler(db_manager, notifier)
+        stop = threading.Event()
+
+        def loop():
+            while not stop.is_set():
+                try:
+                    scheduler.tick()
+                except Exception as e:
+                    print(f"Reminder scheduler error: {e}")
+                stop.wait(scheduler.seconds_until_next())
+
+        thread = threading.Thread(target=loop, name="deadline-reminders", daemon=True)
+        thread.start()
+        _worker = (thread, stop)
+        return _worker
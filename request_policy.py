@@ -0,0 +1,209 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Per-engine overrides of the RequestPolicy defaults. Hedging duplicates a
+# request, so it is only enabled for engines that do not bill per call.
+ENGINE_POLICIES = {
+    "Google": {'max_retries': 2, 'hedge': False},
+    "Yahoo!": {'max_retries': 2, 'hedge': False},
+    "Bravo Search": {'max_retries': 2, 'hedge': False},
+    "DuckDuckGo": {'max_retries': 2, 'hedge': True}
+}
+
+# Shared by every policy so hedged requests don't spawn threads per call
+_hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+_counters = threading.local()
+
+
+class RequestCounter:
+    """Upstream HTTP requests sent inside a count_requests() block"""
+
+    def __init__(self):
+        self.sent = 0
+
+
+@contextmanager
+def count_requests():
+    """Count every request this thread sends in the block: retries and hedges included"""
+    counter = RequestCounter()
+    active = _counters.__dict__.setdefault('active', [])
+    active.append(counter)
+    try:
+        yield counter
+    finally:
+        active.remove(counter)
+
+
+def _count_sent():
+    for counter in getattr(_counters, 'active', ()):
+        counter.sent += 1
+
+
+class LatencyTracker:
+    """Rolling window of request latencies (seconds)"""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, fraction):
+        """Return the given percentile (0-1) of the window, or None when empty"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(fraction * (len(samples) - 1))))
+        return samples[index]
+
+
+class RequestPolicy:
+    """Retry with jittered exponential backoff, plus optional hedged requests
+
+    Retries only happen for connection errors, timeouts and 429/5xx answers,
+    and honor the Retry-After header when the engine sends one. A hedged
+    request is a duplicate sent once the primary has been outstanding for
+    longer than the observed p95 latency; the first answer wins. Hedges are
+    capped at `hedge_budget` of all requests so they cannot multiply load.
+    """
+
+    def __init__(self, name, max_retries=2, base_delay=0.5, max_delay=8.0, max_retry_after=30.0,
+                 hedge=False, hedge_percentile=0.95, hedge_min_samples=20, hedge_budget=0.1):
+        self.name = name
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_budget = hedge_budget
+        self.latency = LatencyTracker()
+        self._lock = threading.Lock()
+        self._requests_sent = 0
+        self._hedges_sent = 0
+
+    def get(self, url, session=None, **kwargs):
+        return self.request('GET', url, session=session, **kwargs)
+
+    def post(self, url, session=None, **kwargs):
+        return self.request('POST', url, session=session, **kwargs)
+
+    def request(self, method, url, session=None, **kwargs):
+        """Send a request, retrying transient failures
+
+        Returns the last response (callers still call raise_for_status) or
+        re-raises the last connection error once retries are exhausted.
+        """
+        kwargs.setdefault('timeout', 10)
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            response = None
+            try:
+                response = self._send(method, url, session, kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if last_attempt:
+                    raise
+                print(f"{self.name} request failed ({e}), retrying")
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or last_attempt:
+                    return response
+                print(f"{self.name} answered {response.status_code}, retrying")
+            time.sleep(self.backoff_delay(attempt, response))
+
+    def backoff_delay(self, attempt, response=None):
+        """Delay before the next attempt: Retry-After if given, else full-jitter backoff"""
+        retry_after = self._retry_after(response)
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _retry_after(self, response):
+        if response is None:
+            return None
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+    def _timed_send(self, method, url, session, kwargs):
+        start = time.perf_counter()
+        response = (session or requests).request(method, url, **kwargs)
+        self.latency.record(time.perf_counter() - start)
+        return response
+
+    def _hedge_delay(self, method):
+        """Seconds to wait before hedging, or None when this request must not be hedged"""
+        # Only idempotent requests are safe to duplicate
+        if not self.hedge or method != 'GET' or len(self.latency) < self.hedge_min_samples:
+            return None
+        with self._lock:
+            if self._hedges_sent >= self.hedge_budget * self._requests_sent:
+                return None
+        return self.latency.percentile(self.hedge_percentile)
+
+    def _send(self, method, url, session, kwargs):
+        with self._lock:
+            self._requests_sent += 1
+        _count_sent()
+        hedge_delay = self._hedge_delay(method)
+        if hedge_delay is None:
+            return self._timed_send(method, url, session, kwargs)
+
+        primary = _hedge_executor.submit(self._timed_send, method, url, session, kwargs)
+        done, _ = wait([primary], timeout=hedge_delay)
+        if done:
+            return primary.result()
+
+        with self._lock:
+            self._hedges_sent += 1
+        _count_sent()
+        hedged = _hedge_executor.submit(self._timed_send, method, url, session, kwargs)
+        pending = {primary, hedged}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:
+                    error = e
+        raise error
+
+
+_policies = {}
+_policies_lock = threading.Lock()
+
+
+def get_policy(engine):
+    """Return the process-wide request policy for an engine"""
+    with _policies_lock:
+        if engine not in _policies:
+            _policies[engine] = RequestPolicy(engine, **ENGINE_POLICIES.get(engine, {}))
+        return _policies[engine]
@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from shared_cache import get_shared_cache
+
+RESULT_CACHE_TTL_SECONDS = int(os.getenv('RESULT_CACHE_TTL', '1800'))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '512'))
+
+
+def normalize_terms(terms):
+    """Lowercase, collapse whitespace, drop duplicates and sort so keyword order doesn't matter"""
+    return tuple(sorted({' '.join(term.lower().split()) for term in terms or [] if term and term.strip()}))
+
+
+def make_cache_key(engine, query, custom_keywords, real_data):
+    """One cache entry per engine: combinations of engines share the per-engine entries"""
+    return (
+        'real' if real_data else 'mock',
+        engine,
+        ' '.join((query or '').lower().split()),
+        normalize_terms(custom_keywords)
+    )
+
+
+class SearchResultCache:
+    """Thread-safe TTL + LRU cache of per-engine result batches
+
+    With a shared backend (shared_cache.py) a local miss falls through to the
+    file shared by every server process, and writes go to both.
+    """
+
+    SHARED_NAMESPACE = 'search'
+
+    def __init__(self, ttl=RESULT_CACHE_TTL_SECONDS, max_entries=RESULT_CACHE_MAX_ENTRIES, shared=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.shared = shared
+        self._entries = OrderedDict()  # key -> (expires_at, results)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return a copy of the cached results, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                results = entry[1]
+        if entry is None:
+            shared_entry = self.shared.get_entry(self.SHARED_NAMESPACE, key) if self.shared else None
+            if shared_entry is None:
+                with self._lock:
+                    self.misses += 1
+                return None
+            # Another worker fetched it; keep a local copy until the shared entry expires
+            results, ttl = shared_entry
+            self._store(key, results, ttl)
+            with self._lock:
+                self.hits += 1
+        # Callers annotate and filter results in place; never hand out the stored dicts
+        return [dict(result) for result in results]
+
+    def set(self, key, results, ttl=None):
+        stored = tuple(dict(result) for result in results)
+        self._store(key, stored, ttl or self.ttl)
+        if self.shared:
+            self.shared.set(self.SHARED_NAMESPACE, key, stored, ttl or self.ttl)
+
+    def _store(self, key, stored, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, stored)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def time_to_live(self, key):
+        """Seconds until key expires (0 if missing)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                return max(entry[0] - time.monotonic(), 0)
+        return self.shared.time_to_live(self.SHARED_NAMESPACE, key) if self.shared else 0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.shared:
+            self.shared.clear(self.SHARED_NAMESPACE)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Return the process-wide result cache (shared by every session and the warm-up worker)"""
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = SearchResultCache(shared=get_shared_cache())
+        return _result_cache
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+RESULT_STORE_MAX_ENTRIES = int(os.getenv('RESULT_STORE_MAX_ENTRIES', '20000'))
+RESULTS_PAGE_SIZE = int(os.getenv('RESULTS_PAGE_SIZE', '20'))
+
+# Annotations that belong to one user's view of a result, not to the result
+SESSION_FIELDS = ('is_new',)
+
+
+def result_id(payload):
+    """Store id of a payload: its fingerprint plus a digest of its content
+
+    Two sessions whose results share a fingerprint but differ in content
+    (another engine's snippet, a newer deadline) get different ids, so
+    storing one never changes what the other sees.
+    """
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    digest = hashlib.blake2b(encoded.encode('utf-8'), digest_size=8).hexdigest()
+    return f"{payload['fingerprint']}:{digest}"
+
+
+def id_fingerprint(result_id):
+    return result_id.rsplit(':', 1)[0]
+
+
+class ResultStore:
+    """Process-wide LRU of result payloads keyed by content
+
+    Sessions keep only the ordered ids of their results; the same result
+    found by many sessions is stored once, and an entry is never replaced
+    once stored.
+    """
+
+    def __init__(self, max_entries=RESULT_STORE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # result id -> result
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def put_many(self, results):
+        """Store results (they must carry 'fingerprint'); returns their ids in order"""
+        ids = []
+        with self._lock:
+            for result in results:
+                payload = {field: value for field, value in result.items() if field not in SESSION_FIELDS}
+                entry_id = result_id(payload)
+                self._entries.setdefault(entry_id, payload)
+                self._entries.move_to_end(entry_id)
+                ids.append(entry_id)
+            self._evict()
+        return ids
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+    def materialize(self, ids, loader=None):
+        """Copies of the stored results for ids, in order
+
+        Ids evicted since they were stored are restored through loader
+        (fingerprints -> {fingerprint: result}) when given; ids it cannot
+        restore are left out.
+        """
+        found, missing = {}, []
+        with self._lock:
+            for entry_id in ids:
+                result = self._entries.get(entry_id)
+                if result is None:
+                    missing.append(entry_id)
+                else:
+                    self._entries.move_to_end(entry_id)
+                    found[entry_id] = result
+        if missing and loader:
+            restored = loader(list({id_fingerprint(entry_id) for entry_id in missing}))
+            with self._lock:
+                for entry_id in missing:
+                    result = restored.get(id_fingerprint(entry_id))
+                    if result is not None:
+                        # Kept under the requested id, but only if nobody stored it meanwhile
+                        found[entry_id] = self._entries.setdefault(entry_id, result)
+                self._evict()
+        return [dict(found[entry_id]) for entry_id in ids if entry_id in found]
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'evicted': self.evicted}
+
+
+def page_bounds(total, page, page_size=RESULTS_PAGE_SIZE):
+    """(start, end, page count) for a 1-based page number, clamped to the valid range"""
+    pages = max((total + page_size - 1) // page_size, 1)
+    page = min(max(page, 1), pages)
+    start = (page - 1) * page_size
+    return start, min(start + page_size, total), pages
+
+
+_result_store = None
+_result_store_lock = threading.Lock()
+
+
+def get_result_store():
+    """Return the process-wide result store shared by every session"""
+    global _result_store
+    with _result_store_lock:
+        if _result_store is None:
+            _result_store = ResultStore()
+        return _result_store
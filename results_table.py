@@ -0,0 +1,66 @@
+from datetime import datetime
+
+import pandas as pd
+
+from classifier import TYPE_RULES, DEFAULT_TYPE
+
+# (result field, column label) in display order
+TABLE_COLUMNS = [
+    ('title', "Título"),
+    ('type', "Tipo"),
+    ('source', "Fonte"),
+    ('search_engine', "Motor"),
+    ('deadline', "Prazo"),
+    ('days_left', "Dias restantes"),
+    ('location', "Localização"),
+    ('tocantins_eligible', "Elegível TO"),
+    ('url', "Link"),
+    ('description', "Descrição")
+]
+
+CATEGORICAL_FIELDS = ['type', 'source', 'search_engine']
+
+# Known types keep a stable category order even when some are missing from a page
+TYPE_CATEGORIES = [opp_type for opp_type, _ in TYPE_RULES] + ["Chamadas Públicas", DEFAULT_TYPE]
+
+
+def results_to_dataframe(results, now=None):
+    """Build the table-mode DataFrame column by column, with categorical dtypes"""
+    now = now or datetime.now()
+    columns = {field: [] for field, _ in TABLE_COLUMNS}
+    for result in results:
+        for field, _ in TABLE_COLUMNS:
+            if field != 'days_left':
+                columns[field].append(result.get(field))
+        deadline = result.get('deadline')
+        columns['days_left'].append((deadline - now).days if deadline else None)
+
+    frame = pd.DataFrame({
+        'title': pd.Series(columns['title'], dtype='string'),
+        'type': pd.Categorical(
+            columns['type'],
+            categories=TYPE_CATEGORIES + sorted({t for t in columns['type'] if t and t not in TYPE_CATEGORIES})
+        ),
+        'source': pd.Categorical(columns['source']),
+        'search_engine': pd.Categorical(columns['search_engine']),
+        'deadline': pd.to_datetime(pd.Series(columns['deadline'], dtype='object')),
+        'days_left': pd.array(columns['days_left'], dtype='Int32'),
+        'location': pd.Categorical(columns['location']),
+        'tocantins_eligible': pd.array(columns['tocantins_eligible'], dtype='boolean'),
+        'url': pd.Series(columns['url'], dtype='string'),
+        'description': pd.Series(columns['description'], dtype='string')
+    })
+    return frame.rename(columns=dict(TABLE_COLUMNS))
+
+
+def table_column_config(st):
+    """st.dataframe column settings for the table-mode grid"""
+    labels = dict(TABLE_COLUMNS)
+    return {
+        labels['title']: st.column_config.TextColumn(width="large"),
+        labels['deadline']: st.column_config.DateColumn(format="DD/MM/YYYY"),
+        labels['days_left']: st.column_config.NumberColumn(format="%d"),
+        labels['tocantins_eligible']: st.column_config.CheckboxColumn(),
+        labels['url']: st.column_config.LinkColumn(display_text="Abrir"),
+        labels['description']: st.column_config.TextColumn(width="medium")
+    }
@@ -0,0 +1,213 @@
+import os
+import re
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, Integer, bindparam, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import SearchHistory, rollup_daily_statement
+
+# Rows older than HOT_DAYS leave search_history: they are rolled up into
+# search_history_daily and moved to search_history_archive, which keeps
+# ARCHIVE_MONTHS of raw rows before they are dropped for good.
+HOT_DAYS = int(os.getenv('SEARCH_HISTORY_HOT_DAYS', '30'))
+ARCHIVE_MONTHS = int(os.getenv('SEARCH_HISTORY_ARCHIVE_MONTHS', '12'))
+PRUNE_INTERVAL_SECONDS = int(os.getenv('SEARCH_HISTORY_PRUNE_INTERVAL', '3600'))
+
+PARTITION_NAME_RE = re.compile(r'^search_history_archive_y(\d{4})m(\d{2})$')
+
+
+def _month_start(moment):
+    return datetime(moment.year, moment.month, 1)
+
+
+def _next_month(month_start):
+    if month_start.month == 12:
+        return datetime(month_start.year + 1, 1, 1)
+    return datetime(month_start.year, month_start.month + 1, 1)
+
+
+def _months_before(moment, months):
+    month_index = moment.year * 12 + moment.month - 1 - months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+class SearchHistoryRetention:
+    """Keeps search_history bounded: rollup, archive and prune in batches"""
+
+    def __init__(self, db_manager, hot_days=HOT_DAYS, archive_months=ARCHIVE_MONTHS, batch_size=1000):
+        self.db_manager = db_manager
+        self.hot_days = hot_days
+        self.archive_months = archive_months
+        self.batch_size = batch_size
+        self.partitioned = db_manager.engine.dialect.name == 'postgresql'
+        self._known_partitions = set()
+
+    def _ensure_partition(self, session, month_start):
+        """Create the monthly archive partition covering month_start (Postgres only)"""
+        name = f"search_history_archive_y{month_start.year:04d}m{month_start.month:02d}"
+        if name in self._known_partitions:
+            return
+        session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF search_history_archive "
+            f"FOR VALUES FROM ('{month_start:%Y-%m-%d}') TO ('{_next_month(month_start):%Y-%m-%d}')"
+        ))
+        self._known_partitions.add(name)
+
+    def _rollup(self, session, rows):
+        """Fold a batch of history rows into the per-day aggregates"""
+        groups = defaultdict(lambda: {'searches': 0, 'results_count': 0, 'users': set(), 'engines': None})
+        for row in rows:
+            engines = sorted(row.engines or [])
+            key = (row.timestamp.date(), row.query, ','.join(engines))
+            group = groups[key]
+            group['searches'] += 1
+            group['results_count'] += row.results_count or 0
+            group['users'].add(row.user_session)
+            group['engines'] = engines
+
+        session.execute(rollup_daily_statement(self.db_manager.engine.dialect.name, [
+            {
+                'day': day,
+                'query': query,
+                'engines_key': engines_key,
+                'engines': group['engines'],
+                'searches': group['searches'],
+                'results_count': group['results_count'],
+                'users': len(group['users'])
+            }
+            for (day, query, engines_key), group in groups.items()
+        ]))
+
+    def archive_old_rows(self, now=None):
+        """Move rows older than hot_days out of search_history; returns how many moved"""
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.hot_days)
+        moved = 0
+        while True:
+            session = self.db_manager.get_session()
+            if not session:
+                return moved
+            try:
+                # SKIP LOCKED lets retention run in every server process: a
+                # concurrent run takes the next batch instead of the same rows
+                rows = session.query(SearchHistory)\
+                    .filter(SearchHistory.timestamp < cutoff)\
+                    .order_by(SearchHistory.id)\
+                    .limit(self.batch_size)\
+                    .with_for_update(skip_locked=True)\
+                    .all()
+                if not rows:
+                    return moved
+
+                ids = [row.id for row in rows]
+                # Rows already in the archive were counted when they got there;
+                # only the delete from search_history is left to do for them.
+                # Matched on the archive's full key: SQLite hands the ids of
+                # archived rows to new searches once the hot table is emptied.
+                archived = {tuple(archived_row) for archived_row in session.execute(
+                    text("SELECT id, timestamp FROM search_history_archive WHERE id IN :ids")
+                    .bindparams(bindparam('ids', expanding=True))
+                    .columns(id=Integer, timestamp=DateTime),
+                    {'ids': ids}
+                )}
+                new_rows = [row for row in rows if (row.id, row.timestamp) not in archived]
+                if new_rows:
+                    self._rollup(session, new_rows)
+                    if self.partitioned:
+                        for month in {_month_start(row.timestamp) for row in new_rows}:
+                            self._ensure_partition(session, month)
+                    session.execute(
+                        text(
+                            "INSERT INTO search_history_archive "
+                            "(id, query, engines, keywords, results_count, timestamp, user_session) "
+                            "SELECT id, query, engines, keywords, results_count, timestamp, user_session "
+                            "FROM search_history "
+                            "WHERE id IN :ids"
+                        ).bindparams(bindparam('ids', expanding=True)),
+                        {'ids': [row.id for row in new_rows]}
+                    )
+                session.query(SearchHistory)\
+                    .filter(SearchHistory.id.in_(ids))\
+                    .delete(synchronize_session=False)
+                session.commit()
+                moved += len(rows)
+                if len(rows) < self.batch_size:
+                    return moved
+            except SQLAlchemyError as e:
+                session.rollback()
+                print(f"Error archiving search history: {e}")
+                return moved
+            finally:
+                session.close()
+
+    def prune_archive(self, now=None):
+        """Drop archived rows older than archive_months (whole partitions on Postgres)"""
+        oldest_kept = _months_before(_month_start(now or datetime.utcnow()), self.archive_months)
+        session = self.db_manager.get_session()
+        if not session:
+            return 0
+        try:
+            if self.partitioned:
+                partitions = session.execute(text(
+                    "SELECT c.relname FROM pg_inherits i "
+                    "JOIN pg_class c ON c.oid = i.inhrelid "
+                    "JOIN pg_class p ON p.oid = i.inhparent "
+                    "WHERE p.relname = 'search_history_archive'"
+                )).scalars().all()
+                dropped = 0
+                for name in partitions:
+                    match = PARTITION_NAME_RE.match(name)
+                    if match and datetime(int(match.group(1)), int(match.group(2)), 1) < oldest_kept:
+                        session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                        self._known_partitions.discard(name)
+                        dropped += 1
+            else:
+                dropped = session.execute(
+                    text("DELETE FROM search_history_archive WHERE timestamp < :oldest_kept"),
+                    {'oldest_kept': oldest_kept}
+                ).rowcount
+            session.commit()
+            return dropped
+        except SQLAlchemyError as e:
+            session.rollback()
+            print(f"Error pruning search history archive: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def run_once(self, now=None):
+        """One retention pass; returns (rows archived, partitions/rows pruned)"""
+        if not self.db_manager.db_available:
+            return 0, 0
+        return self.archive_old_rows(now), self.prune_archive(now)
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def start_retention_worker(db_manager, interval=PRUNE_INTERVAL_SECONDS):
+    """Start the process-wide background pruning thread (no-op if already running)"""
+    global _worker
+    with _worker_lock:
+        if _worker is not None or not db_manager.db_available:
+            return _worker
+        retention = SearchHistoryRetention(db_manager)
+        stop = threading.Event()
+
+        def loop():
+            while not stop.is_set():
+                try:
+                    archived, pruned = retention.run_once()
+                    if archived or pruned:
+                        print(f"Search history retention: archived {archived}, pruned {pruned}")
+                except Exception as e:
+                    print(f"Search history retention error: {e}")
+                stop.wait(interval)
+
+        thread = threading.Thread(target=loop, name="history-retention", daemon=True)
+        thread.start()
+        _worker = (thread, stop)
+        return _worker
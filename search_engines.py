@@ -1,16 +1,39 @@
 import requests
 import os
 import json
+import time
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from requests.auth import HTTPBasicAuth
 from requests_oauthlib import OAuth2Session
+from real_search import RealSearchEngine
+from mock_data import MockDataGenerator
+from request_policy import get_policy, count_requests
+from classifier import get_classifier
+from result_cache import get_result_cache, make_cache_key
+from singleflight import get_search_flight
+from query_planner import QueryPlanner, MAX_PARALLEL_SUBQUERIES, result_key
+from quota import QUOTA_MIN_RESULTS, is_free_engine
+from engine_stats import get_engine_stats
+from corpus_store import get_corpus_store
+from database import opportunity_fingerprint
 
 class SearchEngines:
     def __init__(self, mock_data=None):
         self.mock_data = mock_data  # Manter para fallback ou testes
 
+    @staticmethod
+    def _require_keys(engine, **keys):
+        """Fail before any request (and any quota use) when credentials are missing"""
+        missing = [name for name, value in keys.items() if not value]
+        if missing:
+            raise RuntimeError(f"{engine} not configured: set {', '.join(missing)}")
+
     def _search_google(self, query, custom_keywords):
         api_key = os.environ.get("GOOGLE_API_KEY", "")
         cse_id = os.environ.get("GOOGLE_CSE_ID", "")
+        self._require_keys("Google", GOOGLE_API_KEY=api_key, GOOGLE_CSE_ID=cse_id)
         search_url = "https://www.googleapis.com/customsearch/v1"
         params = {
             "key": api_key,
@@ -18,7 +41,7 @@ class SearchEngines:
             "q": query + " " + " ".join(custom_keywords or [])
         }
         try:
-            resp = requests.get(search_url, params=params)
+            resp = get_policy("Google").get(search_url, params=params)
             resp.raise_for_status()
             data = resp.json()
             results = []
@@ -33,7 +56,8 @@ class SearchEngines:
             return results
         except Exception as e:
             print(f"Google Search error: {e}")
-            return []
+            # Raised, not swallowed: the manager counts it in the engine's error rate
+            raise
 
     def _search_duckduckgo(self, query, custom_keywords):
         # DuckDuckGo API não oficial. Limite: só retorna instant answers (não resultados web completos)
@@ -45,7 +69,7 @@ class SearchEngines:
             "skip_disambig": 1
         }
         try:
-            resp = requests.get(url, params=params)
+            resp = get_policy("DuckDuckGo").get(url, params=params)
             resp.raise_for_status()
             data = resp.json()
             results = []
@@ -71,13 +95,15 @@ class SearchEngines:
             return results
         except Exception as e:
             print(f"DuckDuckGo Search error: {e}")
-            return []
+            raise
 
     def _search_yahoo(self, query, custom_keywords):
         # OAuth2 Token fetch
         client_id = os.environ.get("YAHOO_CLIENT_ID", "")
         client_secret = os.environ.get("YAHOO_CLIENT_SECRET", "")
         app_id = os.environ.get("YAHOO_APP_ID", "")
+        self._require_keys("Yahoo!", YAHOO_CLIENT_ID=client_id, YAHOO_CLIENT_SECRET=client_secret,
+                           YAHOO_APP_ID=app_id)
         token_url = "https://api.login.yahoo.com/oauth2/get_token"
         search_url = "https://yboss.yahooapis.com/ysearch/web"
         try:
@@ -88,7 +114,7 @@ class SearchEngines:
                 "grant_type": "client_credentials",
                 "redirect_uri": "oob"
             }
-            token_resp = requests.post(token_url, data=data, headers=headers, auth=auth)
+            token_resp = get_policy("Yahoo!").post(token_url, data=data, headers=headers, auth=auth)
             token_resp.raise_for_status()
             token_info = token_resp.json()
             access_token = token_info["access_token"]
@@ -102,7 +128,7 @@ class SearchEngines:
                 "q": query + " " + " ".join(custom_keywords or []),
                 "format": "json"
             }
-            resp = requests.get(search_url, params=params, headers=headers)
+            resp = get_policy("Yahoo!").get(search_url, params=params, headers=headers)
             resp.raise_for_status()
             data = resp.json()
             results = []
@@ -117,10 +143,11 @@ class SearchEngines:
             return results
         except Exception as e:
             print(f"Yahoo! Search error: {e}")
-            return []
+            raise
 
     def _search_bravo(self, query, custom_keywords):
         api_key = os.environ.get("BRAVO_API_KEY", "")
+        self._require_keys("Bravo Search", BRAVO_API_KEY=api_key)
         url = "https://api.search.brave.com/res/v1/web/search"
         headers = {
             "Accept": "application/json",
@@ -130,7 +157,7 @@ class SearchEngines:
             "q": query + " " + " ".join(custom_keywords or [])
         }
         try:
-            resp = requests.get(url, params=params, headers=headers)
+            resp = get_policy("Bravo Search").get(url, params=params, headers=headers)
             resp.raise_for_status()
             data = resp.json()
             results = []
@@ -145,7 +172,7 @@ class SearchEngines:
             return results
         except Exception as e:
             print(f"Bravo Search error: {e}")
-            return []
+            raise
 
     def search_all(self, engines, query, custom_keywords):
         results = []
@@ -158,3 +185,236 @@ class SearchEngines:
         if "Bravo Search" in engines:
             results.extend(self._search_bravo(query, custom_keywords))
         return results
+
+
+class SearchEngineManager:
+    """Dispatches searches to real engines or mock data, one batch per engine"""
+
+    def __init__(self):
+        self.api_engines = SearchEngines()
+        self.real_search = RealSearchEngine()
+        self.mock_data = MockDataGenerator()
+        self.use_real_data = False
+        self.classifier = get_classifier()
+        self.cache = get_result_cache()
+        self.inflight = get_search_flight()
+        self.planner = QueryPlanner()
+        self.quota = None  # QuotaScheduler, set when a database is available
+        self.engine_slots = {}  # Per-engine semaphores capping concurrent upstream searches
+        self.corpus = get_corpus_store()  # Parquet archive of engine responses (None without pyarrow)
+        self.skipped_engines = []
+        self.dropped_keywords = {}  # Engine -> keywords its sub-query budget could not cover
+        self.mock_generators = {
+            "Google": self.mock_data.generate_google_results,
+            "DuckDuckGo": self.mock_data.generate_duckduckgo_results,
+            "Yahoo!": self.mock_data.generate_yahoo_results,
+            "Bravo Search": self.mock_data.generate_bravo_results
+        }
+        self.api_methods = {
+            "Google": self.api_engines._search_google,
+            "Yahoo!": self.api_engines._search_yahoo,
+            "Bravo Search": self.api_engines._search_bravo
+        }
+
+    def _search_real(self, engine, query, custom_keywords, planned=False):
+        # Quota is charged per upstream request actually sent (token fetches
+        # and retries included), and only for engines that have a quota
+        with count_requests() as requests_sent:
+            try:
+                return self._dispatch_real(engine, query, custom_keywords, planned)
+            finally:
+                if self.quota and requests_sent.sent and not self.quota.is_free(engine):
+                    self.quota.record(engine, requests_sent.sent)
+
+    def _dispatch_real(self, engine, query, custom_keywords, planned):
+        # DuckDuckGo's HTML scraper returns richer results than its instant answer API
+        if engine == "DuckDuckGo":
+            if planned:
+                return self.real_search.search_duckduckgo(query, [], raw_query=query)
+            return self.real_search.search_duckduckgo(query, custom_keywords)
+        if engine in self.api_methods:
+            return self.api_methods[engine](query, custom_keywords)
+        return self.real_search.get_real_opportunities(query, custom_keywords, [engine])
+
+    def search_engine(self, engine, query, custom_keywords, refresh=False, budget=None):
+        """Search a single engine, answering from the result cache when possible"""
+        custom_keywords = custom_keywords or []
+        key = make_cache_key(engine, query, custom_keywords, self.use_real_data)
+        if not refresh:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        # Identical searches from other sessions wait for this one instead of
+        # hitting the engine again
+        results, shared = self.inflight.do(key, self._fetch, engine, query, custom_keywords, key, refresh, budget)
+        if shared:
+            return [dict(result) for result in results]
+        return results
+
+    def _fetch(self, engine, query, custom_keywords, key, refresh, budget):
+        if not refresh:
+            # The previous leader may have filled the cache after our first lookup
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        with self.engine_slots.get(engine) or nullcontext():
+            results, dropped = self._search_uncached(engine, query, custom_keywords, budget)
+        # The key has no budget: a plan cut short (e.g. by low quota) must not
+        # answer later searches that could cover every keyword
+        if results and not dropped:
+            self.cache.set(key, results)
+        return results
+
+    def limit_engine_concurrency(self, limit):
+        """Cap concurrent uncached searches per engine (batch runs share one manager)"""
+        self.engine_slots = {
+            engine: threading.BoundedSemaphore(limit) for engine in self.mock_generators
+        } if limit else {}
+
+    def _search_uncached(self, engine, query, custom_keywords, budget=None):
+        """Returns (results, keywords the sub-query plan left out)"""
+        stats = self.engine_stats().get(engine)
+        started = time.monotonic()
+        dropped = []
+        try:
+            if self.use_real_data:
+                results, dropped = self._search_planned(engine, query, custom_keywords, budget)
+            else:
+                # Mock results don't depend on the query, so there is nothing to plan
+                generator = self.mock_generators.get(engine, self.mock_data.generate_google_results)
+                results = generator(query, custom_keywords)
+        except Exception:
+            stats.record_call(time.monotonic() - started, 0, 0, error=True)
+            raise
+        for result in results:
+            result.setdefault("search_engine", engine)
+        # API engines only return title/url/snippet; fill in type, source and eligibility
+        self.classifier.classify_batch(results)
+        # Computed once per engine response; cached copies carry it along
+        for result in results:
+            result['fingerprint'] = opportunity_fingerprint(result)
+        stats.record_call(time.monotonic() - started, len(results),
+                          sum(1 for result in results if result.get('tocantins_eligible')))
+        if self.corpus and self.use_real_data:
+            self.corpus.append(results, query, custom_keywords)
+        return results, dropped
+
+    def engine_stats(self):
+        """Rolling per-engine stats for the current data mode"""
+        return get_engine_stats(self.use_real_data)
+
+    def select_engines(self, engines):
+        """Auto mode: the candidates with the best marginal eligible yield per millisecond"""
+        return self.engine_stats().select(engines)
+
+    def _search_planned(self, engine, query, custom_keywords, budget=None):
+        """Fan the keywords out as engine-sized sub-queries and merge by hit count
+
+        Returns (results, keywords the budget left out).
+        """
+        if self.quota:
+            budget = self.quota.budget_for(engine, budget or self.planner.request_budget)
+            if not budget:
+                return [], self.planner.left_out([], custom_keywords)
+        subqueries = self.planner.plan(engine, query, custom_keywords, budget)
+        dropped = self.planner.left_out(subqueries, custom_keywords)
+        if len(subqueries) == 1:
+            return self._search_real(engine, subqueries[0][0], [], planned=True), dropped
+        with ThreadPoolExecutor(max_workers=min(len(subqueries), MAX_PARALLEL_SUBQUERIES)) as executor:
+            batches = list(executor.map(
+                lambda planned: self._search_subquery(engine, planned[0]), subqueries
+            ))
+        failed = sum(1 for batch in batches if batch is None)
+        batches = [batch for batch in batches if batch is not None]
+        # Nothing back because sub-queries failed is an engine error, not an empty answer
+        if failed and not any(batches):
+            raise RuntimeError(f"{engine}: {failed} of {len(subqueries)} sub-queries failed")
+        return self.planner.merge_ranked(batches), dropped
+
+    def _search_subquery(self, engine, subquery):
+        """Results for one sub-query, or None when the engine failed"""
+        try:
+            return self._search_real(engine, subquery, [], planned=True)
+        except Exception as e:
+            print(f"{engine} sub-query error: {e}")
+            return None
+
+    def _is_free(self, engine):
+        return self.quota.is_free(engine) if self.quota else is_free_engine(engine)
+
+    def _note_dropped_keywords(self, engines, query, custom_keywords, budgets, cached):
+        """Record the keywords each engine's plan leaves out, so the user can be told"""
+        if not (self.use_real_data and custom_keywords):
+            return
+        for engine in engines:
+            if engine in cached:
+                continue  # Cached answers come from complete plans
+            budget = self.quota.budget_for(engine, budgets[engine]) if self.quota else budgets[engine]
+            if not budget:
+                continue
+            dropped = self.planner.left_out(self.planner.plan(engine, query, custom_keywords, budget),
+                                            custom_keywords)
+            if dropped:
+                self.dropped_keywords[engine] = dropped
+
+    def iter_engine_batches(self, engines, query, custom_keywords):
+        """Yield (engine, results) as soon as each engine answers"""
+        self.skipped_engines = []
+        self.dropped_keywords = {}
+        if not engines:
+            return
+        # Free engines keep their own budget; paid engines share the per-search one
+        budgets = self.planner.engine_budgets(engines, {engine for engine in engines if self._is_free(engine)})
+        seen = set()  # Result keys already returned by earlier batches, for overlap stats
+        cached = {
+            engine for engine in engines
+            if self.use_real_data and self.cache.time_to_live(make_cache_key(engine, query, custom_keywords, True)) > 0
+        }
+        if not (self.use_real_data and self.quota):
+            self._note_dropped_keywords(engines, query, custom_keywords, budgets, cached)
+            yield from self._run_engines(engines, query, custom_keywords, budgets, seen)
+            return
+
+        # Cached and free engines answer first; paid engines low on quota only
+        # run when those came back short, and exhausted ones are skipped
+        primary, reserve, exhausted = self.quota.schedule(engines, cached)
+        self.skipped_engines = list(exhausted)
+        self._note_dropped_keywords(primary, query, custom_keywords, budgets, cached)
+        found = 0
+        for engine, batch in self._run_engines(primary, query, custom_keywords, budgets, seen):
+            found += len(batch)
+            yield engine, batch
+        if reserve and found < QUOTA_MIN_RESULTS:
+            self._note_dropped_keywords(reserve, query, custom_keywords, budgets, cached)
+            yield from self._run_engines(reserve, query, custom_keywords, budgets, seen)
+        else:
+            self.skipped_engines.extend(reserve)
+
+    def _run_engines(self, engines, query, custom_keywords, budgets, seen):
+        if not engines:
+            return
+        stats = self.engine_stats()
+        with ThreadPoolExecutor(max_workers=len(engines)) as executor:
+            futures = {
+                executor.submit(self.search_engine, engine, query, custom_keywords, budget=budgets[engine]): engine
+                for engine in engines
+            }
+            for future in as_completed(futures):
+                engine = futures[future]
+                try:
+                    batch = future.result()
+                except Exception as e:
+                    print(f"{engine} search error: {e}")
+                    yield engine, []
+                    continue
+                keys = {result_key(result) for result in batch}
+                stats.get(engine).record_overlap(len(keys), len(keys & seen))
+                seen.update(keys)
+                yield engine, batch
+
+    def search_all_engines(self, engines, query, custom_keywords):
+        """Search every selected engine and return the combined results"""
+        results = []
+        for _, batch in self.iter_engine_batches(engines, query, custom_keywords):
+            results.extend(batch)
+        return results
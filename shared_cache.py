@@ -0,0 +1,211 @@
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# One SQLite file shared by every server process on the host; '' disables it
+SHARED_CACHE_PATH = os.getenv('SHARED_CACHE_PATH', 'izy_cache.db')
+SHARED_CACHE_MAX_ENTRIES = int(os.getenv('SHARED_CACHE_MAX_ENTRIES', '2048'))  # Per namespace
+# A hit only rewrites accessed_at when it is older than this, so reads rarely
+# take the write lock; LRU order is approximate within the interval
+TOUCH_INTERVAL_SECONDS = 30
+EVICT_EVERY_WRITES = 64
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS cache_entries (
+        namespace TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value BLOB NOT NULL,
+        expires_at REAL NOT NULL,
+        accessed_at REAL NOT NULL,
+        version REAL,
+        PRIMARY KEY (namespace, key)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_cache_entries_lru ON cache_entries (namespace, accessed_at)",
+    "CREATE INDEX IF NOT EXISTS ix_cache_entries_expires ON cache_entries (expires_at)"
+]
+
+
+def encode_key(key):
+    """Stable text form of a cache key (tuples and lists encode the same)"""
+    return json.dumps(key, ensure_ascii=False, default=str)
+
+
+class SharedCache:
+    """TTL + LRU key/value store in a local SQLite file, shared across processes
+
+    SQLite's file locks serialize writers between processes; every write is a
+    single BEGIN IMMEDIATE transaction, so readers never see a partial entry.
+    Values are pickled: the file is local to the host and written only by the
+    app itself.
+    """
+
+    def __init__(self, path=SHARED_CACHE_PATH, max_entries=SHARED_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        with self._transaction() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+            # Cache files created before versioned entries
+            if 'version' not in {row[1] for row in conn.execute("PRAGMA table_info(cache_entries)")}:
+                conn.execute("ALTER TABLE cache_entries ADD COLUMN version REAL")
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get(self, namespace, key):
+        """Return the stored value, or None if missing or expired"""
+        entry = self.get_entry(namespace, key)
+        return entry[0] if entry else None
+
+    def get_entry(self, namespace, key):
+        """Return (value, seconds left), or None if missing or expired"""
+        now = time.time()
+        encoded = encode_key(key)
+        try:
+            row = self._connection().execute(
+                "SELECT value, expires_at, accessed_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (namespace, encoded)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                return None
+            if now - row[2] > TOUCH_INTERVAL_SECONDS:
+                with self._transaction() as conn:
+                    conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                                 (now, namespace, encoded))
+            return pickle.loads(row[0]), row[1] - now
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError) as e:
+            print(f"Shared cache read error: {e}")
+            return None
+
+    def set(self, namespace, key, value, ttl, version=None):
+        """Store value; with a version, an entry holding a newer version is kept instead
+
+        Versions let a writer that read the source before a concurrent update
+        lose to the updater, whichever of them reaches the cache last.
+        Returns False on errors, not when a newer version wins.
+        """
+        now = time.time()
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            with self._transaction() as conn:
+                conn.execute(
+                    "INSERT INTO cache_entries (namespace, key, value, expires_at, accessed_at, version) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, "
+                    "expires_at = excluded.expires_at, accessed_at = excluded.accessed_at, "
+                    "version = excluded.version "
+                    "WHERE excluded.version IS NULL OR cache_entries.version IS NULL "
+                    "OR excluded.version >= cache_entries.version",
+                    (namespace, encode_key(key), blob, now + ttl, now, version)
+                )
+            with self._writes_lock:
+                self._writes += 1
+                evict = self._writes % EVICT_EVERY_WRITES == 0
+            if evict:
+                self.evict(namespace)
+            return True
+        except (sqlite3.Error, pickle.PicklingError) as e:
+            print(f"Shared cache write error: {e}")
+            return False
+
+    def time_to_live(self, namespace, key):
+        """Seconds until key expires (0 if missing)"""
+        try:
+            row = self._connection().execute(
+                "SELECT expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (namespace, encode_key(key))
+            ).fetchone()
+            return max(row[0] - time.time(), 0) if row else 0
+        except sqlite3.Error as e:
+            print(f"Shared cache read error: {e}")
+            return 0
+
+    def delete(self, namespace, key):
+        try:
+            with self._transaction() as conn:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                             (namespace, encode_key(key)))
+            return True
+        except sqlite3.Error as e:
+            print(f"Shared cache write error: {e}")
+            return False
+
+    def evict(self, namespace):
+        """Drop expired entries, then the least recently used beyond max_entries"""
+        try:
+            with self._transaction() as conn:
+                conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+                count = conn.execute("SELECT COUNT(*) FROM cache_entries WHERE namespace = ?",
+                                     (namespace,)).fetchone()[0]
+                if count > self.max_entries:
+                    conn.execute(
+                        "DELETE FROM cache_entries WHERE rowid IN ("
+                        "SELECT rowid FROM cache_entries WHERE namespace = ? ORDER BY accessed_at LIMIT ?)",
+                        (namespace, count - self.max_entries)
+                    )
+        except sqlite3.Error as e:
+            print(f"Shared cache eviction error: {e}")
+
+    def clear(self, namespace=None):
+        try:
+            with self._transaction() as conn:
+                if namespace is None:
+                    conn.execute("DELETE FROM cache_entries")
+                else:
+                    conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+        except sqlite3.Error as e:
+            print(f"Shared cache write error: {e}")
+
+    def stats(self):
+        try:
+            rows = self._connection().execute(
+                "SELECT namespace, COUNT(*) FROM cache_entries WHERE expires_at > ? GROUP BY namespace",
+                (time.time(),)
+            ).fetchall()
+            return dict(rows)
+        except sqlite3.Error as e:
+            print(f"Shared cache read error: {e}")
+            return {}
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache():
+    """Return the process-wide handle on the shared cache file, or None when disabled or unusable"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None and SHARED_CACHE_PATH:
+            try:
+                _shared_cache = SharedCache()
+            except sqlite3.Error as e:
+                print(f"Shared cache unavailable: {e}")
+                _shared_cache = False
+        return _shared_cache or None
@@ -0,0 +1,76 @@
+import os
+import threading
+from concurrent.futures import Future, CancelledError
+
+SINGLEFLIGHT_TIMEOUT_SECONDS = float(os.getenv('SINGLEFLIGHT_TIMEOUT', '30'))
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution
+
+    The first caller (the leader) runs the function; callers arriving while it
+    is in flight wait on the leader's future instead of repeating the work.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key, fn, *args, timeout=SINGLEFLIGHT_TIMEOUT_SECONDS, **kwargs):
+        """Return (result, shared); shared is True when the result came from another caller
+
+        Followers raise concurrent.futures.TimeoutError after timeout seconds; the
+        leader keeps running and still fills its future for later followers. If the
+        leader is interrupted (not a regular exception), waiting followers retry and
+        one of them becomes the new leader.
+        """
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = Future()
+                    self._calls[key] = future
+
+            if leader:
+                return self._lead(key, future, fn, args, kwargs), False
+
+            try:
+                return future.result(timeout), True
+            except CancelledError:
+                continue
+
+    def _lead(self, key, future, fn, args, kwargs):
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        except BaseException:
+            # Interrupted (e.g. the session was stopped): let followers retry
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                if self._calls.get(key) is future:
+                    del self._calls[key]
+
+
+_search_flight = None
+_search_flight_lock = threading.Lock()
+
+
+def get_search_flight():
+    """Return the process-wide singleflight group for engine searches"""
+    global _search_flight
+    with _search_flight_lock:
+        if _search_flight is None:
+            _search_flight = SingleFlight()
+        return _search_flight
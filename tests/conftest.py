@@ -0,0 +1,32 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# database.py and shared_cache.py read their paths at import time
+_TMP_DIR = tempfile.mkdtemp(prefix="izy-hunter-tests-")
+os.environ.setdefault('SQLITE_PATH', os.path.join(_TMP_DIR, 'test.db'))
+os.environ.setdefault('SHARED_CACHE_PATH', os.path.join(_TMP_DIR, 'shared_cache.db'))
+os.environ.setdefault('CORPUS_PATH', '')
+os.environ.pop('DATABASE_URL', None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def db_manager():
+    """A DatabaseManager on the test SQLite file, emptied after each test"""
+    from sqlalchemy import text
+    from database import Base, DatabaseManager
+    from shared_cache import get_shared_cache
+
+    manager = DatabaseManager()
+    yield manager
+    with manager.engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+        conn.execute(text("DELETE FROM search_history_archive"))
+    shared_cache = get_shared_cache()
+    if shared_cache:
+        shared_cache.clear()
@@ -0,0 +1,45 @@
+import json
+import multiprocessing
+
+import pytest
+
+from api_config import APIConfigManager
+
+KEYS_PER_WORKER = 15
+
+
+def config_manager(path):
+    manager = APIConfigManager()
+    manager.config_file = str(path)
+    return manager
+
+
+def set_keys(path, worker):
+    manager = config_manager(path)
+    for index in range(KEYS_PER_WORKER):
+        manager.set_api_key("Google", f"KEY_{worker}_{index}", f"value-{worker}-{index}")
+
+
+def test_set_and_remove_api_key(tmp_path):
+    manager = config_manager(tmp_path / "api_config.json")
+
+    assert manager.set_api_key("Bravo Search", "BRAVO_API_KEY", "abc")
+    assert manager.get_api_key("Bravo Search", "BRAVO_API_KEY") == "abc"
+    assert manager.remove_api_key("Bravo Search", "BRAVO_API_KEY")
+    assert not manager.remove_api_key("Bravo Search", "BRAVO_API_KEY")
+    assert json.loads((tmp_path / "api_config.json").read_text()) == {}
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_concurrent_processes_do_not_lose_keys(tmp_path):
+    path = tmp_path / "api_config.json"
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=set_keys, args=(path, worker)) for worker in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    saved = json.loads(path.read_text())["Google"]
+    assert len(saved) == 4 * KEYS_PER_WORKER
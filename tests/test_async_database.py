@@ -0,0 +1,120 @@
+import asyncio
+import inspect
+from datetime import date, datetime, timedelta
+
+from async_database import AsyncDatabaseManager
+from database import DatabaseManager, SearchHistoryDaily, opportunity_fingerprint
+
+# Sync-only plumbing with no async counterpart
+SYNC_ONLY = {'get_session'}
+
+
+def public_methods(cls):
+    return {name: member for name, member in vars(cls).items()
+            if callable(member) and not name.startswith('_')}
+
+
+def run_async(method, *args, **kwargs):
+    """Run one AsyncDatabaseManager method on a fresh manager; async generators are drained"""
+    async def run():
+        manager = AsyncDatabaseManager()
+        await manager.initialize()
+        try:
+            result = getattr(manager, method)(*args, **kwargs)
+            if inspect.isasyncgen(result):
+                return [item async for item in result]
+            return await result
+        finally:
+            await manager.close()
+    return asyncio.run(run())
+
+
+def test_async_manager_has_every_database_manager_method():
+    sync_methods = public_methods(DatabaseManager)
+    async_methods = public_methods(AsyncDatabaseManager)
+
+    assert sorted(set(sync_methods) - set(async_methods) - SYNC_ONLY) == []
+    for name, method in sync_methods.items():
+        if name in SYNC_ONLY:
+            continue
+        async_method = async_methods[name]
+        assert inspect.iscoroutinefunction(async_method) or inspect.isasyncgenfunction(async_method), name
+        if inspect.isgeneratorfunction(method):
+            assert inspect.isasyncgenfunction(async_method), name
+        assert list(inspect.signature(async_method).parameters) == list(inspect.signature(method).parameters), name
+
+
+def opportunity(title, deadline=None):
+    return {
+        'title': title,
+        'url': f"https://example.org/{title.lower().replace(' ', '-')}",
+        'source': "Teste",
+        'type': "Edital",
+        'description': "",
+        'deadline': deadline,
+        'search_engine': "Google"
+    }
+
+
+def test_async_reads_match_sync_reads(db_manager):
+    db_manager.save_search_history("edital", ["Google"], 3, "u1", keywords=["cultura"])
+    db_manager.save_search_history("edital", ["Google"], 2, "u2", keywords=["cultura"])
+    saved = opportunity("Edital de cultura", datetime(2026, 12, 1))
+    db_manager.save_opportunity(saved, "u1")
+    db_manager.save_user_preferences("u1", custom_keywords=["cultura"], preferred_engines=["Google"])
+    db_manager.record_engine_usage("Google", requests=2, day=date(2026, 6, 1))
+    session = db_manager.get_session()
+    try:
+        session.add(SearchHistoryDaily(day=date(2026, 1, 1), query="antiga", engines_key="Google",
+                                       engines=["Google"], searches=7, results_count=10, users=2))
+        session.commit()
+    finally:
+        session.close()
+    since = datetime.utcnow() - timedelta(days=1)
+
+    assert run_async('get_database_stats')['total_searches'] == db_manager.get_database_stats()['total_searches'] == 9
+    assert run_async('get_frequent_searches', since) == db_manager.get_frequent_searches(since)
+    assert run_async('get_engine_usage', date(2026, 6, 1)) == db_manager.get_engine_usage(date(2026, 6, 1))
+    assert run_async('iter_user_preferences') == list(db_manager.iter_user_preferences())
+    assert run_async('iter_saved_opportunities', "u1") == list(db_manager.iter_saved_opportunities("u1"))
+    assert run_async('get_trending_queries') == db_manager.get_trending_queries()
+    fingerprints = [opportunity_fingerprint(saved)]
+    found = db_manager.get_opportunities_by_fingerprint(fingerprints)
+    assert run_async('get_opportunities_by_fingerprint', fingerprints) == found
+    assert found[fingerprints[0]]['title'] == "Edital de cultura"
+
+
+def test_async_record_engine_usage_adds_to_the_windows(db_manager):
+    day = date(2026, 6, 1)
+    assert run_async('record_engine_usage', "Bing", 3, day)
+    assert run_async('record_engine_usage', "Bing", 2, day)
+
+    assert db_manager.get_engine_usage(day)["Bing"] == {'day': 5, 'month': 5}
+
+
+def test_async_record_engine_usage_respects_the_daily_limit(db_manager):
+    day = date(2026, 6, 1)
+    assert run_async('record_engine_usage', "Bing", 3, day, daily_limit=4)
+    assert not run_async('record_engine_usage', "Bing", 2, day, daily_limit=4)
+    assert run_async('record_engine_usage', "Bing", 1, day, daily_limit=4)
+
+    assert db_manager.get_engine_usage(day)["Bing"] == {'day': 4, 'month': 4}
+
+
+def test_enqueue_reminders_skips_ones_already_queued(db_manager):
+    deadline = datetime(2026, 12, 1)
+    db_manager.save_opportunity(opportunity("Bolsa de pesquisa", deadline), "u1")
+    saved = list(db_manager.iter_saved_opportunities("u1"))[0]
+    reminder = {
+        'saved_id': saved['id'], 'user_session': "u1", 'opportunity_id': saved['opportunity_id'],
+        'title': saved['title'], 'url': saved['url'], 'deadline': deadline,
+        'lead_hours': 24, 'due_at': deadline - timedelta(hours=24)
+    }
+
+    assert db_manager.enqueue_reminders([reminder]) == 1
+    assert run_async('enqueue_reminders', [reminder, dict(reminder, lead_hours=72)]) == 1
+    assert db_manager.enqueue_reminders([reminder]) == 0
+
+    pending = db_manager.get_pending_reminders("u1")
+    assert [item['lead_hours'] for item in pending] == [24, 72]
+    assert run_async('get_pending_reminders', "u1") == pending
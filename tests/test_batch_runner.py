@@ -0,0 +1,90 @@
+import json
+from datetime import date, datetime
+
+import pytest
+
+import batch_runner
+from batch_runner import BatchRunner, load_sweeps_file, make_sweep, unknown_engines
+from filters import FilterManager
+from search_engines import SearchEngineManager
+
+
+def write_sweeps(tmp_path, entries):
+    path = tmp_path / "sweeps.jsonl"
+    path.write_text('\n'.join(json.dumps(entry) for entry in entries), encoding='utf-8')
+    return str(path)
+
+
+def test_deadline_range_strings_are_parsed_to_dates(tmp_path):
+    path = write_sweeps(tmp_path, [{
+        'keywords': ["poesia"],
+        'filters': {'deadline_filter': "Intervalo personalizado", 'deadline_range': ["2026-01-01", "2026-03-31"]}
+    }])
+
+    [sweep] = load_sweeps_file(path)
+
+    assert sweep['filters']['deadline_range'] == (date(2026, 1, 1), date(2026, 3, 31))
+    results = [
+        {'title': "dentro", 'deadline': datetime(2026, 3, 31, 18, 0)},
+        {'title': "fora", 'deadline': datetime(2026, 4, 1)}
+    ]
+    filtered = FilterManager().apply_filters(results, include_tocantins=False, **sweep['filters'])
+    assert [result['title'] for result in filtered] == ["dentro"]
+
+
+@pytest.mark.parametrize('filters, message', [
+    ({'deadline_filter': "Amanhã"}, "deadline_filter"),
+    ({'deadline_filter': "Intervalo personalizado"}, "deadline_range"),
+    ({'deadline_range': ["2026-01-01"]}, "deadline_range"),
+    ({'deadline_range': ["2026-01-01", "31/03/2026"]}, "Invalid isoformat"),
+    ({'sort_by': "deadline"}, "sort_by")
+])
+def test_invalid_filters_are_rejected(filters, message):
+    with pytest.raises(ValueError, match=message):
+        make_sweep(keywords=["poesia"], filters=filters)
+
+
+def test_sweeps_file_errors_name_the_sweep(tmp_path):
+    path = write_sweeps(tmp_path, [{'keywords': ["a"]}, {'keywords': ["b"], 'filters': {'deadline_filter': "x"}}])
+
+    with pytest.raises(ValueError, match="sweep 2"):
+        load_sweeps_file(path)
+
+
+def test_unknown_engines_fail_the_sweep():
+    search_manager = SearchEngineManager()
+    runner = BatchRunner(search_manager, FilterManager())
+    sweep = make_sweep(keywords=["poesia"], engines=["Google", "Altavista"])
+
+    assert unknown_engines([sweep], search_manager.mock_generators) == ["Altavista"]
+    with pytest.raises(ValueError, match="Altavista"):
+        runner.run_sweep(sweep)
+
+
+def test_mock_sweep_returns_deduplicated_results():
+    runner = BatchRunner(SearchEngineManager(), FilterManager(), apply_filters=False)
+
+    results = runner.run_sweep(make_sweep(keywords=["poesia"], engines=["Google", "DuckDuckGo"]))
+
+    fingerprints = [result['fingerprint'] for result in results]
+    assert results and len(fingerprints) == len(set(fingerprints))
+
+
+def test_main_stops_before_running_on_unknown_engines(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(batch_runner, 'DatabaseManager', lambda: None)
+    path = write_sweeps(tmp_path, [{'keywords': ["poesia"], 'engines': ["Altavista"]}])
+
+    assert batch_runner.main(['--sweeps', path, '--output', str(tmp_path / "out.jsonl"), '--mock']) == 1
+    assert "Altavista" in capsys.readouterr().err
+    assert not (tmp_path / "out.jsonl").exists()
+
+
+def test_preference_sweeps_drop_engines_the_runner_lacks(db_manager, capsys):
+    db_manager.save_user_preferences("u1", custom_keywords=["poesia"], preferred_engines=["Yandex", "Google"])
+    db_manager.save_user_preferences("u2", custom_keywords=["conto"], default_filters={'deadline_filter': "x"})
+
+    sweeps = batch_runner.load_preference_sweeps(db_manager, None, "", list(SearchEngineManager().mock_generators))
+
+    assert [(sweep['keywords'], sweep['engines']) for sweep in sweeps] == [(["poesia"], ["Google"])]
+    err = capsys.readouterr().err
+    assert "Yandex" in err and "u2" in err
@@ -0,0 +1,109 @@
+import os
+import threading
+from datetime import date, datetime
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import corpus_store
+from corpus_store import COMPACTION_MARKER, CorpusStore
+
+DAY_ONE = datetime(2026, 6, 1, 9, 0)
+DAY_TWO = datetime(2026, 6, 2, 9, 0)
+
+
+def result(title, **extra):
+    return dict({
+        'title': title, 'url': f"https://example.org/{title}", 'source': "Teste", 'type': "Edital",
+        'deadline': date(2026, 7, 1), 'search_engine': "Google", 'is_real_data': True
+    }, **extra)
+
+
+@pytest.fixture
+def store(tmp_path):
+    # Flushes are triggered by hand so tests never race the background thread
+    return CorpusStore(str(tmp_path), flush_rows=10 ** 6, flush_seconds=3600)
+
+
+def part_files(store, day):
+    return sorted(os.listdir(store._partition_dir(day)))
+
+
+def test_rows_round_trip(store):
+    store.append([result("edital", query_hits=2)], query="cultura", keywords=["teatro"], collected_at=DAY_ONE)
+    store.flush()
+
+    [row] = store.query().to_pylist()
+    assert row['title'] == "edital" and row['query_hits'] == 2 and row['keywords'] == ["teatro"]
+    assert row['deadline'] == datetime(2026, 7, 1) and row['collected_at'] == DAY_ONE
+    assert row['day'] == "2026-06-01" and row['query'] == "cultura"
+
+
+def test_day_range_only_opens_matching_partitions(store):
+    store.append([result("junho-1")], collected_at=DAY_ONE)
+    store.append([result("junho-2")], collected_at=DAY_TWO)
+    store.flush()
+    # Decoding this file would fail, so the filter has to prune its partition
+    with open(os.path.join(store._partition_dir("2026-06-01"), "part-corrupt.parquet"), 'wb') as f:
+        f.write(b"not parquet")
+
+    table = store.query(columns=['title'], start=date(2026, 6, 2), end=date(2026, 6, 2))
+    assert table.column('title').to_pylist() == ["junho-2"]
+
+
+def test_append_leaves_the_write_to_the_flusher(tmp_path, monkeypatch):
+    store = CorpusStore(str(tmp_path), flush_rows=1, flush_seconds=3600)
+    flushed = threading.Event()
+    threads = []
+
+    def flush():
+        threads.append(threading.current_thread())
+        flushed.set()
+
+    monkeypatch.setattr(store, 'flush', flush)
+    store.append([result("edital")], collected_at=DAY_ONE)
+
+    assert flushed.wait(5)
+    assert threads[0] is not threading.current_thread()
+
+
+def test_compact_merges_files_without_losing_rows(store):
+    for title in ["a", "b", "c"]:
+        store.append([result(title)], collected_at=DAY_ONE)
+        store.flush()
+    assert len(part_files(store, "2026-06-01")) == 3
+
+    assert store.compact(date(2026, 6, 1)) == 3
+
+    assert len(part_files(store, "2026-06-01")) == 1
+    assert sorted(store.query(columns=['title']).column('title').to_pylist()) == ["a", "b", "c"]
+
+
+def test_interrupted_compaction_never_duplicates_rows(store, monkeypatch):
+    for title in ["a", "b", "c"]:
+        store.append([result(title)], collected_at=DAY_ONE)
+        store.flush()
+    real_remove = os.remove
+    removed = []
+
+    def crash_after_first_remove(path):
+        if removed:
+            raise OSError("crash")
+        removed.append(path)
+        real_remove(path)
+
+    monkeypatch.setattr(corpus_store.os, 'remove', crash_after_first_remove)
+    with pytest.raises(OSError):
+        store.compact(date(2026, 6, 1))
+    monkeypatch.setattr(corpus_store.os, 'remove', real_remove)
+
+    # The merged file is still hidden and the marker is ignored by readers
+    assert COMPACTION_MARKER in part_files(store, "2026-06-01")
+    titles = store.query(columns=['title']).column('title').to_pylist()
+    assert len(titles) == 2 and len(set(titles)) == 2
+
+    assert CorpusStore(store.root).recover() == 1
+    [merged] = part_files(store, "2026-06-01")
+    assert merged.startswith('part-')
+    assert sorted(store.query(columns=['title']).column('title').to_pylist()) == ["a", "b", "c"]
@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from database import DatabaseManager, Opportunity
+
+
+def test_schema_setup_runs_once_per_process(db_manager, monkeypatch):
+    calls = []
+    monkeypatch.setattr(DatabaseManager, '_setup_schema', lambda self: calls.append(self))
+
+    for _ in range(3):
+        manager = DatabaseManager()
+        assert manager.db_available
+        assert manager.catalog_index.backend == db_manager.catalog_index.backend == 'fts5'
+
+    assert calls == []
+
+
+def catalog_rows(db_manager):
+    session = db_manager.get_session()
+    try:
+        return session.query(Opportunity).all()
+    finally:
+        session.close()
+
+
+def test_upserts_refresh_only_corrected_fields(db_manager):
+    first = {
+        'title': "Prêmio de Contos", 'url': "https://example.org/premio", 'source': "Fundação",
+        'description': "Inscrições abertas", 'deadline': datetime(2026, 8, 1), 'published_date': datetime(2026, 5, 1)
+    }
+    opportunity_id = db_manager.upsert_opportunity(first)
+    [row] = catalog_rows(db_manager)
+    created_updated_at = row.updated_at
+
+    assert db_manager.upsert_opportunity(dict(first, published_date=datetime(2026, 6, 1))) == opportunity_id
+    assert catalog_rows(db_manager)[0].updated_at == created_updated_at
+
+    assert db_manager.upsert_opportunity(dict(first, deadline=datetime(2026, 9, 1), description=None,
+                                              source="Outra fonte", published_date=datetime(2026, 6, 2)))
+    [row] = catalog_rows(db_manager)
+    assert (row.deadline, row.description, row.source, row.published_date) == \
+        (datetime(2026, 9, 1), "Inscrições abertas", "Fundação", datetime(2026, 5, 1))
+    assert row.updated_at > created_updated_at
+
+
+def test_concurrent_first_saves_share_one_catalog_row(db_manager):
+    opportunity = {'title': "Edital de Poesia", 'url': "https://example.org/poesia"}
+    users = [f"u{index}" for index in range(8)]
+    with ThreadPoolExecutor(max_workers=len(users)) as executor:
+        saved = list(executor.map(lambda user: DatabaseManager().save_opportunity(dict(opportunity), user), users))
+
+    assert saved == [True] * len(users)
+    assert len(catalog_rows(db_manager)) == 1
+    assert not db_manager.save_opportunity(dict(opportunity), "u0")
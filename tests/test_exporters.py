@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from database import opportunity_fingerprint
+from exporters import iter_csv, iter_ics, iter_jsonl, write_export
+
+ROWS = [
+    {
+        'title': "Edital de Poesia, 2026", 'type': "Edital", 'source': "FUNARTE", 'location': "Nacional",
+        'deadline': datetime(2026, 11, 30), 'tocantins_eligible': True,
+        'url': "https://example.org/poesia", 'description': "Linha 1\nLinha 2; com vírgula, e mais",
+        'fingerprint': "f" * 64
+    },
+    {'title': "Sem prazo", 'url': "https://example.org/sem-prazo", 'deadline': None}
+]
+
+
+def test_csv_has_header_and_iso_dates():
+    rows = list(csv.DictReader(io.StringIO(''.join(iter_csv(ROWS)))))
+
+    assert [row['title'] for row in rows] == ["Edital de Poesia, 2026", "Sem prazo"]
+    assert rows[0]['deadline'] == "2026-11-30T00:00:00"
+    assert rows[0]['description'] == "Linha 1\nLinha 2; com vírgula, e mais"
+
+
+def test_jsonl_writes_one_document_per_row():
+    lines = list(iter_jsonl(ROWS))
+
+    assert len(lines) == 2 and all(line.endswith('\n') for line in lines)
+    assert json.loads(lines[0])['deadline'] == "2026-11-30T00:00:00"
+    assert json.loads(lines[1])['source'] is None
+
+
+def test_ics_has_one_event_per_deadline_with_stable_uids():
+    feed = ''.join(iter_ics(ROWS))
+    row_without_fingerprint = {'title': "Bolsa", 'url': "https://example.org/bolsa", 'deadline': datetime(2026, 12, 1)}
+
+    assert feed.startswith('BEGIN:VCALENDAR\r\n') and feed.endswith('END:VCALENDAR\r\n')
+    assert feed.count('BEGIN:VEVENT') == 1
+    assert f"UID:opportunity-{'f' * 64}@izy-hunter" in feed.replace('\r\n ', '')
+    assert 'DTSTART;VALUE=DATE:20261130' in feed
+    assert 'SUMMARY:Prazo: Edital de Poesia\\, 2026' in feed
+    assert all(len(line.encode('utf-8')) <= 75 for line in feed.split('\r\n'))
+    # Without a stored fingerprint the UID is derived from the content, identically on every run
+    uid = f"opportunity-{opportunity_fingerprint(row_without_fingerprint)}@izy-hunter"
+    assert uid in ''.join(iter_ics([row_without_fingerprint])).replace('\r\n ', '')
+
+
+def test_write_export_counts_bytes_and_stops_at_the_cap():
+    buffer = io.BytesIO()
+    written = write_export('jsonl', ROWS, buffer)
+
+    assert written == len(buffer.getvalue()) > 0
+    with pytest.raises(ValueError):
+        write_export('jsonl', ROWS, io.BytesIO(), max_bytes=written - 1)
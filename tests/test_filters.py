@@ -0,0 +1,58 @@
+from datetime import date, datetime
+
+from filters import DeadlineIndex, FilterManager
+
+NOW = datetime(2026, 6, 1, 12, 0)
+
+RESULTS = [
+    {'title': "c", 'deadline': datetime(2026, 6, 20)},
+    {'title': "sem prazo", 'deadline': None},
+    {'title': "a", 'deadline': datetime(2026, 5, 30)},
+    {'title': "b", 'deadline': datetime(2026, 6, 5, 23, 59)},
+    {'title': "d", 'deadline': datetime(2026, 9, 1)}
+]
+
+
+def titles(results):
+    return [result['title'] for result in results]
+
+
+def test_range_is_inclusive_and_ordered_by_deadline():
+    index = DeadlineIndex(RESULTS)
+
+    assert len(index) == 4
+    assert titles(index.range(datetime(2026, 5, 30), datetime(2026, 6, 20))) == ["a", "b", "c"]
+    assert titles(index.range(start=datetime(2026, 6, 1))) == ["b", "c", "d"]
+    assert titles(index.range(end=datetime(2026, 6, 1))) == ["a"]
+    assert index.range(datetime(2027, 1, 1)) == []
+
+
+def test_plain_dates_cover_the_whole_end_day():
+    index = DeadlineIndex(RESULTS)
+
+    assert titles(index.range(date(2026, 6, 5), date(2026, 6, 5))) == ["b"]
+    assert index.count(date(2026, 5, 1), date(2026, 6, 5)) == 2
+
+
+def test_range_in_original_order_keeps_the_input_order():
+    index = DeadlineIndex(RESULTS)
+
+    assert titles(index.range_in_original_order(date(2026, 5, 1), date(2026, 12, 31))) == ["c", "a", "b", "d"]
+
+
+def test_still_open_and_closing_windows():
+    index = DeadlineIndex(RESULTS)
+
+    assert titles(index.still_open(NOW)) == ["b", "c", "d"]
+    assert titles(index.closing_this_week(NOW)) == ["b"]
+    assert titles(index.closing_within(30, NOW)) == ["b", "c"]
+
+
+def test_apply_filters_uses_the_deadline_index():
+    manager = FilterManager()
+    results = [dict(result, tocantins_eligible=True) for result in RESULTS]
+
+    assert titles(manager.apply_filters(results, deadline_filter="Intervalo personalizado",
+                                        deadline_range=(date(2026, 6, 1), date(2026, 6, 30)))) == ["c", "b"]
+    assert len(manager.apply_filters(results)) == len(results)
+    assert manager.get_deadline_index(results) is manager.get_deadline_index(results)
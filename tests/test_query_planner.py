@@ -0,0 +1,55 @@
+from query_planner import QueryPlanner
+from search_engines import SearchEngineManager
+
+KEYWORDS = [f"palavra{index}" for index in range(10)]
+
+
+def test_or_engines_group_keywords_within_the_budget():
+    planner = QueryPlanner()
+
+    plan = planner.plan("Google", "concurso", KEYWORDS, budget=3)
+
+    assert len(plan) == 3
+    assert [term for _, group in plan for term in group] == KEYWORDS
+    assert plan[0][0] == "concurso (palavra0 OR palavra1 OR palavra2 OR palavra3)"
+    assert planner.left_out(plan, KEYWORDS) == []
+
+
+def test_engines_without_or_drop_the_keywords_past_the_budget():
+    planner = QueryPlanner()
+
+    plan = planner.plan("DuckDuckGo", "concurso", KEYWORDS + ["Palavra0", " palavra1 "], budget=3)
+
+    assert [subquery for subquery, _ in plan] == ["concurso palavra0", "concurso palavra1", "concurso palavra2"]
+    assert planner.left_out(plan, KEYWORDS) == KEYWORDS[3:]
+    assert planner.plan("DuckDuckGo", "concurso", [], budget=3) == [("concurso", [])]
+    assert planner.plan("Google", "", ["prêmio literário"]) == [('"prêmio literário"', ["prêmio literário"])]
+
+
+def test_free_engines_keep_their_budget_when_paid_engines_are_added():
+    planner = QueryPlanner(request_budget=12, free_engine_budget=6)
+
+    assert planner.engine_budgets(["DuckDuckGo"], {"DuckDuckGo"}) == {"DuckDuckGo": 6}
+    assert planner.engine_budgets(["Google", "Yahoo!", "Bravo Search", "DuckDuckGo"], {"DuckDuckGo"}) == \
+        {"Google": 4, "Yahoo!": 4, "Bravo Search": 4, "DuckDuckGo": 6}
+
+
+def test_merge_ranks_documents_found_by_more_subqueries_first():
+    a, b, c = ({'title': title, 'url': f"https://example.org/{title}"} for title in "abc")
+    batches = [[a, b], [dict(c), dict(b, url="https://EXAMPLE.org/b/")], [dict(b), dict(b)]]
+
+    merged = QueryPlanner.merge_ranked(batches)
+
+    assert [(result['title'], result['query_hits']) for result in merged] == [("b", 3), ("a", 1), ("c", 1)]
+
+
+def test_dropped_keywords_are_reported(monkeypatch):
+    manager = SearchEngineManager()
+    manager.use_real_data = True
+    manager.quota = None
+    monkeypatch.setattr(manager, 'search_engine', lambda engine, query, keywords, budget=None: [])
+
+    list(manager.iter_engine_batches(["Google", "Yahoo!", "Bravo Search", "DuckDuckGo"], "concurso", KEYWORDS))
+
+    free_budget = manager.planner.free_engine_budget
+    assert manager.dropped_keywords == {"DuckDuckGo": KEYWORDS[free_budget:]}
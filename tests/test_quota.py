@@ -0,0 +1,137 @@
+import uuid
+
+import pytest
+
+import request_policy
+from quota import QuotaScheduler
+from result_cache import make_cache_key
+from search_engines import SearchEngineManager
+
+
+class FakeUsageDatabase:
+    def __init__(self):
+        self.recorded = []
+        self.usage = {}
+
+    def record_engine_usage(self, engine, requests=1, day=None):
+        self.recorded.append((engine, requests))
+        return True
+
+    def get_engine_usage(self, day=None):
+        return self.usage
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self.headers = {}
+        self._payload = payload or {}
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise request_policy.requests.HTTPError(f"HTTP {self.status_code}")
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Answers upstream requests from a script of responses, recording what was sent"""
+    sent, script = [], []
+
+    def request(method, url, **kwargs):
+        sent.append((method, url))
+        return script.pop(0)
+
+    monkeypatch.setattr(request_policy.requests, 'request', request)
+    monkeypatch.setattr(request_policy.time, 'sleep', lambda seconds: None)
+    return sent, script
+
+
+@pytest.fixture
+def manager():
+    manager = SearchEngineManager()
+    manager.use_real_data = True
+    manager.quota = QuotaScheduler(FakeUsageDatabase())
+    return manager
+
+
+def test_retries_are_charged_to_the_quota(manager, upstream, monkeypatch):
+    monkeypatch.setenv('GOOGLE_API_KEY', "key")
+    monkeypatch.setenv('GOOGLE_CSE_ID', "cx")
+    sent, script = upstream
+    script.extend([FakeResponse(503), FakeResponse(200, {'items': [{'title': "Edital", 'link': "https://x.org"}]})])
+
+    results = manager._search_real("Google", "edital", [])
+
+    assert len(results) == 1 and len(sent) == 2
+    assert manager.quota.db_manager.recorded == [("Google", 2)]
+
+
+def test_yahoo_token_request_is_charged_too(manager, upstream, monkeypatch):
+    for name in ('YAHOO_CLIENT_ID', 'YAHOO_CLIENT_SECRET', 'YAHOO_APP_ID'):
+        monkeypatch.setenv(name, "value")
+    sent, script = upstream
+    script.extend([FakeResponse(200, {'access_token': "token"}), FakeResponse(200, {'web': {'results': []}})])
+
+    manager._search_real("Yahoo!", "edital", [])
+
+    assert [method for method, _ in sent] == ['POST', 'GET']
+    assert manager.quota.db_manager.recorded == [("Yahoo!", 2)]
+
+
+def test_failed_requests_still_count(manager, upstream, monkeypatch):
+    monkeypatch.setenv('BRAVO_API_KEY', "key")
+    sent, script = upstream
+    script.extend([FakeResponse(503), FakeResponse(503), FakeResponse(503)])
+
+    with pytest.raises(request_policy.requests.HTTPError):
+        manager._search_real("Bravo Search", "edital", [])
+
+    assert manager.quota.db_manager.recorded == [("Bravo Search", 3)]
+
+
+def test_unconfigured_engine_sends_nothing_and_is_not_charged(manager, upstream, monkeypatch):
+    monkeypatch.delenv('GOOGLE_API_KEY', raising=False)
+    sent, _ = upstream
+
+    with pytest.raises(RuntimeError, match="GOOGLE_API_KEY"):
+        manager._search_real("Google", "edital", [])
+
+    assert sent == [] and manager.quota.db_manager.recorded == []
+
+
+def test_free_engines_are_not_charged(manager, upstream):
+    sent, script = upstream
+    page = FakeResponse(200)
+    page.content = b"<html></html>"
+    script.append(page)
+    # The DuckDuckGo scraper sends through its own session
+    manager.real_search.session = request_policy.requests
+
+    manager._search_real("DuckDuckGo", "edital", [], planned=True)
+
+    assert len(sent) == 1 and manager.quota.db_manager.recorded == []
+
+
+def test_plans_cut_short_by_quota_are_not_cached(manager, upstream, monkeypatch):
+    monkeypatch.setenv('GOOGLE_API_KEY', "key")
+    monkeypatch.setenv('GOOGLE_CSE_ID', "cx")
+    sent, script = upstream
+    keywords = [f"palavra{index}" for index in range(20)]
+    query = f"edital {uuid.uuid4().hex}"
+    answer = {'items': [{'title': "Edital", 'link': "https://x.org"}]}
+
+    # One request left today: a single sub-query, so some keywords go unsearched
+    manager.quota.db_manager.usage = {"Google": {'day': 99, 'month': 99}}
+    script.append(FakeResponse(200, answer))
+    assert len(manager.search_engine("Google", query, keywords, budget=4)) == 1
+    assert len(sent) == 1
+    assert manager.cache.get(make_cache_key("Google", query, keywords, True)) is None
+
+    manager.quota = QuotaScheduler(FakeUsageDatabase())
+    script.extend(FakeResponse(200, answer) for _ in range(4))
+    manager.search_engine("Google", query, keywords, budget=4)
+    assert len(sent) == 5
+    assert manager.cache.get(make_cache_key("Google", query, keywords, True)) is not None
@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from reminders import ReminderScheduler
+
+
+class RecordingNotifier:
+    def __init__(self, result=True, during_send=None):
+        self.sent = []
+        self.result = result
+        self.during_send = during_send
+
+    def send(self, reminder):
+        self.sent.append(reminder)
+        if self.during_send:
+            self.during_send()
+        return self.result
+
+
+@pytest.fixture
+def now():
+    # save_opportunity stamps saved_at with the real clock
+    return datetime.utcnow()
+
+
+def save(db_manager, title, deadline, user_session="u1"):
+    db_manager.save_opportunity({
+        'title': title, 'url': f"https://example.org/{title}", 'source': "Teste", 'type': "Edital",
+        'description': "", 'deadline': deadline, 'search_engine': "Google"
+    }, user_session)
+    return next(row['id'] for row in db_manager.get_saved_opportunities(user_session) if row['title'] == title)
+
+
+def test_reminder_fires_once_when_due(db_manager, now):
+    save(db_manager, "edital", now + timedelta(hours=50))
+    scheduler = ReminderScheduler(db_manager, lead_hours=[72, 24])
+
+    assert scheduler.tick(now) == 0
+    assert scheduler.tick(now + timedelta(hours=27)) == 1
+    assert scheduler.tick(now + timedelta(hours=28)) == 0
+
+    [reminder] = db_manager.get_pending_reminders("u1")
+    # The 72h reminder was already past when the user saved, so it never fires
+    assert reminder['lead_hours'] == 24 and reminder['title'] == "edital"
+
+
+def test_only_the_latest_missed_reminder_fires_after_downtime(db_manager, now):
+    save(db_manager, "bolsa", now + timedelta(hours=100))
+    scheduler = ReminderScheduler(db_manager, lead_hours=[72, 24])
+
+    assert scheduler.tick(now + timedelta(hours=80)) == 1
+    assert [reminder['lead_hours'] for reminder in db_manager.get_pending_reminders("u1")] == [24]
+
+
+def test_unsaved_opportunities_do_not_fire(db_manager, now):
+    saved_id = save(db_manager, "premio", now + timedelta(hours=30))
+    scheduler = ReminderScheduler(db_manager, lead_hours=[24])
+    scheduler.tick(now)
+
+    assert db_manager.remove_saved_opportunity(saved_id, "u1")
+    assert scheduler.tick(now + timedelta(hours=7)) == 0
+    assert db_manager.get_pending_reminders("u1") == []
+
+
+def test_saves_after_the_first_load_are_picked_up(db_manager, now):
+    scheduler = ReminderScheduler(db_manager, lead_hours=[24], new_saves_interval=60)
+    scheduler.tick(now)
+    save(db_manager, "residencia", now + timedelta(hours=30))
+
+    assert scheduler.tick(now + timedelta(minutes=2)) == 0
+    assert scheduler.tick(now + timedelta(hours=7)) == 1
+
+
+def test_deadlines_moved_into_the_loaded_window_fire(db_manager, now):
+    save(db_manager, "edital", now + timedelta(hours=200))
+    [saved] = db_manager.get_saved_opportunities("u1")
+    scheduler = ReminderScheduler(db_manager, lead_hours=[24], window_hours=24)
+    scheduler.tick(now)
+
+    # A later search refreshed the catalog row with an earlier deadline
+    assert db_manager.update_opportunity(saved['opportunity_id'], deadline=now + timedelta(hours=30))
+    assert scheduler.tick(now + timedelta(minutes=2)) == 0
+    assert scheduler.tick(now + timedelta(hours=7)) == 1
+    assert scheduler.tick(now + timedelta(hours=8)) == 0
+
+
+def test_two_schedulers_write_each_reminder_once(db_manager, now):
+    save(db_manager, "edital", now + timedelta(hours=30))
+    schedulers = [ReminderScheduler(db_manager, lead_hours=[24]) for _ in range(2)]
+    for scheduler in schedulers:
+        scheduler.tick(now)
+
+    assert [scheduler.tick(now + timedelta(hours=7)) for scheduler in schedulers] == [1, 0]
+
+
+def test_notifier_receives_and_marks_reminders(db_manager, now):
+    save(db_manager, "edital", now + timedelta(hours=30))
+    notifier = RecordingNotifier()
+    scheduler = ReminderScheduler(db_manager, notifier=notifier, lead_hours=[24])
+    scheduler.tick(now)
+    scheduler.tick(now + timedelta(hours=7))
+
+    assert [reminder['title'] for reminder in notifier.sent] == ["edital"]
+    assert db_manager.get_pending_reminders("u1") == []
+    assert scheduler.seconds_until_next(now + timedelta(hours=7)) >= 1.0
+
+
+def test_two_schedulers_deliver_each_reminder_once(db_manager, now):
+    save(db_manager, "edital", now + timedelta(hours=30))
+    other = ReminderScheduler(db_manager, notifier=RecordingNotifier(), lead_hours=[24])
+    # The other process delivers while this one is still sending
+    notifier = RecordingNotifier(during_send=other.deliver)
+    scheduler = ReminderScheduler(db_manager, notifier=notifier, lead_hours=[24])
+    scheduler.tick(now)
+    scheduler.tick(now + timedelta(hours=7))
+
+    assert len(notifier.sent) == 1 and other.notifier.sent == []
+    assert other.deliver() == 0
+
+
+def test_failed_sends_are_retried_once_the_claim_expires(db_manager, now):
+    save(db_manager, "edital", now + timedelta(hours=30))
+    failing = ReminderScheduler(db_manager, notifier=RecordingNotifier(result=False), lead_hours=[24])
+    failing.tick(now)
+    failing.tick(now + timedelta(hours=7))
+    assert len(failing.notifier.sent) == 1
+
+    assert ReminderScheduler(db_manager, notifier=RecordingNotifier(), lead_hours=[24]).deliver() == 0
+    retrying = ReminderScheduler(db_manager, notifier=RecordingNotifier(), lead_hours=[24], claim_seconds=0)
+    assert retrying.deliver() == 1
+    assert db_manager.get_pending_reminders("u1") == []
@@ -0,0 +1,64 @@
+from result_store import ResultStore, page_bounds
+
+
+def result(fingerprint, title, **extra):
+    return dict({'fingerprint': fingerprint, 'title': title, 'url': f"https://example.org/{fingerprint}"}, **extra)
+
+
+def test_sessions_sharing_a_fingerprint_keep_their_own_payloads():
+    store = ResultStore()
+    first_ids = store.put_many([result('abc', "Edital de cultura 2026")])
+    second_ids = store.put_many([result('abc', "Edital de cultura 2026 - prazo prorrogado")])
+
+    assert first_ids != second_ids
+    assert store.materialize(first_ids)[0]['title'] == "Edital de cultura 2026"
+    assert store.materialize(second_ids)[0]['title'] == "Edital de cultura 2026 - prazo prorrogado"
+
+
+def test_identical_payloads_are_stored_once():
+    store = ResultStore()
+    first_ids = store.put_many([result('abc', "Edital", is_new=True)])
+    second_ids = store.put_many([result('abc', "Edital", is_new=False)])
+
+    assert first_ids == second_ids
+    assert store.stats()['entries'] == 1
+    assert 'is_new' not in store.materialize(first_ids)[0]
+
+
+def test_materialize_returns_copies_in_order():
+    store = ResultStore()
+    ids = store.put_many([result('a', "A"), result('b', "B")])
+
+    results = store.materialize(list(reversed(ids)))
+    results[0]['title'] = "changed"
+
+    assert [item['fingerprint'] for item in results] == ['b', 'a']
+    assert store.materialize(ids[1:])[0]['title'] == "B"
+
+
+def test_evicted_ids_are_restored_by_fingerprint():
+    store = ResultStore(max_entries=1)
+    ids = store.put_many([result('a', "A"), result('b', "B")])
+    requested = []
+
+    def loader(fingerprints):
+        requested.extend(fingerprints)
+        return {'a': result('a', "A (catálogo)")}
+
+    assert [item['title'] for item in store.materialize(ids, loader)] == ["A (catálogo)", "B"]
+    assert requested == ['a']
+    assert store.evicted >= 1
+
+
+def test_unrestorable_ids_are_left_out():
+    store = ResultStore(max_entries=1)
+    ids = store.put_many([result('a', "A"), result('b', "B")])
+
+    assert [item['fingerprint'] for item in store.materialize(ids, lambda fingerprints: {})] == ['b']
+
+
+def test_page_bounds_clamps_the_page():
+    assert page_bounds(45, 1, 20) == (0, 20, 3)
+    assert page_bounds(45, 3, 20) == (40, 45, 3)
+    assert page_bounds(45, 9, 20) == (40, 45, 3)
+    assert page_bounds(0, 1, 20) == (0, 0, 1)
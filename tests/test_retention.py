@@ -0,0 +1,126 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from database import SearchHistory, SearchHistoryDaily
+from retention import SearchHistoryRetention
+
+NOW = datetime(2026, 6, 15, 12, 0)
+
+
+def add_history(db_manager, rows):
+    session = db_manager.get_session()
+    try:
+        session.add_all(SearchHistory(**row) for row in rows)
+        session.commit()
+    finally:
+        session.close()
+
+
+def old_row(query="edital", days_ago=40, user_session="u1", results_count=3):
+    return {
+        'query': query,
+        'engines': ["Google", "DuckDuckGo"],
+        'keywords': ["cultura"],
+        'results_count': results_count,
+        'timestamp': NOW - timedelta(days=days_ago),
+        'user_session': user_session
+    }
+
+
+def daily_rows(db_manager):
+    session = db_manager.get_session()
+    try:
+        return [(row.query, row.searches, row.results_count, row.users)
+                for row in session.query(SearchHistoryDaily).order_by(SearchHistoryDaily.query).all()]
+    finally:
+        session.close()
+
+
+def archive_ids(db_manager):
+    with db_manager.engine.connect() as conn:
+        return sorted(conn.execute(text("SELECT id FROM search_history_archive")).scalars())
+
+
+def test_archive_moves_old_rows_and_rolls_them_up(db_manager):
+    add_history(db_manager, [
+        old_row(user_session="u1"),
+        old_row(user_session="u2", results_count=5),
+        old_row(query="bolsa"),
+        old_row(query="recente", days_ago=1)
+    ])
+    retention = SearchHistoryRetention(db_manager, hot_days=30, batch_size=2)
+
+    assert retention.archive_old_rows(NOW) == 3
+
+    assert daily_rows(db_manager) == [("bolsa", 1, 3, 1), ("edital", 2, 8, 2)]
+    assert len(archive_ids(db_manager)) == 3
+    with db_manager.engine.connect() as conn:
+        keywords = conn.execute(text("SELECT keywords FROM search_history_archive")).scalars().all()
+    assert all(json.loads(value) == ["cultura"] for value in keywords)
+    session = db_manager.get_session()
+    try:
+        assert [row.query for row in session.query(SearchHistory).all()] == ["recente"]
+    finally:
+        session.close()
+
+
+def test_rows_already_archived_are_not_rolled_up_twice(db_manager):
+    add_history(db_manager, [old_row(), old_row(query="bolsa")])
+    session = db_manager.get_session()
+    try:
+        leftover = session.query(SearchHistory).filter(SearchHistory.query == "edital").one()
+        leftover_id, leftover_timestamp = leftover.id, leftover.timestamp
+    finally:
+        session.close()
+    # A run that archived and rolled up this row, but whose delete never happened
+    with db_manager.engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO search_history_archive (id, query, timestamp) VALUES (:id, 'edital', :timestamp)"),
+            {'id': leftover_id, 'timestamp': leftover_timestamp}
+        )
+
+    assert SearchHistoryRetention(db_manager, hot_days=30).archive_old_rows(NOW) == 2
+
+    assert daily_rows(db_manager) == [("bolsa", 1, 3, 1)]
+    assert len(archive_ids(db_manager)) == 2
+    assert SearchHistoryRetention(db_manager, hot_days=30).archive_old_rows(NOW) == 0
+
+
+def test_archive_rejects_duplicate_rows(db_manager):
+    with db_manager.engine.begin() as conn:
+        conn.execute(text("INSERT INTO search_history_archive (id, query, timestamp) VALUES (1, 'edital', :t)"),
+                     {'t': NOW})
+    with pytest.raises(IntegrityError):
+        with db_manager.engine.begin() as conn:
+            conn.execute(text("INSERT INTO search_history_archive (id, query, timestamp) VALUES (1, 'edital', :t)"),
+                         {'t': NOW})
+    assert archive_ids(db_manager) == [1]
+
+
+def test_reused_ids_are_still_archived(db_manager):
+    # An archived search whose id SQLite handed out again once search_history was emptied
+    with db_manager.engine.begin() as conn:
+        conn.execute(text("INSERT INTO search_history_archive (id, query, timestamp) VALUES (1, 'antiga', :t)"),
+                     {'t': NOW - timedelta(days=300)})
+    add_history(db_manager, [dict(old_row(), id=1)])
+
+    assert SearchHistoryRetention(db_manager, hot_days=30).archive_old_rows(NOW) == 1
+
+    assert archive_ids(db_manager) == [1, 1]
+    assert daily_rows(db_manager) == [("edital", 1, 3, 1)]
+
+
+def test_later_batches_add_onto_an_existing_day(db_manager):
+    add_history(db_manager, [old_row(user_session="u1")])
+    retention = SearchHistoryRetention(db_manager, hot_days=30)
+    assert retention.archive_old_rows(NOW) == 1
+
+    later = dict(old_row(user_session="u2", results_count=4), timestamp=NOW - timedelta(days=40, hours=1))
+    add_history(db_manager, [later])
+    assert retention.archive_old_rows(NOW) == 1
+
+    assert daily_rows(db_manager) == [("edital", 2, 7, 2)]
@@ -0,0 +1,104 @@
+import uuid
+
+import pytest
+
+from engine_stats import EngineStats
+from search_engines import SearchEngineManager
+
+
+@pytest.fixture
+def manager():
+    manager = SearchEngineManager()
+    manager.use_real_data = True
+    manager.corpus = None
+    return manager
+
+
+def use_fresh_stats(manager, monkeypatch, engine):
+    stats = EngineStats()
+    registry = manager.engine_stats()
+    monkeypatch.setattr(registry, 'get', lambda name: stats if name == engine else EngineStats())
+    return stats
+
+
+def plan_subqueries(manager, monkeypatch, subqueries):
+    monkeypatch.setattr(manager.planner, 'plan',
+                        lambda engine, query, keywords, budget=None: [(subquery, []) for subquery in subqueries])
+
+
+def unique_query():
+    return f"edital {uuid.uuid4().hex}"
+
+
+def test_engine_failure_counts_as_an_error(manager, monkeypatch):
+    stats = use_fresh_stats(manager, monkeypatch, "Google")
+    plan_subqueries(manager, monkeypatch, ["edital"])
+
+    def fail(query, custom_keywords):
+        raise ConnectionError("timeout")
+    manager.api_methods["Google"] = fail
+
+    batches = list(manager.iter_engine_batches(["Google"], unique_query(), []))
+
+    assert batches == [("Google", [])]
+    assert stats.summary()['error_rate'] == 1.0
+
+
+def test_empty_answer_after_failed_subqueries_is_an_error(manager, monkeypatch):
+    stats = use_fresh_stats(manager, monkeypatch, "Google")
+    plan_subqueries(manager, monkeypatch, ["edital a", "edital b"])
+
+    def answer(query, custom_keywords):
+        if query == "edital a":
+            raise ValueError("unexpected payload")
+        return []
+    manager.api_methods["Google"] = answer
+
+    assert list(manager.iter_engine_batches(["Google"], unique_query(), [])) == [("Google", [])]
+    assert stats.summary()['error_rate'] == 1.0
+
+
+def test_partial_failure_keeps_the_results_found(manager, monkeypatch):
+    stats = use_fresh_stats(manager, monkeypatch, "Google")
+    plan_subqueries(manager, monkeypatch, ["edital a", "edital b"])
+
+    def answer(query, custom_keywords):
+        if query == "edital a":
+            raise ValueError("unexpected payload")
+        return [{'title': "Edital B", 'url': "https://example.org/b", 'description': "",
+                 'search_engine': "Google", 'is_real_data': True}]
+    manager.api_methods["Google"] = answer
+
+    [(engine, batch)] = list(manager.iter_engine_batches(["Google"], unique_query(), []))
+
+    assert [result['title'] for result in batch] == ["Edital B"]
+    assert stats.summary()['error_rate'] == 0.0
+
+
+def test_duckduckgo_challenge_page_is_an_error(monkeypatch):
+    import real_search
+
+    class ChallengePolicy:
+        def get(self, url, **kwargs):
+            return type('Response', (), {'status_code': 202, 'content': b''})()
+
+    monkeypatch.setattr(real_search, 'get_policy', lambda engine: ChallengePolicy())
+
+    with pytest.raises(real_search.requests.HTTPError):
+        real_search.RealSearchEngine().search_duckduckgo("edital", [])
+
+
+def test_auto_mode_resamples_engines_left_out():
+    from engine_stats import AUTO_MIN_SAMPLES, EngineStatsRegistry
+
+    registry = EngineStatsRegistry()
+    for engine, eligible, error in (("Google", 5, False), ("Bravo Search", 3, False), ("Yahoo!", 0, True)):
+        for _ in range(AUTO_MIN_SAMPLES):
+            registry.get(engine).record_call(0.2, eligible, eligible, error=error)
+    left_out_at = registry.get("Yahoo!").last_call_at
+    engines = ["Google", "Bravo Search", "Yahoo!"]
+
+    assert registry.select(engines, max_engines=2, resample_seconds=900, now=left_out_at + 850) == \
+        ["Google", "Bravo Search"]
+    assert registry.select(engines, max_engines=2, resample_seconds=900, now=left_out_at + 950) == \
+        ["Google", "Bravo Search", "Yahoo!"]
@@ -0,0 +1,44 @@
+import asyncio
+
+from database import SeenResult
+
+
+def seen_rows(db_manager, user_session):
+    session = db_manager.get_session()
+    try:
+        return {row.fingerprint: (row.first_seen_at, row.last_seen_at)
+                for row in session.query(SeenResult).filter(SeenResult.user_session == user_session)}
+    finally:
+        session.close()
+
+
+def test_mark_results_seen_keeps_new_rows_when_some_already_exist(db_manager):
+    assert db_manager.mark_results_seen("u1", ["a", "b"])
+    before = seen_rows(db_manager, "u1")
+
+    # "b" is already there, as after a concurrent search by the same user
+    assert db_manager.mark_results_seen("u1", ["b", "c", "d"], chunk_size=2)
+
+    after = seen_rows(db_manager, "u1")
+    assert set(after) == {"a", "b", "c", "d"}
+    assert after["b"][0] == before["b"][0]
+    assert after["b"][1] >= before["b"][1]
+    assert db_manager.get_seen_fingerprints("u1", ["a", "c", "x"]) == {"a", "c"}
+    assert db_manager.get_seen_fingerprints("u2", ["a"]) == set()
+
+
+def test_async_mark_results_seen_keeps_new_rows_when_some_already_exist(db_manager):
+    from async_database import AsyncDatabaseManager
+
+    async def run():
+        async_db = AsyncDatabaseManager()
+        await async_db.initialize()
+        try:
+            assert await async_db.mark_results_seen("u1", ["a", "b"])
+            assert await async_db.mark_results_seen("u1", ["b", "c"], chunk_size=1)
+            return await async_db.get_seen_fingerprints("u1", ["a", "b", "c", "x"])
+        finally:
+            await async_db.close()
+
+    assert asyncio.run(run()) == {"a", "b", "c"}
+    assert set(seen_rows(db_manager, "u1")) == {"a", "b", "c"}
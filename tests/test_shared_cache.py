@@ -0,0 +1,116 @@
+import asyncio
+import multiprocessing
+import sqlite3
+import time
+
+import pytest
+
+from database import UserPreferences, cache_user_preferences
+from shared_cache import SharedCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SharedCache(str(tmp_path / "cache.db"), max_entries=3)
+
+
+def test_get_set_and_namespaces(cache):
+    cache.set('search', ("Google", "edital"), [{'title': "A"}], ttl=60)
+
+    assert cache.get('search', ["Google", "edital"]) == [{'title': "A"}]
+    assert cache.get('preferences', ("Google", "edital")) is None
+    assert 59 < cache.time_to_live('search', ("Google", "edital")) <= 60
+    assert cache.stats() == {'search': 1}
+
+
+def test_expired_entries_are_misses(cache):
+    cache.set('search', "k", "v", ttl=0.05)
+    time.sleep(0.1)
+
+    assert cache.get('search', "k") is None
+    assert cache.time_to_live('search', "k") == 0
+
+
+def test_evict_keeps_the_most_recently_used(cache):
+    for key in ("a", "b", "c", "d"):
+        cache.set('search', key, key, ttl=60)
+    cache.evict('search')
+
+    assert cache.get('search', "a") is None
+    assert [cache.get('search', key) for key in ("b", "c", "d")] == ["b", "c", "d"]
+
+
+def test_older_versions_do_not_replace_newer_ones(cache):
+    cache.set('preferences', "u1", {'custom_keywords': ["novo"]}, ttl=60, version=2.0)
+    cache.set('preferences', "u1", {'custom_keywords': ["antigo"]}, ttl=60, version=1.0)
+    assert cache.get('preferences', "u1") == {'custom_keywords': ["novo"]}
+
+    cache.set('preferences', "u1", {'custom_keywords': ["mais novo"]}, ttl=60, version=3.0)
+    assert cache.get('preferences', "u1") == {'custom_keywords': ["mais novo"]}
+    # Unversioned writes always win
+    cache.set('preferences', "u1", {}, ttl=60)
+    assert cache.get('preferences', "u1") == {}
+
+
+def test_cache_files_without_versions_are_upgraded(tmp_path):
+    path = str(tmp_path / "old.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE cache_entries (namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, "
+                     "expires_at REAL NOT NULL, accessed_at REAL NOT NULL, PRIMARY KEY (namespace, key))")
+
+    cache = SharedCache(path)
+
+    assert cache.set('preferences', "u1", {}, ttl=60, version=1.0)
+    assert cache.get('preferences', "u1") == {}
+
+
+def write_from_child(path):
+    SharedCache(path).set('search', "shared", "from another process", ttl=60)
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_entries_are_shared_across_processes(cache):
+    child = multiprocessing.get_context('fork').Process(target=write_from_child, args=(cache.path,))
+    child.start()
+    child.join(timeout=30)
+
+    assert child.exitcode == 0
+    assert cache.get('search', "shared") == "from another process"
+
+
+def test_saved_preferences_survive_a_stale_reader(db_manager):
+    db_manager.save_user_preferences("u1", custom_keywords=["antigo"])
+    session = db_manager.get_session()
+    try:
+        stale_updated_at = session.query(UserPreferences.updated_at).filter_by(user_session="u1").scalar()
+    finally:
+        session.close()
+
+    db_manager.save_user_preferences("u1", custom_keywords=["novo"])
+    # A worker that read the row before the save fills the cache only now
+    cache_user_preferences("u1", {'custom_keywords': ["antigo"]}, stale_updated_at)
+
+    assert db_manager.get_user_preferences("u1")['custom_keywords'] == ["novo"]
+
+
+def test_new_users_are_cached_as_empty(db_manager):
+    assert db_manager.get_user_preferences("nobody") is None
+    db_manager.save_user_preferences("nobody", preferred_engines=["Google"])
+
+    assert db_manager.get_user_preferences("nobody")['preferred_engines'] == ["Google"]
+
+
+def test_async_save_writes_through(db_manager):
+    from async_database import AsyncDatabaseManager
+
+    async def save():
+        manager = AsyncDatabaseManager()
+        await manager.initialize()
+        try:
+            return await manager.save_user_preferences("u1", custom_keywords=["assíncrono"])
+        finally:
+            await manager.close()
+
+    assert db_manager.get_user_preferences("u1") is None
+    assert asyncio.run(save())
+    assert db_manager.get_user_preferences("u1")['custom_keywords'] == ["assíncrono"]
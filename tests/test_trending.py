@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from database import SearchHistory, TrendingScore
+from trending import TrendingEngine
+
+NOW = datetime(2026, 6, 15, 12, 0)
+
+
+def add_search(db_manager, history_id, query, timestamp):
+    session = db_manager.get_session()
+    try:
+        session.add(SearchHistory(id=history_id, query=query, engines=["Google"], results_count=1,
+                                  timestamp=timestamp, user_session="u1"))
+        session.commit()
+    finally:
+        session.close()
+
+
+def delete_searches(db_manager):
+    session = db_manager.get_session()
+    try:
+        session.query(SearchHistory).delete()
+        session.commit()
+    finally:
+        session.close()
+
+
+def query_events(db_manager):
+    session = db_manager.get_session()
+    try:
+        return {row.key: row.events for row in session.query(TrendingScore).filter(TrendingScore.kind == 'query')}
+    finally:
+        session.close()
+
+
+def test_searches_that_commit_out_of_id_order_are_counted(db_manager):
+    engine = TrendingEngine(db_manager, commit_lag_seconds=120)
+    add_search(db_manager, 2, "edital", NOW - timedelta(minutes=10))
+    engine.refresh(NOW)
+
+    # A transaction that took the lower id commits only after the refresh
+    add_search(db_manager, 1, "bolsa", NOW - timedelta(seconds=30))
+    engine.refresh(NOW + timedelta(minutes=5))
+
+    assert query_events(db_manager) == {"edital": 1, "bolsa": 1}
+
+
+def test_recent_searches_wait_for_the_commit_lag(db_manager):
+    engine = TrendingEngine(db_manager, commit_lag_seconds=120)
+    add_search(db_manager, 1, "edital", NOW - timedelta(seconds=30))
+
+    engine.refresh(NOW)
+    assert query_events(db_manager) == {}
+    engine.refresh(NOW + timedelta(minutes=5))
+    engine.refresh(NOW + timedelta(minutes=10))
+    assert query_events(db_manager) == {"edital": 1}
+
+
+def test_ids_reused_after_retention_are_counted(db_manager):
+    engine = TrendingEngine(db_manager, commit_lag_seconds=120)
+    add_search(db_manager, 1, "edital", NOW - timedelta(minutes=10))
+    engine.refresh(NOW)
+
+    # Retention emptied search_history, so SQLite hands out id 1 again
+    delete_searches(db_manager)
+    add_search(db_manager, 1, "edital", NOW + timedelta(minutes=1))
+    engine.refresh(NOW + timedelta(minutes=10))
+
+    assert query_events(db_manager) == {"edital": 2}
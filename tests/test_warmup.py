@@ -0,0 +1,75 @@
+from warmup import CacheWarmer, EngineBudget, WARMUP_REAL_DATA, WARMUP_USAGE_PREFIX
+from quota import QUOTA_MIN_RESULTS, QuotaScheduler
+from result_cache import SearchResultCache
+
+
+class FakeDatabase:
+    db_available = False
+
+    def get_frequent_searches(self, since, limit=10):
+        return []
+
+
+class FakeQuota:
+    def __init__(self, remaining):
+        self._remaining = remaining
+
+    def remaining(self, engine):
+        return self._remaining.get(engine)
+
+    def in_reserve(self, engine):
+        return False
+
+
+class FakeSearchManager:
+    def __init__(self):
+        self.cache = SearchResultCache()
+        self.use_real_data = False
+        self.quota = None
+        self.calls = []
+
+    def search_engine(self, engine, query, keywords, refresh=False):
+        self.calls.append(engine)
+        return []
+
+
+def make_warmer(real_data, remaining):
+    manager = FakeSearchManager()
+    warmer = CacheWarmer(FakeDatabase(), ["poesia"], ["Google", "DuckDuckGo"],
+                         search_manager=manager, budget=EngineBudget(10), real_data=real_data)
+    manager.quota = FakeQuota(remaining)
+    return warmer, manager
+
+
+def test_warmup_defaults_to_mock_data():
+    assert WARMUP_REAL_DATA is False
+
+
+def test_real_warmup_skips_engines_without_quota_headroom():
+    warmer, manager = make_warmer(True, {"Google": QUOTA_MIN_RESULTS - 1})
+    assert warmer.run_once() == 1
+    assert manager.calls == ["DuckDuckGo"]
+
+
+def test_real_warmup_uses_engines_with_headroom():
+    warmer, manager = make_warmer(True, {"Google": QUOTA_MIN_RESULTS * 5})
+    assert warmer.run_once() == 2
+
+
+def test_mock_warmup_ignores_quota():
+    warmer, manager = make_warmer(False, {"Google": 0})
+    assert warmer.run_once() == 2
+
+
+def test_budget_is_shared_by_every_process(db_manager):
+    # One scheduler per process, all reading and writing the same engine_usage table
+    budgets = [EngineBudget(3, quota=QuotaScheduler(db_manager)) for _ in range(2)]
+
+    assert [budgets[0].try_spend("Google"), budgets[1].try_spend("Google", 2)] == [True, True]
+    assert not budgets[0].try_spend("Google")
+    assert budgets[1].try_spend("DuckDuckGo")
+
+    usage = db_manager.get_engine_usage()
+    assert usage[WARMUP_USAGE_PREFIX + "Google"]['day'] == 3
+    # Warm-up is counted apart from the engine's own quota rows
+    assert "Google" not in usage
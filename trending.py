@@ -0,0 +1,205 @@
+import math
+import os
+import threading
+from datetime import datetime, time as day_time, timedelta
+
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import (
+    SavedSearch, SearchHistory, SearchHistoryDaily, Opportunity, TrendingScore, TrendingState
+)
+
+# Every event contributes weight * 2^(-age / half-life); scores are stored
+# already decayed to trending_state.refreshed_at, so a refresh only has to
+# scale the whole table once and add the events past the watermarks.
+HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', '72'))
+REFRESH_INTERVAL_SECONDS = int(os.getenv('TRENDING_REFRESH_INTERVAL', '300'))
+# Events are only read once they are this old. Watermarks are (timestamp, id):
+# ids come back after retention on SQLite and commit out of order on
+# Postgres, while a row stamped before the cutoff has committed by then.
+COMMIT_LAG_SECONDS = int(os.getenv('TRENDING_COMMIT_LAG_SECONDS', '120'))
+SAVE_WEIGHT = 3.0
+SEARCH_WEIGHT = 1.0
+MIN_SCORE = 0.01  # Rows decayed below this are dropped
+
+# Placeholder stored when the user searched with an empty box
+IGNORED_QUERIES = {"busca geral"}
+
+
+def normalize_query(query):
+    return ' '.join((query or '').lower().split())
+
+
+class TrendingEngine:
+    """Incrementally maintains trending_scores from saves and searches"""
+
+    def __init__(self, db_manager, half_life_hours=HALF_LIFE_HOURS, batch_size=1000,
+                 commit_lag_seconds=COMMIT_LAG_SECONDS):
+        self.db_manager = db_manager
+        self.decay_rate = math.log(2) / (half_life_hours * 3600)
+        self.batch_size = batch_size
+        self.commit_lag = timedelta(seconds=commit_lag_seconds)
+
+    def _weight(self, base, event_at, now):
+        age = max((now - event_at).total_seconds(), 0) if event_at else 0
+        return base * math.exp(-self.decay_rate * age)
+
+    @staticmethod
+    def _after(timestamp_column, id_column, last_at, last_id):
+        """Keyset condition for rows past the (timestamp, id) watermark"""
+        if last_at is None:
+            return timestamp_column.isnot(None)
+        return or_(timestamp_column > last_at, and_(timestamp_column == last_at, id_column > last_id))
+
+    def _collect_saves(self, session, state, now, increments):
+        cutoff = now - self.commit_lag
+        while True:
+            rows = session.query(SavedSearch.id, SavedSearch.saved_at, Opportunity.id, Opportunity.title)\
+                .join(Opportunity, SavedSearch.opportunity_id == Opportunity.id)\
+                .filter(self._after(SavedSearch.saved_at, SavedSearch.id, state.last_saved_at, state.last_saved_id))\
+                .filter(SavedSearch.saved_at <= cutoff)\
+                .order_by(SavedSearch.saved_at, SavedSearch.id)\
+                .limit(self.batch_size)\
+                .all()
+            for saved_id, saved_at, opportunity_id, title in rows:
+                self._add(increments, 'opportunity', str(opportunity_id), title, opportunity_id,
+                          self._weight(SAVE_WEIGHT, saved_at, now), saved_at)
+                state.last_saved_at, state.last_saved_id = saved_at, saved_id
+            if len(rows) < self.batch_size:
+                return
+
+    def _collect_searches(self, session, state, now, increments):
+        cutoff = now - self.commit_lag
+        while True:
+            rows = session.query(SearchHistory.id, SearchHistory.query, SearchHistory.timestamp)\
+                .filter(self._after(SearchHistory.timestamp, SearchHistory.id,
+                                    state.last_history_at, state.last_history_id))\
+                .filter(SearchHistory.timestamp <= cutoff)\
+                .order_by(SearchHistory.timestamp, SearchHistory.id)\
+                .limit(self.batch_size)\
+                .all()
+            for history_id, query, timestamp in rows:
+                key = normalize_query(query)
+                if key and key not in IGNORED_QUERIES:
+                    self._add(increments, 'query', key, query.strip(), None,
+                              self._weight(SEARCH_WEIGHT, timestamp, now), timestamp)
+                state.last_history_at, state.last_history_id = timestamp, history_id
+            if len(rows) < self.batch_size:
+                return
+
+    def _seed_from_rollups(self, session, now, increments):
+        """First refresh only: searches already archived survive as daily rollups"""
+        for day, query, searches in session.query(
+                SearchHistoryDaily.day, SearchHistoryDaily.query, SearchHistoryDaily.searches):
+            key = normalize_query(query)
+            if key and key not in IGNORED_QUERIES:
+                midday = datetime.combine(day, day_time(12))
+                self._add(increments, 'query', key, query.strip(), None,
+                          self._weight(SEARCH_WEIGHT * (searches or 0), midday, now), midday, searches or 0)
+
+    @staticmethod
+    def _add(increments, kind, key, label, opportunity_id, weight, event_at, events=1):
+        entry = increments.setdefault((kind, key), {
+            'label': label, 'opportunity_id': opportunity_id, 'score': 0.0, 'events': 0, 'last_event_at': None
+        })
+        entry['score'] += weight
+        entry['events'] += events
+        if event_at and (entry['last_event_at'] is None or event_at > entry['last_event_at']):
+            entry['last_event_at'] = event_at
+            entry['label'] = label
+
+    def refresh(self, now=None):
+        """Decay stored scores to now and fold in new activity; returns rows touched"""
+        if not self.db_manager.db_available:
+            return 0
+        session = self.db_manager.get_session()
+        if not session:
+            return 0
+
+        now = now or datetime.utcnow()
+        try:
+            # The row lock serializes refreshes across processes on Postgres;
+            # SQLite already allows a single writer.
+            state = session.query(TrendingState).filter(TrendingState.id == 1).with_for_update().first()
+            increments = {}
+            if state is None:
+                state = TrendingState(id=1, last_saved_id=0, last_history_id=0)
+                session.add(state)
+                self._seed_from_rollups(session, now, increments)
+            elif state.refreshed_at:
+                # State kept by id watermarks only: everything up to the last refresh was read
+                if state.last_saved_at is None and state.last_saved_id:
+                    state.last_saved_at = state.refreshed_at
+                if state.last_history_at is None and state.last_history_id:
+                    state.last_history_at = state.refreshed_at
+                elapsed = max((now - state.refreshed_at).total_seconds(), 0)
+                session.query(TrendingScore)\
+                    .update({TrendingScore.score: TrendingScore.score * math.exp(-self.decay_rate * elapsed)},
+                            synchronize_session=False)
+
+            self._collect_saves(session, state, now, increments)
+            self._collect_searches(session, state, now, increments)
+
+            for kind in ('opportunity', 'query'):
+                keys = [key for (entry_kind, key) in increments if entry_kind == kind]
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    existing = {
+                        row.key: row for row in session.query(TrendingScore)
+                        .filter(TrendingScore.kind == kind)
+                        .filter(TrendingScore.key.in_(chunk))
+                    }
+                    for key in chunk:
+                        entry = increments[(kind, key)]
+                        row = existing.get(key)
+                        if row is None:
+                            session.add(TrendingScore(kind=kind, key=key, **entry))
+                            continue
+                        row.score = (row.score or 0.0) + entry['score']
+                        row.events = (row.events or 0) + entry['events']
+                        if entry['last_event_at'] and (row.last_event_at is None
+                                                        or entry['last_event_at'] > row.last_event_at):
+                            row.last_event_at = entry['last_event_at']
+                            row.label = entry['label']
+
+            session.flush()
+            session.query(TrendingScore)\
+                .filter(TrendingScore.score < MIN_SCORE)\
+                .delete(synchronize_session=False)
+            state.refreshed_at = now
+            session.commit()
+            return len(increments)
+        except SQLAlchemyError as e:
+            session.rollback()
+            print(f"Error refreshing trending scores: {e}")
+            return 0
+        finally:
+            session.close()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def start_trending_worker(db_manager, interval=REFRESH_INTERVAL_SECONDS):
+    """Start the process-wide background refresh thread (no-op if already running)"""
+    global _worker
+    with _worker_lock:
+        if _worker is not None or not db_manager.db_available:
+            return _worker
+        engine = TrendingEngine(db_manager)
+        stop = threading.Event()
+
+        def loop():
+            while not stop.is_set():
+                try:
+                    engine.refresh()
+                except Exception as e:
+                    print(f"Trending refresh error: {e}")
+                stop.wait(interval)
+
+        thread = threading.Thread(target=loop, name="trending-refresh", daemon=True)
+        thread.start()
+        _worker = (thread, stop)
+        return _worker
@@ -0,0 +1,144 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+from search_engines import SearchEngineManager
+from result_cache import make_cache_key
+from quota import get_quota_scheduler, QUOTA_MIN_RESULTS
+
+WARMUP_INTERVAL_SECONDS = int(os.getenv('CACHE_WARMUP_INTERVAL', '900'))
+WARMUP_TOP_N = int(os.getenv('CACHE_WARMUP_TOP_N', '5'))
+WARMUP_LOOKBACK_DAYS = int(os.getenv('CACHE_WARMUP_LOOKBACK_DAYS', '7'))
+# Upper bound on warm-up calls per engine per day, so pre-fetching never eats
+# the quota that interactive searches need
+WARMUP_DAILY_BUDGET = int(os.getenv('CACHE_WARMUP_DAILY_BUDGET', '50'))
+# engine_usage rows for warm-up calls are kept apart from the engines' own quota rows
+WARMUP_USAGE_PREFIX = "warmup:"
+# Same default as the app's "Tentar busca real" checkbox, so the warmed keys
+# are the ones a default session reads; real-engine warm-up spends paid quota
+# and is opt-in
+WARMUP_REAL_DATA = os.getenv('CACHE_WARMUP_REAL_DATA', '0') == '1'
+
+# app.py stores searches with an empty box under this label
+EMPTY_QUERY_LABEL = "Busca geral"
+
+
+class EngineBudget:
+    """Per-engine daily call budget (resets at midnight UTC)
+
+    With a quota scheduler, warm-up calls are charged in the engine_usage
+    table under WARMUP_USAGE_PREFIX + engine, so every process draws on one
+    budget; without a database each process keeps its own count.
+    """
+
+    def __init__(self, daily_limit=WARMUP_DAILY_BUDGET, quota=None):
+        self.daily_limit = daily_limit
+        self.quota = quota
+        self._day = datetime.utcnow().date()
+        self._spent = {}
+        self._lock = threading.Lock()
+
+    def try_spend(self, engine, calls=1):
+        if self.quota:
+            return self.quota.try_record(WARMUP_USAGE_PREFIX + engine, calls, daily_limit=self.daily_limit)
+        with self._lock:
+            today = datetime.utcnow().date()
+            if today != self._day:
+                self._day, self._spent = today, {}
+            if self._spent.get(engine, 0) + calls > self.daily_limit:
+                return False
+            self._spent[engine] = self._spent.get(engine, 0) + calls
+            return True
+
+    def remaining(self, engine):
+        if self.quota:
+            return max(self.daily_limit - self.quota.usage(WARMUP_USAGE_PREFIX + engine)['day'], 0)
+        with self._lock:
+            if datetime.utcnow().date() != self._day:
+                return self.daily_limit
+            return self.daily_limit - self._spent.get(engine, 0)
+
+
+class CacheWarmer:
+    """Pre-executes the most frequent searches so the first search of the day is a cache hit"""
+
+    def __init__(self, db_manager, default_keywords=None, default_engines=None,
+                 search_manager=None, budget=None, top_n=WARMUP_TOP_N,
+                 interval=WARMUP_INTERVAL_SECONDS, real_data=WARMUP_REAL_DATA):
+        self.db_manager = db_manager
+        self.default_keywords = list(default_keywords or [])
+        self.default_engines = list(default_engines or [])
+        self.search_manager = search_manager or SearchEngineManager()
+        self.search_manager.use_real_data = real_data
+        self.search_manager.quota = get_quota_scheduler(db_manager)
+        self.budget = budget or EngineBudget(quota=self.search_manager.quota)
+        self.top_n = top_n
+        self.interval = interval
+
+    def plan(self, now=None):
+        """(query, keywords, engines) combinations to keep warm, most frequent first"""
+        since = (now or datetime.utcnow()) - timedelta(days=WARMUP_LOOKBACK_DAYS)
+        combinations = []
+        if self.default_engines:
+            combinations.append(("", self.default_keywords, self.default_engines))
+        for entry in self.db_manager.get_frequent_searches(since, limit=self.top_n):
+            query = "" if entry['query'] == EMPTY_QUERY_LABEL else entry['query']
+            combinations.append((query, entry['keywords'], entry['engines']))
+        return combinations
+
+    def _quota_reserved(self, engine):
+        """Whatever quota is left near the reserve belongs to interactive searches"""
+        quota = self.search_manager.quota
+        if not quota or not self.search_manager.use_real_data:
+            return False
+        remaining = quota.remaining(engine)
+        return quota.in_reserve(engine) or (remaining is not None and remaining < QUOTA_MIN_RESULTS)
+
+    def run_once(self, now=None):
+        """Refresh entries that would expire before the next pass; returns engine calls made"""
+        calls = 0
+        seen = set()
+        cache = self.search_manager.cache
+        for query, keywords, engines in self.plan(now):
+            for engine in engines:
+                key = make_cache_key(engine, query, keywords, self.search_manager.use_real_data)
+                if key in seen or cache.time_to_live(key) > self.interval:
+                    continue
+                seen.add(key)
+                if self._quota_reserved(engine):
+                    continue
+                if not self.budget.try_spend(engine):
+                    continue
+                try:
+                    self.search_manager.search_engine(engine, query, keywords, refresh=True)
+                    calls += 1
+                except Exception as e:
+                    print(f"Cache warm-up error for {engine}: {e}")
+        return calls
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def start_cache_warmer(db_manager, default_keywords, default_engines, interval=WARMUP_INTERVAL_SECONDS):
+    """Start the process-wide warm-up thread (no-op if already running)"""
+    global _worker
+    with _worker_lock:
+        if _worker is not None:
+            return _worker
+        warmer = CacheWarmer(db_manager, default_keywords, default_engines, interval=interval)
+        stop = threading.Event()
+
+        def loop():
+            while not stop.is_set():
+                try:
+                    warmer.run_once()
+                except Exception as e:
+                    print(f"Cache warm-up error: {e}")
+                stop.wait(interval)
+
+        thread = threading.Thread(target=loop, name="cache-warmup", daemon=True)
+        thread.start()
+        _worker = (thread, stop)
+        return _worker